@@ -0,0 +1,103 @@
+"""Micro-benchmark of frame decode + convert throughput.
+
+Measures the first-byte dispatcher followed by FrameDecoder.decode on JSON
+frames and on the same status frames re-encoded in the compact positional
+format, and compares bytes per frame. Frames are read from a file with one
+raw frame per line (--frames-file), or a synthetic recording of a heater
+warming up is generated.
+
+Usage: python benchmarks/bench_decode.py [--frames-file frames.txt] [--repeat 20]
+"""
+import argparse
+import importlib.util
+import json
+import pathlib
+import random
+import time
+
+_PACKAGE_PATH = (
+    pathlib.Path(__file__).resolve().parent.parent / "custom_components" / "webasto_heater"
+)
+
+
+def _load_module(name):
+    # schema.py и protocol.py не зависят от Home Assistant, загружаем их напрямую
+    spec = importlib.util.spec_from_file_location(f"webasto_{name}", _PACKAGE_PATH / f"{name}.py")
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def _synthetic_frames(count):
+    rng = random.Random(0)
+    frames = [json.dumps({"settings": {
+        "pump_size": 22, "heater_target": 195, "heater_min": 190,
+        "heater_overheat": 230, "heater_warning": 225, "max_pwm_fan": 255,
+        "glow_brightness": 200, "glow_fade_in_duration": 5000,
+        "glow_fade_out_duration": 5000,
+    }})]
+    temp = 20.0
+    for i in range(count):
+        temp = min(200.0, temp + rng.uniform(-0.2, 1.0))
+        frames.append(json.dumps({
+            "exhaust_temp": round(temp, 1),
+            "fan_speed": rng.randint(40, 60),
+            "fuel_rate_hz": round(rng.uniform(1.5, 2.5), 2),
+            "burn_mode": 2,
+            "attempt": 1,
+            "message": "Burning",
+            "currentState": i % 3,
+            "burn": 1,
+            "webasto_fail": 0,
+            "debug_glow_plug_on": "false",
+            "fuel_pumping_active": 0,
+            "logging_enabled": False,
+            "wifi_ssid": "garage",
+            "wifi_ip": "192.168.1.50",
+            "wifi_status": 3,
+            "total_fuel_consumed_liters": round(i * 0.0001, 4),
+            "fuel_consumption_per_hour": round(rng.uniform(0.2, 0.3), 3),
+        }))
+    return frames
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--frames-file", type=pathlib.Path)
+    parser.add_argument("--frames", type=int, default=5000)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    schema = _load_module("schema")
+    protocol = _load_module("protocol")
+    if args.frames_file:
+        frames = [
+            line for line in args.frames_file.read_text().splitlines()
+            if line.startswith("{")
+        ]
+    else:
+        frames = _synthetic_frames(args.frames)
+    compact = [
+        protocol.encode_compact(data)
+        for data in map(json.loads, frames) if "settings" not in data
+    ]
+
+    decoder = schema.FrameDecoder()
+    dispatcher = protocol.FrameDispatcher()
+    for name, batch in (("json", frames), ("compact", compact)):
+        start = time.perf_counter()
+        for _ in range(args.repeat):
+            for frame in batch:
+                _codec, _kind, raw = dispatcher.decode(frame)
+                decoder.decode(raw)
+        elapsed = time.perf_counter() - start
+
+        total = len(batch) * args.repeat
+        print(f"{name}:")
+        print(f"  frames:     {total}")
+        print(f"  bytes:      {sum(map(len, batch)) / len(batch):.0f} per frame")
+        print(f"  throughput: {total / elapsed:,.0f} frames/s")
+        print(f"  per frame:  {elapsed / total * 1e6:.2f} us (dispatch + decode)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,146 @@
+"""End-to-end load benchmark against the local simulator.
+
+Runs the simulator in-process, connects a real WebastoHeaterData to it and
+adds the real sensor, binary_sensor and number entities to a Home Assistant
+instance. Reports frames/s sustained, frame-to-state-write latency
+percentiles and CPU time per frame (simulator included).
+
+Requires homeassistant and websockets to be installed.
+
+Usage: python benchmarks/bench_e2e.py [--rate 50] [--duration 10]
+"""
+import argparse
+import asyncio
+import logging
+import pathlib
+import statistics
+import sys
+import tempfile
+import time
+from types import SimpleNamespace
+
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parent.parent))
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parent))
+
+from homeassistant.const import EVENT_STATE_CHANGED  # noqa: E402
+from homeassistant.core import HomeAssistant  # noqa: E402
+from homeassistant.helpers import device_registry as dr, entity_registry as er  # noqa: E402
+from homeassistant.helpers.entity_component import EntityComponent  # noqa: E402
+
+from custom_components.webasto_heater import (  # noqa: E402
+    DOMAIN,
+    WebastoConnectionManager,
+    WebastoHeaterData,
+    binary_sensor,
+    number,
+    sensor,
+)
+from simulator import HeaterSimulator, run_simulator  # noqa: E402
+
+PORT = 18081
+ENTRY_ID = "bench"
+_LOGGER = logging.getLogger(__name__)
+
+
+def _percentile(values, fraction):
+    if not values:
+        return float("nan")
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+async def _add_platform(hass, module, domain, entry):
+    component = EntityComponent(_LOGGER, domain, hass)
+    entities = []
+    await module.async_setup_entry(hass, entry, entities.extend)
+    await component.async_add_entities(entities)
+    return entities
+
+
+async def _run(args):
+    stop = asyncio.Event()
+    simulator = HeaterSimulator(rate=args.rate, timestamps=True, seed=0)
+    server = asyncio.create_task(run_simulator(simulator, "127.0.0.1", PORT, stop))
+    await asyncio.sleep(0.5)
+
+    with tempfile.TemporaryDirectory() as config_dir:
+        hass = HomeAssistant(config_dir)
+        await dr.async_load(hass)
+        await er.async_load(hass)
+
+        manager = WebastoConnectionManager(hass)
+        # Измеряем конвейер на полной частоте, без прореживания простаивающего нагревателя
+        heater = WebastoHeaterData(
+            hass, f"127.0.0.1:{PORT}", ENTRY_ID, "Bench", manager, adaptive_rate=False
+        )
+        manager.async_add(heater)
+        hass.data.setdefault(DOMAIN, {})[ENTRY_ID] = heater
+        entry = SimpleNamespace(entry_id=ENTRY_ID, options={})
+
+        await heater.connect()
+        entities = []
+        for module, domain in ((sensor, "sensor"), (binary_sensor, "binary_sensor"), (number, "number")):
+            entities += await _add_platform(hass, module, domain, entry)
+        entity_ids = {entity.entity_id for entity in entities}
+
+        frames = 0
+        writes = 0
+        latencies = []
+
+        def _on_frame():
+            nonlocal frames
+            frames += 1
+
+        def _on_state_changed(event):
+            nonlocal writes
+            if event.data["entity_id"] in entity_ids:
+                writes += 1
+                sent = heater.data.get("sim_ts")
+                if sent is not None:
+                    latencies.append(time.monotonic() - sent)
+
+        heater.add_listener(_on_frame, ("sim_ts",))
+        unsub = hass.bus.async_listen(EVENT_STATE_CHANGED, _on_state_changed)
+
+        await asyncio.sleep(1)
+        simulator.handle_command("ENTER")
+        frames = writes = 0
+        latencies.clear()
+        sent_start = simulator.frames_sent
+        cpu_start = time.process_time()
+        await asyncio.sleep(args.duration)
+        cpu = time.process_time() - cpu_start
+        sent = simulator.frames_sent - sent_start
+
+        unsub()
+        await heater.stop()
+        manager.async_remove(heater)
+        stop.set()
+        await server
+
+    print(f"entities:          {len(entities)}")
+    print(f"frames sent:       {sent / args.duration:,.1f} /s")
+    print(f"frames processed:  {frames / args.duration:,.1f} /s")
+    print(f"state writes:      {writes / args.duration:,.1f} /s")
+    if frames:
+        print(f"CPU per frame:     {cpu / frames * 1e6:.1f} us")
+    if latencies:
+        print(
+            "write latency:     p50 {:.2f} ms, p95 {:.2f} ms, p99 {:.2f} ms, mean {:.2f} ms".format(
+                _percentile(latencies, 0.50) * 1e3,
+                _percentile(latencies, 0.95) * 1e3,
+                _percentile(latencies, 0.99) * 1e3,
+                statistics.fmean(latencies) * 1e3,
+            )
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rate", type=float, default=50.0, help="frames/s, 0 = max")
+    parser.add_argument("--duration", type=float, default=10.0)
+    asyncio.run(_run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+"""Benchmark of per-frame listener fan-out.
+
+Compares the old dispatch (one asyncio task per listener per frame) with the
+inline @callback dispatch used by WebastoHeaterData._notify_listeners.
+
+Usage: python benchmarks/bench_fanout.py [--listeners 30] [--frames 20000]
+"""
+import argparse
+import asyncio
+import time
+import tracemalloc
+
+
+class _Entity:
+    """Minimal stand-in for an entity update handler."""
+
+    def __init__(self):
+        self.writes = 0
+
+    async def async_handle(self):
+        self.writes += 1
+
+    def handle(self):
+        self.writes += 1
+
+
+async def _run_tasks(entities, frames):
+    loop = asyncio.get_running_loop()
+    for _ in range(frames):
+        for entity in entities:
+            loop.create_task(entity.async_handle())
+        # Даём задачам выполниться, как это происходит между кадрами WebSocket
+        await asyncio.sleep(0)
+
+
+async def _run_inline(entities, frames):
+    for _ in range(frames):
+        for entity in entities:
+            entity.handle()
+        await asyncio.sleep(0)
+
+
+def _measure(name, runner, listeners, frames):
+    entities = [_Entity() for _ in range(listeners)]
+    tracemalloc.start()
+    start = time.perf_counter()
+    asyncio.run(runner(entities, frames))
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    assert all(entity.writes == frames for entity in entities)
+    print(
+        f"{name:>8}: {elapsed / frames * 1e6:8.2f} us/frame, "
+        f"{elapsed / (frames * listeners) * 1e9:8.1f} ns/listener, "
+        f"peak alloc {peak / 1024:8.1f} KiB"
+    )
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--listeners", type=int, default=30)
+    parser.add_argument("--frames", type=int, default=20000)
+    args = parser.parse_args()
+
+    before = _measure("tasks", _run_tasks, args.listeners, args.frames)
+    after = _measure("inline", _run_inline, args.listeners, args.frames)
+    print(f"speedup: {before / after:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
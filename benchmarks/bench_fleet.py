@@ -0,0 +1,93 @@
+"""Fleet benchmark: many simulated heaters behind one connection manager.
+
+Starts N simulated heaters (see simulator.py), connects a
+WebastoHeaterData per server through WebastoConnectionManager and reports
+time to connect the whole fleet, sustained frame rate and CPU per frame.
+
+Requires homeassistant and websockets to be installed.
+
+Usage: python benchmarks/bench_fleet.py [--heaters 30] [--rate 5] [--duration 10]
+"""
+import argparse
+import asyncio
+import pathlib
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parent.parent))
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parent))
+
+from homeassistant.core import HomeAssistant  # noqa: E402
+
+from custom_components.webasto_heater import (  # noqa: E402
+    ALL_KEYS,
+    WebastoConnectionManager,
+    WebastoHeaterData,
+)
+from simulator import HeaterSimulator, run_simulator  # noqa: E402
+
+BASE_PORT = 18100
+
+
+async def _run(args):
+    stop = asyncio.Event()
+    servers = [
+        asyncio.create_task(run_simulator(
+            HeaterSimulator(rate=args.rate, seed=i), "127.0.0.1", BASE_PORT + i, stop
+        ))
+        for i in range(args.heaters)
+    ]
+    await asyncio.sleep(0.5)
+
+    with tempfile.TemporaryDirectory() as config_dir:
+        hass = HomeAssistant(config_dir)
+        manager = WebastoConnectionManager(hass)
+        frames = 0
+
+        def _count():
+            nonlocal frames
+            frames += 1
+
+        heaters = []
+        for i in range(args.heaters):
+            heater = WebastoHeaterData(
+                hass, f"127.0.0.1:{BASE_PORT + i}", f"bench_{i}", f"Heater {i}", manager,
+                adaptive_rate=False,
+            )
+            heater.add_listener(_count, (ALL_KEYS,))
+            manager.async_add(heater)
+            heaters.append(heater)
+
+        start = time.perf_counter()
+        await asyncio.gather(*(heater.connect() for heater in heaters))
+        connect_time = time.perf_counter() - start
+        connected = sum(heater.is_connected for heater in heaters)
+
+        frames = 0
+        cpu_start = time.process_time()
+        await asyncio.sleep(args.duration)
+        cpu = time.process_time() - cpu_start
+
+        for heater in heaters:
+            await heater.stop()
+            manager.async_remove(heater)
+        stop.set()
+        await asyncio.gather(*servers)
+
+    print(f"heaters connected: {connected}/{args.heaters} in {connect_time:.2f} s")
+    print(f"updates/s:         {frames / args.duration:,.0f}")
+    if frames:
+        print(f"CPU per update:    {cpu / frames * 1e6:.1f} us (includes simulated servers)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--heaters", type=int, default=30)
+    parser.add_argument("--rate", type=float, default=5.0, help="frames/s per heater")
+    parser.add_argument("--duration", type=float, default=10.0)
+    asyncio.run(_run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+"""Startup and shutdown benchmark against the simulator.
+
+Reports the import time of the integration, how long starting a heater
+blocks the caller, the time to the first frame, and how long stop() takes
+with a healthy and with a wedged connection (the simulator stops reading,
+so the closing handshake is never answered).
+
+Requires homeassistant and websockets to be installed.
+
+Usage: python benchmarks/bench_startup.py [--rate 1]
+"""
+import argparse
+import asyncio
+import pathlib
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = pathlib.Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+sys.path.insert(0, str(ROOT / "benchmarks"))
+
+from homeassistant.core import HomeAssistant  # noqa: E402
+
+from custom_components.webasto_heater import ALL_KEYS, WebastoHeaterData  # noqa: E402
+from simulator import HeaterSimulator, run_simulator  # noqa: E402
+
+PORT = 18090
+# Порт, на котором никто не слушает: "спящий" нагреватель
+CLOSED_PORT = 18091
+
+IMPORT_PROBE = (
+    "import time; start = time.perf_counter(); "
+    "import custom_components.webasto_heater; "
+    "print(time.perf_counter() - start)"
+)
+
+
+def _measure_import():
+    output = subprocess.run(
+        [sys.executable, "-c", IMPORT_PROBE],
+        cwd=ROOT, capture_output=True, text=True, check=True,
+    ).stdout
+    return float(output)
+
+
+async def _start_and_stop(hass, simulator, name, wedge):
+    heater = WebastoHeaterData(hass, f"127.0.0.1:{PORT}", name, name)
+    first_frame = asyncio.Event()
+    heater.add_listener(first_frame.set, (ALL_KEYS,))
+
+    start = time.perf_counter()
+    heater.async_start()
+    start_block = time.perf_counter() - start
+    await asyncio.wait_for(first_frame.wait(), timeout=30)
+    to_first_frame = time.perf_counter() - start
+
+    await asyncio.sleep(1)
+    if wedge:
+        simulator.wedge()
+    start = time.perf_counter()
+    await heater.stop()
+    return start_block, to_first_frame, time.perf_counter() - start
+
+
+async def _run(args):
+    stop = asyncio.Event()
+    simulator = HeaterSimulator(rate=args.rate)
+    server = asyncio.create_task(run_simulator(simulator, "127.0.0.1", PORT, stop))
+    await asyncio.sleep(0.5)
+
+    with tempfile.TemporaryDirectory() as config_dir:
+        hass = HomeAssistant(config_dir)
+
+        healthy = await _start_and_stop(hass, simulator, "healthy", wedge=False)
+        wedged = await _start_and_stop(hass, simulator, "wedged", wedge=True)
+
+        asleep = WebastoHeaterData(hass, f"127.0.0.1:{CLOSED_PORT}", "asleep", "asleep")
+        start = time.perf_counter()
+        asleep.async_start()
+        asleep_block = time.perf_counter() - start
+        await asyncio.sleep(0.5)
+        start = time.perf_counter()
+        await asleep.stop()
+        asleep_stop = time.perf_counter() - start
+
+    stop.set()
+    await server
+
+    print(f"start, heater up:        {healthy[0] * 1000:8.2f} ms blocking")
+    print(f"start, heater asleep:    {asleep_block * 1000:8.2f} ms blocking")
+    print(f"time to first frame:     {healthy[1] * 1000:8.2f} ms")
+    print(f"stop, healthy socket:    {healthy[2] * 1000:8.2f} ms")
+    print(f"stop, wedged socket:     {wedged[2] * 1000:8.2f} ms")
+    print(f"stop, heater asleep:     {asleep_stop * 1000:8.2f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rate", type=float, default=1.0, help="frames/s of the simulator")
+    args = parser.parse_args()
+
+    # websockets импортируется вместе с модулем (HA загружает его в executor), так что
+    # время импорта включает и его
+    print(f"integration import:      {_measure_import() * 1000:8.2f} ms")
+    asyncio.run(_run(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,144 @@
+"""Replay a raw frame capture through WebastoHeaterData.
+
+Feeds the frames recorded by the webasto.set_capture service back through
+the receive pipeline, with the real sensor, binary_sensor and number
+entities added to a Home Assistant instance. Plays at the recorded pace
+(--speed 1), N times faster (--speed N) or as fast as possible (--speed 0),
+then reports frames/s, CPU time per frame and state writes. Useful both to
+reproduce a field issue and as a realistic workload for throughput runs.
+
+Requires homeassistant to be installed.
+
+Usage: python benchmarks/replay.py CAPTURE_DIR [--speed 0] [--skip 120] [--limit 10000]
+"""
+import argparse
+import asyncio
+import importlib.util
+import logging
+import pathlib
+import sys
+import tempfile
+import time
+from types import SimpleNamespace
+
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parent.parent))
+
+from homeassistant.const import EVENT_STATE_CHANGED  # noqa: E402
+from homeassistant.core import HomeAssistant  # noqa: E402
+from homeassistant.helpers import device_registry as dr, entity_registry as er  # noqa: E402
+from homeassistant.helpers.entity_component import EntityComponent  # noqa: E402
+
+from custom_components.webasto_heater import (  # noqa: E402
+    DOMAIN,
+    WebastoHeaterData,
+    binary_sensor,
+    number,
+    sensor,
+)
+
+ENTRY_ID = "replay"
+_LOGGER = logging.getLogger(__name__)
+
+
+def _load_capture():
+    # capture.py не зависит от Home Assistant, но грузим его так же, как симулятор protocol.py
+    path = (
+        pathlib.Path(__file__).resolve().parent.parent
+        / "custom_components" / "webasto_heater" / "capture.py"
+    )
+    spec = importlib.util.spec_from_file_location("webasto_capture", path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+capture = _load_capture()
+
+
+async def _add_platform(hass, module, domain, entry):
+    component = EntityComponent(_LOGGER, domain, hass)
+    entities = []
+    await module.async_setup_entry(hass, entry, entities.extend)
+    await component.async_add_entities(entities)
+    return entities
+
+
+async def _run(args):
+    reader = capture.CaptureReader(args.directory)
+    if not reader.segments:
+        sys.exit(f"No capture segments in {args.directory}")
+    start = None
+    if args.skip:
+        first = next(reader.frames(), None)
+        start = first[0] + args.skip if first is not None else None
+
+    with tempfile.TemporaryDirectory() as config_dir:
+        hass = HomeAssistant(config_dir)
+        await dr.async_load(hass)
+        await er.async_load(hass)
+
+        # Без менеджера и подключения: кадры подаются прямо в конвейер приёма,
+        # а частотой управляет запись, а не адаптивный режим
+        heater = WebastoHeaterData(hass, "replay", ENTRY_ID, "Replay", adaptive_rate=False)
+        hass.data.setdefault(DOMAIN, {})[ENTRY_ID] = heater
+        entry = SimpleNamespace(entry_id=ENTRY_ID, options={})
+        entities = []
+        for module, domain in ((sensor, "sensor"), (binary_sensor, "binary_sensor"), (number, "number")):
+            entities += await _add_platform(hass, module, domain, entry)
+        entity_ids = {entity.entity_id for entity in entities}
+
+        writes = 0
+
+        def _on_state_changed(event):
+            nonlocal writes
+            if event.data["entity_id"] in entity_ids:
+                writes += 1
+
+        unsub = hass.bus.async_listen(EVENT_STATE_CHANGED, _on_state_changed)
+
+        frames = 0
+        origin = None
+        wall_start = time.monotonic()
+        cpu_start = time.process_time()
+        for timestamp, _direction, message in reader.frames(start=start):
+            if args.speed > 0:
+                if origin is None:
+                    origin = timestamp
+                # Монотонное время сбрасывается между перезапусками HA - назад не ждём
+                delay = wall_start + (timestamp - origin) / args.speed - time.monotonic()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+            if await heater._process_message(message):
+                heater._track_frame()
+            frames += 1
+            if frames % 256 == 0:
+                # Даём циклу событий выполнить отложенные задачи и на максимальной скорости
+                await asyncio.sleep(0)
+            if args.limit and frames >= args.limit:
+                break
+        elapsed = time.monotonic() - wall_start
+        cpu = time.process_time() - cpu_start
+
+        unsub()
+        await hass.async_block_till_done()
+
+    print(f"entities:          {len(entities)}")
+    print(f"frames replayed:   {frames} in {elapsed:.2f} s ({frames / elapsed if elapsed else 0:,.1f} /s)")
+    print(f"state writes:      {writes}")
+    if frames:
+        print(f"CPU per frame:     {cpu / frames * 1e6:.1f} us")
+    print(f"decode errors:     {heater.metrics.decode_errors}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("directory", help="capture directory, e.g. config/webasto_captures/<entry_id>")
+    parser.add_argument("--speed", type=float, default=1.0, help="1 = recorded pace, N = N times faster, 0 = max")
+    parser.add_argument("--skip", type=float, default=0.0, help="start this many seconds into the capture")
+    parser.add_argument("--limit", type=int, default=0, help="stop after this many frames")
+    logging.basicConfig(level=logging.WARNING)
+    asyncio.run(_run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,320 @@
+"""Local stand-in for the ESP8266 Webasto controller.
+
+Speaks the same WebSocket protocol as the firmware: JSON status frames pushed
+at a configurable rate, {"settings": {...}} (or legacy CURRENT_SETTINGS:)
+replies to GET_SETTINGS, and the button commands (ENTER, UP, DOWN, FP, CF,
+SET:, RESET_SETTINGS, RESET_FUEL_CONSUMPTION, LOG_ON/LOG_OFF, RESET_WIFI,
+REBOOT_ESP). With --compact it also accepts FORMAT:COMPACT1 and then pushes
+compact positional telemetry to that client. With --delta it accepts
+FORMAT:DELTA1 and then pushes sequence-numbered frames with only the changed
+keys, answering GET_STATE with a full frame; --drop loses a share of the
+delta frames to exercise gap detection. With --rate-control it follows
+RATE:<ms> requests instead of ignoring them. Used by the benchmarks, can also be
+run standalone:
+
+    python benchmarks/simulator.py --port 81 --rate 2 [--legacy-settings] [--compact] [--delta [--drop 0.05]]
+
+Requires websockets.
+"""
+import argparse
+import asyncio
+import importlib.util
+import json
+import logging
+import pathlib
+import random
+import time
+from typing import Any, Dict, Optional, Set, Tuple
+
+from websockets.asyncio.server import serve
+from websockets.exceptions import ConnectionClosed
+
+_LOGGER = logging.getLogger(__name__)
+
+
+def _load_protocol():
+    # protocol.py не зависит от Home Assistant: берём формат кадров у интеграции
+    path = (
+        pathlib.Path(__file__).resolve().parent.parent
+        / "custom_components" / "webasto_heater" / "protocol.py"
+    )
+    spec = importlib.util.spec_from_file_location("webasto_protocol", path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+protocol = _load_protocol()
+
+DEFAULT_SETTINGS = {
+    "pump_size": 22,
+    "heater_target": 195,
+    "heater_min": 190,
+    "heater_overheat": 230,
+    "heater_warning": 225,
+    "max_pwm_fan": 255,
+    "glow_brightness": 200,
+    "glow_fade_in_duration": 5000,
+    "glow_fade_out_duration": 5000,
+}
+
+AMBIENT_TEMP = 20.0
+# Частота насоса (Гц) для режимов HIGH / MID / LOW (currentState 0/1/2)
+PUMP_RATE_HZ = (3.0, 2.0, 1.2)
+
+
+class HeaterSimulator:
+    """State and protocol handling of one simulated heater."""
+
+    def __init__(
+        self,
+        rate: float = 1.0,
+        legacy_settings: bool = False,
+        jitter: float = 0.3,
+        timestamps: bool = False,
+        seed: Optional[int] = None,
+        compact: bool = False,
+        delta: bool = False,
+        drop: float = 0.0,
+        rate_control: bool = False,
+    ):
+        """Initialize the simulated heater."""
+        self.rate = rate
+        self.legacy_settings = legacy_settings
+        self.jitter = jitter
+        # Добавлять в кадры "sim_ts" (time.monotonic) для измерения задержки
+        self.timestamps = timestamps
+        # Поддерживает ли "прошивка" компактный формат телеметрии
+        self.compact = compact
+        # Поддерживает ли "прошивка" дельта-кадры и доля потерянных дельта-кадров
+        self.delta = delta
+        self.drop = drop
+        self.frames_dropped = 0
+        # Принимает ли "прошивка" RATE:<мс>
+        self.rate_control = rate_control
+        self.settings: Dict[str, Any] = dict(DEFAULT_SETTINGS)
+        self.burn = False
+        self.fail = False
+        self.fuel_pumping_until = 0.0
+        self.logging_enabled = False
+        self.current_state = 1
+        self.attempt = 0
+        self.exhaust_temp = AMBIENT_TEMP
+        self.total_fuel = 0.0
+        self.frames_sent = 0
+        self.commands: Dict[str, int] = {}
+        self._clients: Set[Any] = set()
+        # Клиенты, согласовавшие компактный формат
+        self._compact_clients: Set[Any] = set()
+        # Клиенты, согласовавшие дельта-кадры: номер следующего кадра и последний отправленный кадр
+        self._delta_clients: Dict[Any, Tuple[int, Dict[str, Any]]] = {}
+        self._random = random.Random(seed)
+        self._last_step = time.monotonic()
+
+    def status(self) -> Dict[str, Any]:
+        """Advance the model and return a status frame."""
+        now = time.monotonic()
+        elapsed, self._last_step = now - self._last_step, now
+        pumping = now < self.fuel_pumping_until
+
+        fuel_rate = PUMP_RATE_HZ[self.current_state] if self.burn else 0.0
+        if pumping:
+            fuel_rate = 5.0
+        target = self.settings["heater_target"] if self.burn else AMBIENT_TEMP
+        self.exhaust_temp += (target - self.exhaust_temp) * min(1.0, elapsed / 30)
+        # Объём за такт насоса задан в pump_size (мкл)
+        per_hour = fuel_rate * self.settings["pump_size"] * 3600 / 1e6
+        self.total_fuel += per_hour * elapsed / 3600
+
+        frame = {
+            "exhaust_temp": round(
+                self.exhaust_temp + self._random.uniform(-self.jitter, self.jitter), 1
+            ),
+            "fan_speed": (80 - 20 * self.current_state) if self.burn else 0,
+            "fuel_rate_hz": round(fuel_rate, 2),
+            "burn_mode": 2 if self.burn else 0,
+            "attempt": self.attempt,
+            "message": "Fail" if self.fail else ("Burning" if self.burn else "Off"),
+            "currentState": self.current_state,
+            "burn": int(self.burn),
+            "webasto_fail": int(self.fail),
+            "debug_glow_plug_on": self.burn and self.exhaust_temp < 80,
+            "fuel_pumping_active": pumping,
+            "logging_enabled": self.logging_enabled,
+            "wifi_ssid": "simulator",
+            "wifi_ip": "127.0.0.1",
+            "wifi_status": 3,
+            "total_fuel_consumed_liters": round(self.total_fuel, 4),
+            "fuel_consumption_per_hour": round(per_hour, 3),
+        }
+        if self.timestamps:
+            frame["sim_ts"] = now
+        return frame
+
+    def settings_message(self) -> str:
+        """Return the reply to GET_SETTINGS."""
+        if self.legacy_settings:
+            params = ",".join(f"{key}={value}" for key, value in self.settings.items())
+            return f"CURRENT_SETTINGS:{params}"
+        return json.dumps({"settings": self.settings})
+
+    def handle_command(self, command: str) -> Optional[str]:
+        """Apply a command and return an optional reply."""
+        name = command.split(":", 1)[0]
+        self.commands[name] = self.commands.get(name, 0) + 1
+
+        if command == "GET_SETTINGS":
+            return self.settings_message()
+        if command == protocol.COMPACT_COMMAND:
+            # Прошивка без поддержки компактного формата молча игнорирует команду
+            return protocol.COMPACT_COMMAND if self.compact else None
+        if command == protocol.DELTA_COMMAND:
+            return protocol.DELTA_COMMAND if self.delta else None
+        if command.startswith(protocol.RATE_PREFIX):
+            if not self.rate_control:
+                return None
+            self.rate = 1000 / max(1, int(command[len(protocol.RATE_PREFIX):]))
+            return command
+        if command == protocol.STATE_COMMAND:
+            # Полный кадр отправляет handler - номер последовательности у каждого клиента свой
+            return None
+        if command == "ENTER":
+            self.burn = not self.burn and not self.fail
+            if self.burn:
+                self.attempt += 1
+        elif command == "UP":
+            self.current_state = max(0, self.current_state - 1)
+        elif command == "DOWN":
+            self.current_state = min(2, self.current_state + 1)
+        elif command == "FP":
+            self.fuel_pumping_until = time.monotonic() + 10
+        elif command == "CF":
+            self.fail = False
+            self.attempt = 0
+        elif command.startswith("SET:"):
+            for param in command[4:].split(","):
+                if "=" in param:
+                    key, value = param.split("=", 1)
+                    if key.strip() in self.settings:
+                        self.settings[key.strip()] = int(float(value))
+            return self.settings_message()
+        elif command == "RESET_SETTINGS":
+            self.settings = dict(DEFAULT_SETTINGS)
+            return self.settings_message()
+        elif command == "RESET_FUEL_CONSUMPTION":
+            self.total_fuel = 0.0
+        elif command == "LOG_ON":
+            self.logging_enabled = True
+        elif command == "LOG_OFF":
+            self.logging_enabled = False
+        elif command not in ("RESET_WIFI", "REBOOT_ESP"):
+            _LOGGER.debug("Unknown command: %s", command)
+        return None
+
+    def wedge(self) -> None:
+        """Stop reading from all clients, like an ESP with a hung network stack.
+
+        Frames are still pushed, but closing handshakes are never answered.
+        """
+        for websocket in self._clients:
+            websocket.transport.pause_reading()
+
+    async def handler(self, websocket) -> None:
+        """Serve one WebSocket client."""
+        self._clients.add(websocket)
+        pusher = asyncio.create_task(self._push(websocket))
+        try:
+            async for message in websocket:
+                reply = self.handle_command(message)
+                if reply == protocol.COMPACT_COMMAND:
+                    self._compact_clients.add(websocket)
+                elif reply == protocol.DELTA_COMMAND:
+                    self._delta_clients[websocket] = (0, {})
+                if reply is not None:
+                    await websocket.send(reply)
+                if message == protocol.STATE_COMMAND and websocket in self._delta_clients:
+                    await self._send_frame(websocket, self.status(), full=True)
+                if message == "REBOOT_ESP":
+                    await websocket.close()
+        except ConnectionClosed:
+            pass
+        finally:
+            pusher.cancel()
+            self._clients.discard(websocket)
+            self._compact_clients.discard(websocket)
+            self._delta_clients.pop(websocket, None)
+
+    async def _send_frame(self, websocket, frame: Dict[str, Any], full: bool = False) -> None:
+        stream = self._delta_clients.get(websocket)
+        compact = websocket in self._compact_clients
+        if stream is None:
+            message = protocol.encode_compact(frame) if compact else json.dumps(frame)
+        else:
+            seq, last = stream
+            self._delta_clients[websocket] = ((seq + 1) % protocol.SEQ_MODULO, frame)
+            if full:
+                message = json.dumps({protocol.SEQ_FIELD: seq, **frame})
+            else:
+                changed = {key: value for key, value in frame.items() if last.get(key) != value}
+                if self.drop and self._random.random() < self.drop:
+                    # Кадр "потерян": номер израсходован, клиент увидит пропуск
+                    self.frames_dropped += 1
+                    return
+                if compact:
+                    message = protocol.encode_compact_delta(seq, changed)
+                else:
+                    message = json.dumps({protocol.SEQ_FIELD: seq, protocol.DELTA_FIELD: 1, **changed})
+        await websocket.send(message)
+        self.frames_sent += 1
+
+    async def _push(self, websocket) -> None:
+        next_send = time.monotonic()
+        while True:
+            # Частота может измениться командой RATE:
+            interval = 1 / self.rate if self.rate > 0 else 0
+            await self._send_frame(websocket, self.status())
+            if self.logging_enabled:
+                await websocket.send(
+                    f"LOG: exhaust={self.exhaust_temp:.1f} burn={int(self.burn)}"
+                )
+            if interval:
+                next_send += interval
+                await asyncio.sleep(max(0.0, next_send - time.monotonic()))
+            else:
+                # Максимальная скорость: только отдаём управление циклу событий
+                await asyncio.sleep(0)
+
+
+async def run_simulator(
+    simulator: HeaterSimulator, host: str, port: int, stop: asyncio.Event
+) -> None:
+    """Serve the simulator until stop is set."""
+    async with serve(simulator.handler, host, port):
+        await stop.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=81)
+    parser.add_argument("--rate", type=float, default=1.0, help="status frames/s, 0 = max")
+    parser.add_argument("--legacy-settings", action="store_true")
+    parser.add_argument("--compact", action="store_true", help="support the compact telemetry format")
+    parser.add_argument("--delta", action="store_true", help="support sequence-numbered delta frames")
+    parser.add_argument("--drop", type=float, default=0.0, help="share of delta frames to lose")
+    parser.add_argument("--rate-control", action="store_true", help="accept RATE:<ms> commands")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+
+    simulator = HeaterSimulator(
+        rate=args.rate, legacy_settings=args.legacy_settings, compact=args.compact,
+        delta=args.delta, drop=args.drop, rate_control=args.rate_control,
+    )
+    try:
+        asyncio.run(run_simulator(simulator, args.host, args.port, asyncio.Event()))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -1,17 +1,81 @@
 """The Webasto Heater integration."""
 import asyncio
 import logging
-import json
-from typing import Dict, Any, Callable, List
+import contextlib
+import random
+import time
+from datetime import timedelta
+from typing import Dict, Any, Callable, List, Iterable, Optional, Set, Tuple
 
+import voluptuous as vol
+# Импорт на уровне модуля: HA загружает интеграцию в executor, а импорт внутри
+# корутины читал бы модули websockets с диска в цикле событий
 import websockets
 from websockets.exceptions import WebSocketException, ConnectionClosed, ConnectionClosedOK
 
+from homeassistant.components import websocket_api
 from homeassistant.config_entries import ConfigEntry
-from homeassistant.core import HomeAssistant, callback
+from homeassistant.core import (
+    CALLBACK_TYPE,
+    HomeAssistant,
+    ServiceCall,
+    ServiceResponse,
+    SupportsResponse,
+    callback,
+)
 from homeassistant.helpers.typing import ConfigType
+import homeassistant.helpers.config_validation as cv
 from homeassistant.const import EVENT_HOMEASSISTANT_STOP
-from homeassistant.exceptions import ConfigEntryNotReady
+from homeassistant.helpers import device_registry as dr, entity_registry as er
+from homeassistant.helpers.entity import DeviceInfo
+from homeassistant.helpers.event import async_track_time_interval
+from homeassistant.helpers.storage import Store
+
+from .capture import DIRECTION_OUT, FrameCapture
+from .devicelog import DeviceLog
+from .commands import (
+    DEFAULT_COMMAND_GAP,
+    DEFAULT_REQUEST_TIMEOUT,
+    CommandQueue,
+    FramePredicate,
+    WebastoCommandError,
+    WebastoCommandTimeout,
+    command_priority,
+    expect_settings_values,
+)
+from .history import HISTORY_FIELDS, TelemetryRing
+from .metrics import WebastoMetrics
+from .protocol import (
+    COMPACT_COMMAND,
+    DELTA_COMMAND,
+    DELTA_FIELD,
+    DELTA_FORMAT,
+    FRAME_FORMAT,
+    FRAME_RATE,
+    FRAME_SETTINGS,
+    SEQ_FIELD,
+    SEQ_GAP,
+    SEQ_OK,
+    SEQ_STALE,
+    STATE_COMMAND,
+    FrameDispatcher,
+    SequenceTracker,
+    rate_command,
+)
+from .profiling import (
+    STAGE_FRAME,
+    STAGE_LISTENER,
+    STAGE_MERGE,
+    STAGE_NOTIFY,
+    STAGE_PARSE,
+    STAGE_WRITE,
+    LatencyProfiler,
+)
+from .rate import ACTIVITY_FIELDS, heater_activity, push_interval
+from .schema import RESTORE_FIELDS, FrameDecoder
+from .settings import SettingsStore
+from .snapshot import WebastoSnapshot
+from .totals import TOTALS_SAVE_DELAY, TOTALS_STORAGE_VERSION, HeaterTotals
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -22,25 +86,203 @@ WEBSOCKET_URL = "ws://{host}:81/"
 # Список платформ, которые будут загружены этой интеграцией
 PLATFORMS = ["sensor", "binary_sensor", "button", "number"]
 
-# Максимальное количество попыток переподключения
-MAX_RECONNECT_ATTEMPTS = 10
-RECONNECT_INTERVAL = 5
+# Переподключение: первая попытка после короткой паузы, затем экспоненциальная задержка
+# (база * 2^n, не более максимума) со случайным разбросом, без ограничения числа попыток.
+# Счётчик попыток сбрасывается только первым кадром: устройство, которое принимает
+# соединение и сразу его закрывает (перезагрузка ESP, занятый слот), не вызывает
+# переподключений без паузы
+RECONNECT_MIN_DELAY = 0.5
+RECONNECT_BASE_DELAY = 1
+RECONNECT_MAX_DELAY = 60
+RECONNECT_JITTER = 0.25
+
+# Максимальное количество одновременных (пере)подключений для всех нагревателей
+MAX_CONCURRENT_CONNECTS = 4
+# Период общего таймера менеджера соединений
+MANAGER_TICK_INTERVAL = timedelta(seconds=1)
+# Ключ hass.data для менеджера соединений
+DATA_MANAGER = f"{DOMAIN}_manager"
+
+# Watchdog: соединение считается зависшим, если кадра нет дольше, чем
+# STALE_MULTIPLIER средних интервалов между кадрами (но не меньше STALE_MIN_TIMEOUT)
+CONF_STALE_MULTIPLIER = "stale_multiplier"
+DEFAULT_STALE_MULTIPLIER = 5.0
+STALE_MIN_TIMEOUT = 10.0
+# Таймаут, пока средний интервал ещё не выучен
+STALE_DEFAULT_TIMEOUT = 30.0
+# Количество интервалов, после которого средний интервал считается выученным
+CADENCE_MIN_SAMPLES = 5
+# Коэффициент сглаживания (EWMA) среднего интервала между кадрами
+CADENCE_ALPHA = 0.1
+
+# Минимальная пауза между командами (секунды)
+CONF_COMMAND_GAP = "command_gap"
+
+# Режим "только статистика": вместо каждого кадра телеметрии публикуются
+# агрегаты (среднее, минимум, максимум) за окна заданной длины (секунды)
+CONF_STATISTICS_ONLY = "statistics_only"
+CONF_STATISTICS_WINDOWS = "statistics_windows"
+STATISTICS_WINDOW_OPTIONS = {"30": "30 s", "60": "1 min", "300": "5 min", "900": "15 min"}
+DEFAULT_STATISTICS_WINDOWS = ["30", "300"]
+
+# Частота кадров по режиму работы нагревателя и открытым карточкам
+CONF_ADAPTIVE_RATE = "adaptive_rate"
+
+# Переопределения политики записи сенсоров телеметрии: ключ сенсора ->
+# {"min_interval", "abs_deadband", "rel_deadband", "heartbeat"}
+CONF_SENSOR_THROTTLE = "sensor_throttle"
+
+# Событие отката настройки, не подтверждённой устройством
+EVENT_SETTING_ROLLBACK = f"{DOMAIN}_setting_rollback"
+
+# Сохранённый снимок состояния, который показывается при старте до первого кадра
+SNAPSHOT_STORAGE_VERSION = 1
+SNAPSHOT_SAVE_DELAY = 60
+# Сколько показывать сохранённые значения, если устройство так и не ответило
+SNAPSHOT_RESTORE_TIMEOUT = 60.0
+
+# Таймауты закрытия: закрывающее рукопожатие WebSocket и остановка соединения целиком
+CLOSE_TIMEOUT = 2.0
+STOP_TIMEOUT = 5.0
+
+# Не чаще одного запроса полного состояния при пропусках в дельта-кадрах
+RESYNC_INTERVAL = 5.0
+# Поля, которые для дельта-кадра берутся из снимка, если не изменились
+DELTA_SAMPLE_FIELDS = tuple(dict.fromkeys(HISTORY_FIELDS + ("fuel_rate_hz", "burn")))
+
+# Если прошивка не подтвердила RATE:, лишние кадры прореживаются локально; допуск
+# на дрожание интервала, чтобы кадр с ожидаемой частотой не отбрасывался
+DECIMATION_TOLERANCE = 0.9
+
+WS_TYPE_WATCH = f"{DOMAIN}/watch"
+
+# Интеграция настраивается только через config entries
+CONFIG_SCHEMA = cv.config_entry_only_config_schema(DOMAIN)
+
+# Службы профилирования задержек обработки кадров
+SERVICE_SET_PROFILING = "set_profiling"
+SERVICE_GET_PROFILE = "get_profile"
+SERVICE_SET_CAPTURE = "set_capture"
+SERVICE_GET_DEVICE_LOG = "get_device_log"
+
+# Каталог записи сырых кадров (внутри каталога конфигурации, по записи на нагреватель)
+CAPTURE_DIR = "webasto_captures"
 
+# Журнал прошивки (LOG_ON): по желанию пишется в файл, в журнал HA - только сводки
+CONF_DEVICE_LOG_FILE = "device_log_file"
+DEVICE_LOG_DIR = "webasto_logs"
+DEVICE_LOG_SUMMARY_INTERVAL = 60.0
+DEVICE_LOG_DIAGNOSTICS_LINES = 100
+
+# Подписка на все ключи (используется слушателями без явного списка ключей)
+ALL_KEYS = "*"
+# Ключ без данных: подписанные на него слушатели будятся только общими рассылками
+# (подключение, потеря связи, устаревание данных), а не каждым кадром
+CONNECTION_KEY = "_connection"
+
+# Идентификатор устройства и префикс unique_id до поддержки нескольких нагревателей
+LEGACY_DEVICE_ID = "webasto_heater_main"
+LEGACY_UNIQUE_ID_PREFIX = "webasto_"
+
+
+def websocket_url(host: str) -> str:
+    """Return the WebSocket URL for a host, optionally given as host:port."""
+    if ":" in host:
+        return f"ws://{host}/"
+    return WEBSOCKET_URL.format(host=host)
 
 class WebastoHeaterData:
     """Manages the Webasto heater data and WebSocket connection."""
 
-    def __init__(self, hass: HomeAssistant, host: str):
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        host: str,
+        entry_id: str,
+        name: str = "Webasto Heater",
+        manager: Optional["WebastoConnectionManager"] = None,
+        stale_multiplier: float = DEFAULT_STALE_MULTIPLIER,
+        command_gap: float = DEFAULT_COMMAND_GAP,
+        adaptive_rate: bool = True,
+        device_log_path: Optional[str] = None,
+    ):
         """Initialize the data manager."""
         self.hass = hass
         self._host = host
+        self.entry_id = entry_id
+        self._name = name
+        self._manager = manager
         self._websocket = None
-        self._listeners: List[Callable] = []
-        self._data: Dict[str, Any] = {}
+        # Индекс ключ ESP -> слушатели, подписанные на этот ключ
+        self._listeners: Dict[str, List[Callable]] = {}
+        self._state = WebastoSnapshot()
+        # Схема полей компилируется один раз; сущности получают уже типизированные значения
+        self._decoder = FrameDecoder()
+        # До первого кадра производные поля показывают значение для отсутствующего
+        # источника ("Неизвестно", "Настройка AP"), а не unknown
+        self._state._apply(self._decoder.defaults())
+        # Выбор формата кадра (JSON, CURRENT_SETTINGS, компактный) по первому символу
+        self._dispatcher = FrameDispatcher()
+        # Формат телеметрии, согласованный с прошивкой в текущем подключении
+        self._frame_format = "json"
+        # Дельта-кадры с номерами последовательности (если прошивка их поддерживает)
+        self._delta_enabled = False
+        self._sequence = SequenceTracker()
+        # Момент (time.monotonic) последнего запроса полного состояния
+        self._last_resync: Optional[float] = None
+        # Частота кадров по режиму работы и числу открытых карточек; если прошивка
+        # не подтвердила RATE:, кадры чаще запрошенного интервала отбрасываются
+        self._adaptive_rate = adaptive_rate
+        self._viewers = 0
+        self._push_interval: Optional[float] = None
+        self._rate_acked = False
+        self._last_processed: Optional[float] = None
+        # Запись сырых кадров для воспроизведения (только пока включена службой)
+        self._capture: Optional[FrameCapture] = None
+        # Строки журнала прошивки: кольцевой буфер и необязательный файл
+        self._device_log = DeviceLog(path=device_log_path)
+        self._last_log_summary = time.monotonic()
+        # Настройки, изменённые в HA, относительно последних подтверждённых устройством
+        self._settings = SettingsStore()
+        # Краткосрочная история телеметрии фиксированного объёма (мимо recorder)
+        self._history: Dict[str, TelemetryRing] = {key: TelemetryRing() for key in HISTORY_FIELDS}
+        # Собственные счётчики топлива, моточасов и запусков; сохраняются с задержкой
+        self._totals = HeaterTotals()
+        self._totals_store = Store(hass, TOTALS_STORAGE_VERSION, f"{DOMAIN}.{entry_id}.totals")
+        self._totals_save_pending = False
+        # Последний известный снимок (настройки и медленная телеметрия) для старта HA
+        self._snapshot_store = Store(hass, SNAPSHOT_STORAGE_VERSION, f"{DOMAIN}.{entry_id}.snapshot")
+        self._snapshot_save_pending = False
+        # Момент (time.monotonic) загрузки снимка, пока не пришёл первый живой кадр
+        self._restored_at: Optional[float] = None
         self._is_connected = False
         self._reconnect_task = None
+        # Момент (time.monotonic) следующей попытки переподключения, проверяется
+        # общим таймером менеджера соединений
+        self._next_reconnect: Optional[float] = None
         self._stop_event = asyncio.Event()
         self._reconnect_attempts = 0
+        self._listen_task: Optional[asyncio.Task] = None
+        # Все команды пишет в сокет одна задача, с приоритетами и объединением
+        self._commands = CommandQueue(self._send_raw, min_gap=command_gap)
+        # Ожидающие подтверждения запросы: (предикат по кадру, future)
+        self._waiters: List[Tuple[FramePredicate, asyncio.Future]] = []
+        # Watchdog зависшего соединения: время последнего кадра и выученный интервал
+        self._stale_multiplier = stale_multiplier
+        self._last_frame: Optional[float] = None
+        self._cadence: Optional[float] = None
+        self._cadence_samples = 0
+        self._is_stale = False
+        # Метрики восстановления соединения
+        self._disconnected_at: Optional[float] = None
+        self._reconnect_count = 0
+        self._last_recovery_time: Optional[float] = None
+        self._max_recovery_time: Optional[float] = None
+        # Счётчики работы интеграции (кадры, разбор, рассылки, записи состояний)
+        self._metrics = WebastoMetrics()
+        self._connected_since: Optional[float] = None
+        # Гистограммы задержек по этапам; None - профилирование выключено
+        self._profiler: Optional[LatencyProfiler] = None
 
     @property
     def is_connected(self) -> bool:
@@ -48,19 +290,246 @@ class WebastoHeaterData:
         return self._is_connected
 
     @property
-    def data(self) -> Dict[str, Any]:
-        """Return the latest data from the Webasto heater."""
-        return self._data.copy()  # Возвращаем копию для безопасности
+    def command_stats(self) -> Dict[str, Dict[str, Any]]:
+        """Return per-command latency statistics of the outbound queue."""
+        return self._commands.stats
+
+    @property
+    def metrics(self) -> WebastoMetrics:
+        """Return the work counters of this heater."""
+        return self._metrics
+
+    @property
+    def connected_time(self) -> float:
+        """Return the total time spent connected (seconds)."""
+        if self._connected_since is None:
+            return self._metrics.connected_time
+        return self._metrics.connected_time + time.monotonic() - self._connected_since
 
-    def add_listener(self, update_callback: Callable):
-        """Add a callback to be called when data updates."""
-        if update_callback not in self._listeners:
-            self._listeners.append(update_callback)
+    @property
+    def metrics_data(self) -> Dict[str, Any]:
+        """Return all counters of the connection, queue and entities."""
+        command_stats = self._commands.stats
+        return {
+            **self._metrics.as_dict(),
+            "commands_sent": sum(stats["sent"] for stats in command_stats.values()),
+            "commands_dropped": sum(stats["dropped"] for stats in command_stats.values()),
+            "reconnects": self._reconnect_count,
+            "connected_time": self.connected_time,
+        }
+
+    @property
+    def profile(self) -> Optional[Dict[str, Dict[str, Any]]]:
+        """Return per-stage latency histograms, or None if profiling is off."""
+        return self._profiler.as_dict() if self._profiler is not None else None
+
+    @callback
+    def async_set_profiling(self, enabled: bool) -> None:
+        """Turn latency profiling on (with empty histograms) or off."""
+        self._profiler = LatencyProfiler() if enabled else None
+
+    @property
+    def capture_stats(self) -> Optional[Dict[str, Any]]:
+        """Return the frame capture counters, or None if capture is off."""
+        return self._capture.as_dict() if self._capture is not None else None
+
+    @property
+    def device_log(self) -> DeviceLog:
+        """Return the buffer of firmware log lines."""
+        return self._device_log
+
+    async def async_close_files(self) -> None:
+        """Flush and close the frame capture and the device log file."""
+        await self.async_set_capture(False)
+        await self.hass.async_add_executor_job(self._device_log.close)
+
+    async def async_set_capture(self, enabled: bool) -> None:
+        """Start or stop recording raw frames to rotating gzip segments."""
+        if enabled and self._capture is None:
+            directory = self.hass.config.path(CAPTURE_DIR, self.entry_id)
+            self._capture = FrameCapture(directory)
+            _LOGGER.info("Capturing frames of %s to %s", self._host, directory)
+        elif not enabled and self._capture is not None:
+            capture, self._capture = self._capture, None
+            # Дописываем очередь и закрываем файлы в потоке, не блокируя цикл событий
+            await self.hass.async_add_executor_job(capture.close)
+            _LOGGER.info("Captured %d frames of %s", capture.frames, self._host)
+
+    @callback
+    def async_write_entity_state(self, entity: Any, key: str) -> None:
+        """Write the state of an entity of this heater, counting and timing the write."""
+        self._metrics.record_state_write(key)
+        profiler = self._profiler
+        if profiler is None:
+            entity.async_write_ha_state()
+            return
+        start = time.perf_counter()
+        entity.async_write_ha_state()
+        profiler.record(STAGE_WRITE, time.perf_counter() - start)
+
+    @property
+    def frame_format(self) -> str:
+        """Return the telemetry frame format negotiated with the firmware."""
+        return self._frame_format
+
+    @property
+    def push_interval(self) -> Optional[float]:
+        """Return the requested status frame interval (seconds)."""
+        return self._push_interval
+
+    @property
+    def rate_acked(self) -> bool:
+        """Return true if the firmware confirmed the requested push rate."""
+        return self._rate_acked
+
+    @property
+    def viewers(self) -> int:
+        """Return the number of open dashboard subscriptions."""
+        return self._viewers
+
+    @callback
+    def async_add_viewer(self) -> CALLBACK_TYPE:
+        """Count a dashboard watching this heater; return the callback that removes it."""
+        self._viewers += 1
+        self._update_push_rate()
+
+        @callback
+        def _remove() -> None:
+            self._viewers -= 1
+            self._update_push_rate()
+
+        return _remove
+
+    @callback
+    def _update_push_rate(self) -> None:
+        """Ask the firmware for the push rate that suits the activity and viewers."""
+        if not self._adaptive_rate:
+            return
+        interval = push_interval(heater_activity(self._state), self._viewers > 0)
+        if interval == self._push_interval:
+            return
+        _LOGGER.debug("Push interval of %s: %s -> %s s", self._host, self._push_interval, interval)
+        self._push_interval = interval
+        # Выученный интервал кадров больше не верен - watchdog учится заново
+        self._cadence = None
+        self._cadence_samples = 0
+        if self._is_connected:
+            self._commands.enqueue(rate_command(interval))
+
+    def _decimate(self, raw: Dict[str, Any]) -> bool:
+        """Return true if a status frame arrived sooner than the requested interval."""
+        interval = self._push_interval
+        if interval is None or self._rate_acked or self._waiters:
+            return False
+        now = time.monotonic()
+        if self._last_processed is not None and now - self._last_processed < interval * DECIMATION_TOLERANCE:
+            # Смену режима и прочие редкие события не прореживаем
+            probe = {key: raw[key] for key in ACTIVITY_FIELDS if key in raw}
+            state = self._state
+            if all(state.get(key) == value for key, value in self._decoder.decode(probe).items() if key in probe):
+                return True
+        self._last_processed = now
+        return False
+
+    @property
+    def delta_enabled(self) -> bool:
+        """Return true if the firmware sends sequence-numbered delta frames."""
+        return self._delta_enabled
+
+    @property
+    def is_stale(self) -> bool:
+        """Return true if the watchdog considers the data stale."""
+        return self._is_stale
+
+    @property
+    def is_restored(self) -> bool:
+        """Return true while values come from the saved snapshot, not from the heater."""
+        return self._restored_at is not None
+
+    @property
+    def available(self) -> bool:
+        """Return true if entities should be shown as available."""
+        return (self._is_connected and not self._is_stale) or self._restored_at is not None
+
+    @property
+    def stale_timeout(self) -> float:
+        """Return how long without a frame the connection is considered dead."""
+        if self._cadence is None or self._cadence_samples < CADENCE_MIN_SAMPLES:
+            return STALE_DEFAULT_TIMEOUT
+        return max(STALE_MIN_TIMEOUT, self._stale_multiplier * self._cadence)
+
+    @property
+    def host(self) -> str:
+        """Return the host of the heater."""
+        return self._host
+
+    @property
+    def reconnect_stats(self) -> Dict[str, Any]:
+        """Return reconnection and recovery-time metrics."""
+        return {
+            "reconnects": self._reconnect_count,
+            "pending_attempts": self._reconnect_attempts,
+            "disconnected_for": (
+                time.monotonic() - self._disconnected_at
+                if self._disconnected_at is not None else None
+            ),
+            "last_recovery_time": self._last_recovery_time,
+            "max_recovery_time": self._max_recovery_time,
+        }
+
+    @property
+    def device_info(self) -> DeviceInfo:
+        """Return device info shared by all entities of this heater."""
+        return DeviceInfo(
+            identifiers={(DOMAIN, self.entry_id)},
+            name=self._name,
+            manufacturer="Custom",
+            model="ESP8266 Webasto",
+        )
+
+    def history_stats(self, key: str) -> Optional[Dict[str, Any]]:
+        """Return rolling min/max/mean/slope of a telemetry field, if tracked."""
+        history = self._history.get(key)
+        if history is None:
+            return None
+        return history.stats(time.monotonic())
+
+    def unique_id(self, key: str) -> str:
+        """Return a unique_id for an entity of this heater."""
+        return f"{self.entry_id}_{key}"
+
+    @property
+    def data(self) -> WebastoSnapshot:
+        """Return the latest data from the Webasto heater as a read-only snapshot."""
+        return self._state
+
+    def add_listener(self, update_callback: Callable, keys: Optional[Iterable[str]] = None):
+        """Add a callback to be called when any of the given keys change.
+
+        The callback must be a synchronous @callback function, it is invoked
+        inline from the event loop. Without keys it is woken on every update.
+        """
+        for key in keys or (ALL_KEYS,):
+            listeners = self._listeners.setdefault(key, [])
+            if update_callback not in listeners:
+                listeners.append(update_callback)
 
     def remove_listener(self, update_callback: Callable):
         """Remove a callback."""
-        if update_callback in self._listeners:
-            self._listeners.remove(update_callback)
+        for key in list(self._listeners):
+            listeners = self._listeners[key]
+            if update_callback in listeners:
+                listeners.remove(update_callback)
+            if not listeners:
+                del self._listeners[key]
+
+    @callback
+    def async_start(self) -> None:
+        """Start connecting in the background without waiting for the heater."""
+        if self._reconnect_task is None or self._reconnect_task.done():
+            self._reconnect_task = self.hass.async_create_background_task(
+                self._connect_websocket(), f"webasto connect {self._host}"
+            )
 
     async def connect(self) -> bool:
         """Initial connection to WebSocket."""
@@ -73,27 +542,61 @@ class WebastoHeaterData:
 
     async def _connect_websocket(self):
         """Connect to the WebSocket server."""
-        url = WEBSOCKET_URL.format(host=self._host)
+        url = websocket_url(self._host)
         _LOGGER.debug("Attempting to connect to WebSocket: %s", url)
         
         try:
-            # Используем asyncio.wait_for вместо async_timeout
-            self._websocket = await asyncio.wait_for(
-                websockets.connect(url), timeout=10
-            )
+            # Ограничиваем число одновременных подключений для всего парка нагревателей
+            async with self._connect_slot():
+                # Используем asyncio.wait_for вместо async_timeout
+                self._websocket = await asyncio.wait_for(
+                    websockets.connect(url, close_timeout=CLOSE_TIMEOUT), timeout=10
+                )
             
             self._is_connected = True
-            self._reconnect_attempts = 0
-            _LOGGER.info("Successfully connected to Webasto heater at %s", url)
+            self._connected_since = time.monotonic()
+            if self._disconnected_at is not None:
+                recovery_time = time.monotonic() - self._disconnected_at
+                self._disconnected_at = None
+                self._reconnect_count += 1
+                self._last_recovery_time = recovery_time
+                self._max_recovery_time = max(self._max_recovery_time or 0.0, recovery_time)
+                _LOGGER.info(
+                    "Reconnected to Webasto heater at %s after %.1f s (%d attempts)",
+                    url, recovery_time, self._reconnect_attempts
+                )
+            else:
+                _LOGGER.info("Successfully connected to Webasto heater at %s", url)
+            # Доступность сущностей зависит от соединения - будим всех слушателей
+            self._state._bump()
+            self._notify_listeners()
             
             # Отправляем GET_SETTINGS сразу после подключения
-            await self.send_command("GET_SETTINGS")
+            self._commands.set_connected(True)
+            self._commands.start(self.hass.async_create_task)
+            self._commands.enqueue("GET_SETTINGS")
+            # Предлагаем компактный формат телеметрии; прошивка без его поддержки
+            # игнорирует команду и продолжает присылать JSON
+            self._frame_format = "json"
+            self._commands.enqueue(COMPACT_COMMAND)
+            # Так же предлагаем дельта-кадры; нумерация начинается заново с каждым подключением
+            self._delta_enabled = False
+            self._sequence.reset()
+            self._commands.enqueue(DELTA_COMMAND)
+            # И частоту кадров по текущему режиму
+            self._push_interval = None
+            self._rate_acked = False
+            self._last_processed = None
+            self._update_push_rate()
             
             # Запускаем прослушивание сообщений
-            self.hass.async_create_task(self._listen_for_messages())
+            self._last_frame = time.monotonic()
+            self._listen_task = self.hass.async_create_task(self._listen_for_messages())
             
         except (WebSocketException, asyncio.TimeoutError, OSError) as err:
-            _LOGGER.error("Failed to connect to Webasto heater at %s: %s", url, err)
+            # Попытки не ограничены, поэтому в журнал пишем ошибку только для первой
+            log = _LOGGER.error if self._reconnect_attempts <= 1 else _LOGGER.debug
+            log("Failed to connect to Webasto heater at %s: %s", url, err)
             self._is_connected = False
             self._schedule_reconnect()
         except Exception as err:
@@ -108,7 +611,20 @@ class WebastoHeaterData:
                 try:
                     message = await self._websocket.recv()
                     _LOGGER.debug("Received message: %s", message)
-                    await self._process_message(message)
+                    capture = self._capture
+                    if capture is not None:
+                        capture.record(message)
+                    profiler = self._profiler
+                    if profiler is None:
+                        telemetry = await self._process_message(message)
+                    else:
+                        start = time.perf_counter()
+                        telemetry = await self._process_message(message)
+                        profiler.record(STAGE_FRAME, time.perf_counter() - start)
+                    # Строки журнала и подтверждения команд идут и при зависшей телеметрии,
+                    # поэтому watchdog и каденс учитывают только кадры состояния и настроек
+                    if telemetry:
+                        self._track_frame()
                     
                 except ConnectionClosedOK:
                     _LOGGER.info("WebSocket connection closed gracefully.")
@@ -125,125 +641,522 @@ class WebastoHeaterData:
                     
         finally:
             self._is_connected = False
+            if self._connected_since is not None:
+                self._metrics.connected_time += time.monotonic() - self._connected_since
+                self._connected_since = None
+            self._commands.set_connected(False)
+            self._state._bump()
+            self._notify_listeners()
+            # Сначала закрываем старый сокет, чтобы не закрыть уже новое соединение
+            await self._close_websocket()
             if not self._stop_event.is_set():
                 self._schedule_reconnect()
-            await self._close_websocket()
 
-    async def _process_message(self, message: str):
-        """Process received message."""
-        try:
-            data = json.loads(message)
-            if "settings" in data:
-                # Настройки приходят вложенными в объект "settings"
-                self._data.update(data["settings"])
+    @callback
+    def _track_frame(self) -> None:
+        """Learn the push cadence from frame inter-arrival and clear the stale flag."""
+        now = time.monotonic()
+        if self._last_frame is not None:
+            interval = now - self._last_frame
+            if self._cadence is None:
+                self._cadence = interval
             else:
-                # Данные статуса приходят на корневом уровне
-                self._data.update(data)
+                self._cadence += CADENCE_ALPHA * (interval - self._cadence)
+            self._cadence_samples += 1
+        self._last_frame = now
+        if self._reconnect_attempts:
+            # Соединение действительно работает - следующая потеря связи начнёт backoff заново
+            self._reconnect_attempts = 0
+        if self._is_stale or self._restored_at is not None:
+            # Первый живой кадр: данные больше не устаревшие и не из сохранённого снимка
+            self._is_stale = False
+            self._restored_at = None
+            self._state._bump()
             self._notify_listeners()
-            
-        except json.JSONDecodeError:
-            _LOGGER.warning("Received non-JSON message: %s", message)
-            # Обработка старого формата CURRENT_SETTINGS
-            if message.startswith("CURRENT_SETTINGS:"):
-                self._parse_old_format_settings(message)
-                self._notify_listeners()
+
+    @callback
+    def _async_check_stale(self, now: float) -> None:
+        """Force a reconnect if no frame arrived within the stale timeout."""
+        if (
+            not self._is_connected
+            or self._last_frame is None
+            or now - self._last_frame <= self.stale_timeout
+        ):
+            return
+        _LOGGER.warning(
+            "No data from Webasto heater at %s for %.1f s (timeout %.1f s), reconnecting",
+            self._host, now - self._last_frame, self.stale_timeout
+        )
+        if not self._is_stale:
+            self._is_stale = True
+            self._state._bump()
+            self._notify_listeners()
+        # recv() может висеть бесконечно на полуоткрытом TCP - прерываем слушателя
+        self._abort_connection()
+
+    async def _process_message(self, message: str) -> bool:
+        """Process received message; return true for a status or settings frame."""
+        metrics = self._metrics
+        metrics.frames += 1
+        # Размер в байтах UTF-8: кириллица в message занимает по два байта на символ.
+        # isascii() - проверка флага строки, кодируем только кадры с не-ASCII текстом
+        metrics.bytes += len(message) if message.isascii() else len(message.encode())
+        try:
+            start = time.perf_counter()
+            # Формат кадра определяется по первому символу, без попыток разбора JSON
+            codec, kind, raw = self._dispatcher.decode(message)
+            if kind is None:
+                # Строки журнала прошивки (LOG: ...) и прочий текст вне протокола
+                metrics.other_frames += 1
+                self._device_log.append(message)
+                return False
+            if kind == FRAME_FORMAT:
+                self._apply_format(raw)
+                return False
+            if kind == FRAME_RATE:
+                self._rate_acked = True
+                _LOGGER.debug("Heater at %s pushes a frame every %d ms", self._host, raw)
+                return False
+            is_settings = kind == FRAME_SETTINGS
+            delta = False
+            sequenced = not is_settings and SEQ_FIELD in raw
+            if sequenced:
+                # Служебные поля не должны попасть в снимок
+                delta = bool(raw.pop(DELTA_FIELD, False))
+                if not self._check_sequence(int(raw.pop(SEQ_FIELD)), delta):
+                    return True
+            # Нумерованные кадры (дельты и полные ответы на GET_STATE) не прореживаем:
+            # на них опирается следующая дельта, пропущенное изменение не повторится
+            if not is_settings and not sequenced and self._decimate(raw):
+                metrics.decimated_frames += 1
+                return True
+            values = self._decoder.decode(raw)
+            metrics.record_format(codec.name)
+            elapsed = time.perf_counter() - start
+            metrics.record_decode(elapsed)
+            profiler = self._profiler
+            if profiler is not None:
+                profiler.record(STAGE_PARSE, elapsed)
+                start = time.perf_counter()
+            if is_settings:
+                self._apply_settings(values)
+            else:
+                # Дельта-кадр несёт только изменённые ключи, а история и счётчики
+                # ведутся по полному состоянию, как для обычного кадра
+                sample = self._delta_sample(values) if delta else values
+                self._record_history(sample)
+                self._update_totals(values, sample)
+                changed = self._state._apply(values)
+                if profiler is not None:
+                    profiler.record(STAGE_MERGE, time.perf_counter() - start)
+                if changed:
+                    self._notify_listeners(changed)
+                    if not changed.isdisjoint(RESTORE_FIELDS):
+                        self._schedule_snapshot_save()
+                    if not changed.isdisjoint(ACTIVITY_FIELDS):
+                        self._update_push_rate()
+            if self._waiters:
+                self._resolve_waiters(values, is_settings)
+            return True
+
         except Exception as err:
+            metrics.decode_errors += 1
             _LOGGER.error("Error processing WebSocket message: %s - %s", err, message)
+            return False
+
+    def _apply_format(self, name: str) -> None:
+        """Handle the firmware acknowledgement of a format command."""
+        if name == DELTA_FORMAT:
+            self._delta_enabled = True
+            # Точка отсчёта для номеров последовательности - полный кадр
+            self._commands.enqueue(STATE_COMMAND)
+            _LOGGER.info("Heater at %s switched to delta frames", self._host)
+            return
+        self._frame_format = name
+        _LOGGER.info("Heater at %s switched to the %s frame format", self._host, name)
+
+    def _check_sequence(self, seq: int, delta: bool) -> bool:
+        """Check the sequence number of a status frame; return false to drop it."""
+        result = self._sequence.check(seq, delta)
+        if result == SEQ_OK:
+            return True
+        if result == SEQ_STALE:
+            # Повтор или кадр из прошлого (ESP перезагрузилась без разрыва соединения)
+            self._metrics.stale_frames += 1
+            _LOGGER.debug("Dropping out-of-order frame %s from %s", seq, self._host)
+            self._request_resync()
+            return False
+        if result == SEQ_GAP:
+            self._metrics.sequence_gaps += 1
+            _LOGGER.debug("Sequence gap before frame %s from %s", seq, self._host)
+        # Изменения из кадра верны, но пропущенные могли потеряться - запрашиваем всё
+        self._request_resync()
+        return True
+
+    def _request_resync(self) -> None:
+        """Request the full state and settings, at most once per RESYNC_INTERVAL."""
+        now = time.monotonic()
+        if self._last_resync is not None and now - self._last_resync < RESYNC_INTERVAL:
+            return
+        self._last_resync = now
+        self._metrics.resyncs += 1
+        self._commands.enqueue(STATE_COMMAND)
+        self._commands.enqueue("GET_SETTINGS")
 
-    def _parse_old_format_settings(self, message: str):
-        """Parse old-style CURRENT_SETTINGS string and update data."""
+    def _delta_sample(self, values: Dict[str, Any]) -> Dict[str, Any]:
+        """Return the history and totals inputs of a delta frame merged over the state."""
+        state = self._state
+        sample = {key: state.get(key) for key in DELTA_SAMPLE_FIELDS}
+        sample.update(values)
+        return sample
+
+    def _record_history(self, values: Dict[str, Any]) -> None:
+        """Append tracked telemetry fields of a status frame to their ring buffers."""
+        now = time.monotonic()
+        for key, history in self._history.items():
+            value = values.get(key)
+            if value is not None:
+                history.push(now, float(value))
+
+    def _update_totals(self, values: Dict[str, Any], sample: Dict[str, Any]) -> None:
+        """Advance the local counters from sample and add them to the frame values."""
+        self._totals.update(time.monotonic(), sample, self._state.get("pump_size"))
+        values.update(self._totals.values())
+        if not self._totals_save_pending:
+            # Store переносит отложенную запись при каждом вызове, поэтому планируем
+            # её один раз; флаг снимается, когда Store забирает данные
+            self._totals_save_pending = True
+            self._totals_store.async_delay_save(self._totals_data, TOTALS_SAVE_DELAY)
+
+    @callback
+    def _totals_data(self) -> Dict[str, Any]:
+        """Return the counters to write, called by Store."""
+        self._totals_save_pending = False
+        return self._totals.as_dict()
+
+    async def async_load_totals(self) -> None:
+        """Load the counters saved before the restart."""
+        stored = await self._totals_store.async_load()
+        if stored:
+            self._totals.restore(stored)
+        self._state._apply(self._totals.values())
+
+    @callback
+    def _schedule_snapshot_save(self) -> None:
+        """Save the last known snapshot once the save delay passes."""
+        if not self._snapshot_save_pending:
+            self._snapshot_save_pending = True
+            self._snapshot_store.async_delay_save(self._snapshot_data, SNAPSHOT_SAVE_DELAY)
+
+    @callback
+    def _snapshot_data(self) -> Dict[str, Any]:
+        """Return the snapshot fields to write, called by Store."""
+        self._snapshot_save_pending = False
+        state = self._state
+        data = {key: state[key] for key in RESTORE_FIELDS if key in state}
+        # Неподтверждённые правки настроек не сохраняем - только значения устройства
+        data.update(self._settings.confirmed)
+        return data
+
+    async def async_load_snapshot(self) -> None:
+        """Preload the snapshot saved before the restart; it is stale until the first frame."""
+        stored = await self._snapshot_store.async_load()
+        if not stored:
+            return
+        # Через декодер, чтобы восстановить и производные поля (current_state_text и т.д.)
+        values = self._decoder.decode(
+            {key: value for key, value in stored.items() if key in RESTORE_FIELDS}
+        )
+        if self._state._apply(values):
+            self._restored_at = time.monotonic()
+            _LOGGER.debug("Restored %d values of %s from the saved snapshot", len(values), self._host)
+
+    @callback
+    def _async_log_summary(self, now: float) -> None:
+        """Log how many firmware log lines arrived, at most once per summary interval."""
+        if now - self._last_log_summary < DEVICE_LOG_SUMMARY_INTERVAL:
+            return
+        elapsed, self._last_log_summary = now - self._last_log_summary, now
+        count, last = self._device_log.take_summary()
+        if count:
+            _LOGGER.info(
+                "Heater at %s sent %d log lines in %.0f s, last: %s",
+                self._host, count, elapsed, last
+            )
+
+    @callback
+    def _async_check_restored(self, now: float) -> None:
+        """Stop showing the saved snapshot if the heater did not answer in time."""
+        if self._restored_at is None or now - self._restored_at <= SNAPSHOT_RESTORE_TIMEOUT:
+            return
+        self._restored_at = None
+        self._state._bump()
+        self._notify_listeners()
+
+    @callback
+    def _resolve_waiters(self, values: Dict[str, Any], is_settings: bool) -> None:
+        """Resolve pending requests whose predicate matches the frame."""
+        for predicate, future in list(self._waiters):
+            if future.done():
+                continue
+            try:
+                matched = predicate(values, is_settings)
+            except Exception as err:
+                _LOGGER.error("Error in request predicate: %s", err)
+                continue
+            if matched:
+                future.set_result(values)
+
+    async def async_request(
+        self,
+        command: str,
+        predicate: FramePredicate,
+        timeout: float = DEFAULT_REQUEST_TIMEOUT,
+    ) -> float:
+        """Send a command and wait for a frame matching predicate.
+
+        Returns the round-trip latency in seconds. Raises WebastoCommandError if
+        the command was not sent and WebastoCommandTimeout if it was not confirmed.
+        """
+        future = asyncio.get_running_loop().create_future()
+        # Ожидание регистрируем до отправки, чтобы не пропустить быстрый ответ
+        waiter = (predicate, future)
+        self._waiters.append(waiter)
+        start = time.monotonic()
         try:
-            parts = message.split(':', 1)
-            if len(parts) < 2:
-                _LOGGER.warning("Invalid old settings format: %s", message)
-                return
-                
-            params_str = parts[1]
-            params = params_str.split(',')
-            
-            for param in params:
-                if '=' in param:
-                    key, value = param.split('=', 1)
-                    key = key.strip()
-                    value = value.strip()
-                    
-                    # Попытка преобразовать в число
-                    try:
-                        if '.' in value:
-                            self._data[key] = float(value)
-                        else:
-                            self._data[key] = int(value)
-                    except ValueError:
-                        self._data[key] = value
-                        
-        except Exception as err:
-            _LOGGER.error("Error parsing old settings format: %s - %s", err, message)
+            if not await self.send_command(command):
+                raise WebastoCommandError(f"Command {command} was not sent to the heater")
+            try:
+                async with asyncio.timeout(timeout):
+                    await future
+            except TimeoutError as err:
+                raise WebastoCommandTimeout(
+                    f"Heater did not confirm {command} within {timeout:.0f} s"
+                ) from err
+        finally:
+            self._waiters.remove(waiter)
+        return time.monotonic() - start
+
+    @property
+    def dirty_settings(self) -> Dict[str, Any]:
+        """Return settings edited in HA and not yet sent to the device."""
+        return self._settings.dirty
+
+    def is_setting_pending(self, key: str) -> bool:
+        """Return True if a setting edited in HA waits for device confirmation."""
+        return self._settings.is_pending(key)
+
+    @callback
+    def _apply_settings(self, values: Dict[str, Any]) -> None:
+        """Apply a settings payload from the device, keeping pending edits visible."""
+        values, confirmed = self._settings.confirm(values)
+        changed = self._state._apply(values)
+        if confirmed:
+            _LOGGER.debug("Settings confirmed by the heater: %s", ", ".join(sorted(confirmed)))
+            if not changed:
+                # Значение не изменилось, но сущности должны снять признак ожидания
+                self._state._bump()
+            changed |= confirmed
+        if changed:
+            self._notify_listeners(changed)
+        self._schedule_snapshot_save()
+
+    @callback
+    def set_setting(self, key: str, value: Any) -> None:
+        """Edit a setting locally; it is sent to the device by async_save_settings.
+
+        The new value is shown right away and stays pending until the device echoes it.
+        """
+        values = self._decoder.decode({key: value})
+        was_pending = self._settings.is_pending(key)
+        self._settings.set(key, values[key], self._state.get(key))
+        changed = self._state._apply(values)
+        if not changed and was_pending != self._settings.is_pending(key):
+            self._state._bump()
+            changed = {key}
+        if changed:
+            self._notify_listeners(changed)
+
+    async def async_save_settings(self) -> Optional[float]:
+        """Send the changed settings in one SET: command and wait for the echo.
+
+        Returns the round-trip latency, or None if nothing was changed. Settings
+        not confirmed within the timeout are rolled back by the shared timer.
+        """
+        dirty = self._settings.dirty
+        command = self._settings.build_command()
+        if command is None:
+            return None
+        self._settings.mark_sent(dirty, time.monotonic())
+        try:
+            return await self.async_request(command, expect_settings_values(dirty))
+        except WebastoCommandTimeout:
+            raise
+        except WebastoCommandError:
+            # Команда не ушла на устройство - изменения остаются несохранёнными
+            self._settings.mark_unsent(dirty)
+            raise
+
+    @callback
+    def _async_check_settings(self, now: float) -> None:
+        """Re-request settings for slow echoes and roll back unconfirmed ones."""
+        if self._settings.needs_refresh(now) and self._is_connected:
+            self._commands.enqueue("GET_SETTINGS")
+
+        expired = self._settings.expire(now)
+        if not expired:
+            return
+        rollback: Dict[str, Any] = {}
+        for key, (pending, confirmed) in expired.items():
+            _LOGGER.warning(
+                "Heater did not confirm %s=%s, rolling back to %s", key, pending, confirmed
+            )
+            self.hass.bus.async_fire(
+                EVENT_SETTING_ROLLBACK,
+                {
+                    "entry_id": self.entry_id,
+                    "key": key,
+                    "pending_value": pending,
+                    "confirmed_value": confirmed,
+                },
+            )
+            # Без подтверждённого значения возвращаем показанное до правки
+            # (или None), чтобы не оставлять в снимке отклонённое значение
+            rollback[key] = confirmed
+        changed = self._state._apply(rollback)
+        self._state._bump()
+        self._notify_listeners(changed | set(expired))
 
     @callback
-    def _notify_listeners(self):
-        """Notify all registered listeners about data changes."""
-        for callback_func in list(self._listeners):
+    def _notify_listeners(self, changed: Optional[Set[str]] = None):
+        """Notify listeners subscribed to the changed keys.
+
+        Without changed keys (e.g. on connection state change) every listener is woken.
+        """
+        if changed is None:
+            targets = {cb: None for cbs in self._listeners.values() for cb in cbs}
+        else:
+            # Производные поля (current_state_text и т.д.) уже входят в changed.
+            # dict убирает дубликаты слушателей, подписанных на несколько ключей.
+            listeners = self._listeners
+            targets = {
+                cb: None
+                for key in (*changed, ALL_KEYS)
+                for cb in listeners.get(key, ())
+            }
+        self._metrics.notifications += 1
+        self._metrics.listener_calls += len(targets)
+        profiler = self._profiler
+        if profiler is not None:
+            self._notify_profiled(targets, profiler)
+            return
+        # Обработчики сущностей - @callback, вызываем их синхронно в цикле событий
+        for callback_func in targets:
             try:
-                self.hass.async_create_task(callback_func())
+                callback_func()
             except Exception as err:
                 _LOGGER.error("Error calling listener callback: %s", err)
 
+    def _notify_profiled(self, targets: Iterable[Callable], profiler: LatencyProfiler) -> None:
+        """Call listeners like _notify_listeners, timing each call and the whole fan-out."""
+        perf_counter = time.perf_counter
+        start = perf_counter()
+        for callback_func in targets:
+            call_start = perf_counter()
+            try:
+                callback_func()
+            except Exception as err:
+                _LOGGER.error("Error calling listener callback: %s", err)
+            profiler.record(STAGE_LISTENER, perf_counter() - call_start)
+        profiler.record(STAGE_NOTIFY, perf_counter() - start)
+
+    def _connect_slot(self):
+        """Return the context manager limiting concurrent connects."""
+        if self._manager is None:
+            return contextlib.nullcontext()
+        return self._manager.connect_semaphore
+
     def _schedule_reconnect(self):
-        """Schedule a reconnection attempt."""
+        """Schedule a reconnection attempt on the manager's shared timer."""
         if self._stop_event.is_set():
             return
 
-        if self._reconnect_attempts >= MAX_RECONNECT_ATTEMPTS:
-            _LOGGER.error(
-                "Maximum reconnection attempts (%d) reached. Stopping reconnection.",
-                MAX_RECONNECT_ATTEMPTS
-            )
+        if self._next_reconnect is not None:
             return
 
-        if self._reconnect_task and not self._reconnect_task.done():
-            self._reconnect_task.cancel()
-            
-        self._reconnect_task = self.hass.async_create_task(self._reconnect_loop())
+        if self._disconnected_at is None:
+            self._disconnected_at = time.monotonic()
 
-    async def _reconnect_loop(self):
-        """Loop to attempt reconnection."""
-        while (not self._stop_event.is_set() and 
-               not self._is_connected and 
-               self._reconnect_attempts < MAX_RECONNECT_ATTEMPTS):
-            
-            self._reconnect_attempts += 1
-            _LOGGER.info(
-                "Attempting to reconnect (%d/%d) in %d seconds...",
-                self._reconnect_attempts,
-                MAX_RECONNECT_ATTEMPTS,
-                RECONNECT_INTERVAL
-            )
-            
-            await asyncio.sleep(RECONNECT_INTERVAL)
-            
-            if not self._stop_event.is_set():
-                await self._connect_websocket()
+        delay = self._reconnect_delay(self._reconnect_attempts)
+        self._reconnect_attempts += 1
+        _LOGGER.info(
+            "Attempting to reconnect (attempt %d) in %.1f seconds...",
+            self._reconnect_attempts,
+            delay
+        )
+        self._next_reconnect = time.monotonic() + delay
+
+    @staticmethod
+    def _reconnect_delay(attempt: int) -> float:
+        """Return the backoff delay before the given reconnection attempt."""
+        if attempt == 0:
+            return RECONNECT_MIN_DELAY
+        delay = min(RECONNECT_MAX_DELAY, RECONNECT_BASE_DELAY * 2 ** (attempt - 1))
+        return max(RECONNECT_MIN_DELAY, delay * random.uniform(1 - RECONNECT_JITTER, 1 + RECONNECT_JITTER))
+
+    @callback
+    def async_retry_now(self) -> None:
+        """Retry the connection right away, e.g. when the network comes back."""
+        if self._is_connected or self._stop_event.is_set():
+            return
+        _LOGGER.debug("Network up signal for %s, retrying connection now", self._host)
+        self._next_reconnect = time.monotonic()
+        self._async_tick(self._next_reconnect)
+
+    @callback
+    def _async_tick(self, now: float) -> None:
+        """Run periodic work; called by the connection manager's shared timer."""
+        self._async_check_stale(now)
+        self._async_check_restored(now)
+        self._async_log_summary(now)
+        self._commands.expire(now)
+        self._async_check_settings(now)
+        if (
+            self._next_reconnect is not None
+            and now >= self._next_reconnect
+            and not self._stop_event.is_set()
+            and not self._is_connected
+            and (self._reconnect_task is None or self._reconnect_task.done())
+        ):
+            self._next_reconnect = None
+            self._reconnect_task = self.hass.async_create_task(self._connect_websocket())
 
     async def send_command(self, command: str) -> bool:
-        """Send a command to the Webasto heater via WebSocket."""
-        if not self._websocket or not self._is_connected:
-            _LOGGER.warning("WebSocket not connected, cannot send command: %s", command)
-            return False
+        """Queue a command for the heater and wait until it is written to the socket.
+
+        Returns False if the command was dropped (e.g. while disconnected).
+        """
+        priority = command_priority(command, bool(self._state.get("burn")))
+        return await self._commands.enqueue(command, priority)
 
+    async def _send_raw(self, command: str) -> None:
+        """Write one command to the socket; used only by the command queue writer."""
+        if not self._websocket or not self._is_connected:
+            raise ConnectionError("WebSocket not connected")
         try:
-            _LOGGER.debug("Sending command: %s", command)
             await self._websocket.send(command)
-            return True
-        except WebSocketException as err:
-            _LOGGER.error("Failed to send command '%s': %s", command, err)
-            self._is_connected = False
-            self._schedule_reconnect()
-            return False
-        except Exception as err:
-            _LOGGER.error("Unexpected error sending command '%s': %s", command, err)
-            self._is_connected = False
-            self._schedule_reconnect()
-            return False
+            if self._capture is not None:
+                self._capture.record(command, DIRECTION_OUT)
+        except Exception:
+            # Соединение неисправно - завершаем слушателя, он запустит переподключение
+            self._abort_connection()
+            raise
+
+    @callback
+    def _abort_connection(self) -> None:
+        """Cancel the listener task so that it closes the socket and reconnects."""
+        if self._listen_task is not None and not self._listen_task.done():
+            self._listen_task.cancel()
 
     async def _close_websocket(self):
         """Close the WebSocket connection."""
@@ -259,6 +1172,7 @@ class WebastoHeaterData:
         """Stop the WebSocket connection."""
         _LOGGER.info("Stopping Webasto WebSocket connection...")
         self._stop_event.set()
+        self._next_reconnect = None
         
         if self._reconnect_task:
             self._reconnect_task.cancel()
@@ -267,7 +1181,24 @@ class WebastoHeaterData:
             except asyncio.CancelledError:
                 pass
                 
-        await self._close_websocket()
+        await self._commands.async_stop()
+        websocket = self._websocket
+        try:
+            async with asyncio.timeout(STOP_TIMEOUT):
+                await self._close_websocket()
+                # Дожидаемся слушателя, чтобы его завершение не пересеклось с новым подключением
+                if self._listen_task is not None:
+                    await asyncio.wait((self._listen_task,))
+        except TimeoutError:
+            # Сокет завис (полуоткрытый TCP, ESP не отвечает) - рвём соединение без рукопожатия
+            _LOGGER.warning("Timed out closing WebSocket to %s, aborting the connection", self._host)
+            if websocket is not None:
+                websocket.transport.abort()
+            self._abort_connection()
+        if self._totals_save_pending:
+            await self._totals_store.async_save(self._totals_data())
+        if self._snapshot_save_pending:
+            await self._snapshot_store.async_save(self._snapshot_data())
 
     async def async_reconnect_websocket(self):
         """Force a reconnection of the WebSocket."""
@@ -282,8 +1213,166 @@ class WebastoHeaterData:
         await self.connect() 
 
 
+class WebastoConnectionManager:
+    """Supervises the connections of all configured Webasto heaters.
+
+    Limits how many heaters (re)connect at the same time and drives their
+    periodic work from one shared timer instead of a task per heater.
+    """
+
+    def __init__(self, hass: HomeAssistant):
+        """Initialize the connection manager."""
+        self.hass = hass
+        self.connect_semaphore = asyncio.Semaphore(MAX_CONCURRENT_CONNECTS)
+        self._heaters: Dict[str, WebastoHeaterData] = {}
+        self._unsub_tick: Optional[Callable[[], None]] = None
+
+    @property
+    def heaters(self) -> List[WebastoHeaterData]:
+        """Return the supervised heaters."""
+        return list(self._heaters.values())
+
+    @callback
+    def async_add(self, heater: WebastoHeaterData) -> None:
+        """Start supervising a heater."""
+        self._heaters[heater.entry_id] = heater
+        if self._unsub_tick is None:
+            self._unsub_tick = async_track_time_interval(
+                self.hass, self._async_tick, MANAGER_TICK_INTERVAL
+            )
+
+    @callback
+    def async_remove(self, heater: WebastoHeaterData) -> bool:
+        """Stop supervising a heater. Return True if no heaters are left."""
+        self._heaters.pop(heater.entry_id, None)
+        if not self._heaters and self._unsub_tick is not None:
+            self._unsub_tick()
+            self._unsub_tick = None
+        return not self._heaters
+
+    @callback
+    def async_network_up(self, host: Optional[str] = None) -> None:
+        """Retry disconnected heaters right away (all of them, or the one at host)."""
+        for heater in self._heaters.values():
+            if host is None or heater.host == host:
+                heater.async_retry_now()
+
+    @callback
+    def _async_tick(self, _now) -> None:
+        """Run periodic work of every heater from the shared timer."""
+        now = time.monotonic()
+        for heater in list(self._heaters.values()):
+            heater._async_tick(now)
+
+
 async def async_setup(hass: HomeAssistant, config: ConfigType) -> bool:
     """Set up the Webasto Heater component."""
+
+    def _heaters(call: ServiceCall) -> List[WebastoHeaterData]:
+        heaters = list(hass.data.get(DOMAIN, {}).values())
+        entry_id = call.data.get("config_entry_id")
+        if entry_id:
+            heaters = [heater for heater in heaters if heater.entry_id == entry_id]
+        return heaters
+
+    async def _async_set_profiling(call: ServiceCall) -> None:
+        for heater in _heaters(call):
+            heater.async_set_profiling(call.data["enabled"])
+
+    async def _async_get_profile(call: ServiceCall) -> ServiceResponse:
+        return {heater.entry_id: heater.profile for heater in _heaters(call)}
+
+    async def _async_get_device_log(call: ServiceCall) -> ServiceResponse:
+        return {
+            heater.entry_id: heater.device_log.lines(call.data.get("lines"))
+            for heater in _heaters(call)
+        }
+
+    async def _async_set_capture(call: ServiceCall) -> None:
+        for heater in _heaters(call):
+            await heater.async_set_capture(call.data["enabled"])
+
+    hass.services.async_register(
+        DOMAIN, SERVICE_SET_PROFILING, _async_set_profiling,
+        schema=vol.Schema({
+            vol.Required("enabled"): cv.boolean,
+            vol.Optional("config_entry_id"): cv.string,
+        }),
+    )
+    hass.services.async_register(
+        DOMAIN, SERVICE_SET_CAPTURE, _async_set_capture,
+        schema=vol.Schema({
+            vol.Required("enabled"): cv.boolean,
+            vol.Optional("config_entry_id"): cv.string,
+        }),
+    )
+    hass.services.async_register(
+        DOMAIN, SERVICE_GET_PROFILE, _async_get_profile,
+        schema=vol.Schema({vol.Optional("config_entry_id"): cv.string}),
+        supports_response=SupportsResponse.ONLY,
+    )
+    hass.services.async_register(
+        DOMAIN, SERVICE_GET_DEVICE_LOG, _async_get_device_log,
+        schema=vol.Schema({
+            vol.Optional("lines"): vol.All(vol.Coerce(int), vol.Range(min=1)),
+            vol.Optional("config_entry_id"): cv.string,
+        }),
+        supports_response=SupportsResponse.ONLY,
+    )
+    websocket_api.async_register_command(hass, _websocket_watch)
+    return True
+
+
+@websocket_api.websocket_command({
+    vol.Required("type"): WS_TYPE_WATCH,
+    vol.Optional("config_entry_id"): str,
+})
+@callback
+def _websocket_watch(
+    hass: HomeAssistant, connection: websocket_api.ActiveConnection, msg: Dict[str, Any]
+) -> None:
+    """Count a dashboard card as a viewer of the heaters until it unsubscribes."""
+    heaters = list(hass.data.get(DOMAIN, {}).values())
+    entry_id = msg.get("config_entry_id")
+    if entry_id:
+        heaters = [heater for heater in heaters if heater.entry_id == entry_id]
+    removers = [heater.async_add_viewer() for heater in heaters]
+
+    @callback
+    def _unsubscribe() -> None:
+        for remove in removers:
+            remove()
+
+    connection.subscriptions[msg["id"]] = _unsubscribe
+    connection.send_result(msg["id"])
+
+
+async def async_migrate_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
+    """Migrate old config entries to per-entry device and unique IDs."""
+    if entry.version == 1:
+        # Версия 1: все сущности использовали unique_id "webasto_<key>" и одно
+        # устройство "webasto_heater_main", поэтому второй нагреватель конфликтовал
+        @callback
+        def _migrate_unique_id(entity_entry: er.RegistryEntry) -> Optional[Dict[str, Any]]:
+            unique_id = entity_entry.unique_id
+            if not unique_id.startswith(LEGACY_UNIQUE_ID_PREFIX):
+                return None
+            return {
+                "new_unique_id": f"{entry.entry_id}_{unique_id[len(LEGACY_UNIQUE_ID_PREFIX):]}"
+            }
+
+        await er.async_migrate_entries(hass, entry.entry_id, _migrate_unique_id)
+
+        device_registry = dr.async_get(hass)
+        device = device_registry.async_get_device(identifiers={(DOMAIN, LEGACY_DEVICE_ID)})
+        if device is not None and entry.entry_id in device.config_entries:
+            device_registry.async_update_device(
+                device.id, new_identifiers={(DOMAIN, entry.entry_id)}
+            )
+
+        hass.config_entries.async_update_entry(entry, version=2)
+        _LOGGER.info("Migrated Webasto Heater config entry %s to version 2", entry.entry_id)
+
     return True
 
 
@@ -294,29 +1383,52 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
         _LOGGER.error("No host configured for Webasto Heater in config entry.")
         return False
 
-    webasto_data = WebastoHeaterData(hass, host)
-    
-    # Пытаемся установить соединение
-    if not await webasto_data.connect():
-        raise ConfigEntryNotReady(f"Could not connect to Webasto heater at {host}")
+    manager: WebastoConnectionManager = hass.data.get(DATA_MANAGER)
+    if manager is None:
+        manager = hass.data[DATA_MANAGER] = WebastoConnectionManager(hass)
+
+    webasto_data = WebastoHeaterData(
+        hass, host, entry.entry_id, entry.title, manager,
+        stale_multiplier=entry.options.get(CONF_STALE_MULTIPLIER, DEFAULT_STALE_MULTIPLIER),
+        command_gap=entry.options.get(CONF_COMMAND_GAP, DEFAULT_COMMAND_GAP),
+        adaptive_rate=entry.options.get(CONF_ADAPTIVE_RATE, True),
+        device_log_path=(
+            hass.config.path(DEVICE_LOG_DIR, f"{entry.entry_id}.log")
+            if entry.options.get(CONF_DEVICE_LOG_FILE, False)
+            else None
+        ),
+    )
+    manager.async_add(webasto_data)
+    await webasto_data.async_load_totals()
+    await webasto_data.async_load_snapshot()
 
     hass.data.setdefault(DOMAIN, {})[entry.entry_id] = webasto_data
 
-    # Загружаем платформы
+    # Загружаем платформы сразу; пока нагреватель спит, сущности показывают
+    # сохранённый снимок, а подключение идёт в фоне с обычным переподключением
     await hass.config_entries.async_forward_entry_setups(entry, PLATFORMS)
+    webasto_data.async_start()
 
     # Регистрируем обработчик остановки
     @callback
     def _handle_stop(event):
         hass.async_create_task(webasto_data.stop())
+        hass.async_create_task(webasto_data.async_close_files())
 
     entry.async_on_unload(
         hass.bus.async_listen_once(EVENT_HOMEASSISTANT_STOP, _handle_stop)
     )
+    # Изменение параметров интеграции применяется перезагрузкой записи
+    entry.async_on_unload(entry.add_update_listener(_async_update_listener))
 
     return True
 
 
+async def _async_update_listener(hass: HomeAssistant, entry: ConfigEntry) -> None:
+    """Reload the config entry when its options change."""
+    await hass.config_entries.async_reload(entry.entry_id)
+
+
 async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     """Unload a config entry."""
     unload_ok = await hass.config_entries.async_unload_platforms(entry, PLATFORMS)
@@ -324,5 +1436,16 @@ async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     if unload_ok:
         webasto_data = hass.data[DOMAIN].pop(entry.entry_id)
         await webasto_data.stop()
+        await webasto_data.async_close_files()
+        manager: WebastoConnectionManager = hass.data[DATA_MANAGER]
+        if manager.async_remove(webasto_data):
+            hass.data.pop(DATA_MANAGER)
     
     return unload_ok
+
+
+async def async_remove_entry(hass: HomeAssistant, entry: ConfigEntry) -> None:
+    """Remove the data stored for a deleted config entry."""
+    # Счётчики и снимок удалённого нагревателя не должны остаться в .storage
+    await Store(hass, TOTALS_STORAGE_VERSION, f"{DOMAIN}.{entry.entry_id}.totals").async_remove()
+    await Store(hass, SNAPSHOT_STORAGE_VERSION, f"{DOMAIN}.{entry.entry_id}.snapshot").async_remove()
@@ -1,10 +1,10 @@
 """Platform for binary sensor integration."""
 import logging
-from typing import List
+from typing import Any, Dict, List, Optional
 
 from homeassistant.components.binary_sensor import BinarySensorEntity, BinarySensorDeviceClass
-from homeassistant.core import HomeAssistant
-from homeassistant.helpers.entity import DeviceInfo, EntityCategory
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.entity import EntityCategory
 from homeassistant.config_entries import ConfigEntry
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
 
@@ -73,6 +73,9 @@ async def async_setup_entry(
 class WebastoHeaterBinarySensor(BinarySensorEntity):
     """Representation of a Webasto Heater Binary Sensor."""
 
+    # Признак значения из сохранённого снимка в recorder не пишем
+    _unrecorded_attributes = frozenset({"restored"})
+
     def __init__(
         self, 
         webasto_data: WebastoHeaterData, 
@@ -87,53 +90,51 @@ class WebastoHeaterBinarySensor(BinarySensorEntity):
         self._key = key
         
         self._attr_name = f"Webasto {name}"
-        self._attr_unique_id = f"webasto_{key}"
+        self._attr_unique_id = webasto_data.unique_id(key)
         self._attr_icon = icon
         self._attr_device_class = device_class
         self._attr_entity_category = entity_category
         self._attr_is_on = None
         self._attr_available = True
+        # Состояние обновляется по push от WebSocket, опрос не нужен
+        self._attr_should_poll = False
+        # Поколение снимка данных, которое уже отражено в состоянии сущности
+        self._generation = -1
 
-        self._attr_device_info = DeviceInfo(
-            identifiers={(DOMAIN, "webasto_heater_main")},
-            name="Webasto Heater",
-            manufacturer="Custom",
-            model="ESP8266 Webasto",
-        )
+        self._attr_device_info = webasto_data.device_info
 
     @property
     def available(self) -> bool:
         """Return if entity is available."""
-        return self._webasto_data.is_connected
+        # Недоступна и при потере соединения, и когда watchdog счёл данные устаревшими
+        return self._webasto_data.available
+
+    @property
+    def extra_state_attributes(self) -> Optional[Dict[str, Any]]:
+        """Return whether the value comes from the saved snapshot."""
+        if self._webasto_data.is_restored:
+            return {"restored": True}
+        return None
 
     async def async_added_to_hass(self) -> None:
         """Register callbacks when entity is added."""
-        self._webasto_data.add_listener(self._handle_data_update)
-        await self._handle_data_update()
+        self._webasto_data.add_listener(self._handle_data_update, (self._key,))
+        self._handle_data_update()
 
     async def async_will_remove_from_hass(self) -> None:
         """Unregister callbacks when entity is removed."""
         self._webasto_data.remove_listener(self._handle_data_update)
 
-    async def _handle_data_update(self):
+    @callback
+    def _handle_data_update(self) -> None:
         """Handle data update from the WebSocket."""
         data = self._webasto_data.data
+        if data.generation == self._generation:
+            return
+        self._generation = data.generation
         
-        if self._key == "wifi_connected_status":
-            # Специальная обработка для статуса Wi-Fi (3 = подключено)
-            wifi_status = data.get("wifi_status")
-            self._attr_is_on = wifi_status == 3
-        else:
-            # Для остальных binary sensor используем значения напрямую
-            value = data.get(self._key)
-            if isinstance(value, bool):
-                self._attr_is_on = value
-            elif isinstance(value, int):
-                self._attr_is_on = bool(value)
-            elif isinstance(value, str):
-                # Обработка строковых значений
-                self._attr_is_on = value.lower() in ('true', '1', 'on', 'yes')
-            else:
-                self._attr_is_on = bool(value) if value is not None else None
+        # Значение уже приведено к bool декодером кадров, включая производный
+        # wifi_connected_status (wifi_status == 3)
+        self._attr_is_on = data.get(self._key)
 
-        self.async_write_ha_state()
\ No newline at end of file
+        self._webasto_data.async_write_entity_state(self, self._key)
\ No newline at end of file
@@ -1,31 +1,26 @@
 """Platform for button integration."""
 import logging
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Callable, Optional
 
 from homeassistant.components.button import ButtonEntity
-from homeassistant.core import HomeAssistant
-from homeassistant.helpers.entity import DeviceInfo, EntityCategory
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.entity import EntityCategory
 from homeassistant.config_entries import ConfigEntry
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
 
-from . import DOMAIN, WebastoHeaterData
+from . import CONNECTION_KEY, DOMAIN, WebastoHeaterData
+from .commands import (
+    FramePredicate,
+    WebastoCommandError,
+    expect_change,
+    expect_decrease,
+    expect_settings,
+    expect_value,
+)
+from .snapshot import WebastoSnapshot
 
 _LOGGER = logging.getLogger(__name__)
 
-# Словарь для сопоставления внутренних ключей настроек с суффиксами entity_id в Home Assistant
-# Эти суффиксы должны соответствовать транслитерированным именам из strings.json
-SETTING_ENTITIES = {
-    "pump_size": "razmer_nasosa",
-    "heater_target": "tselevaia_temperatura_nagrevatelia",
-    "heater_min": "minimalnaia_temperatura_nagrevatelia",
-    "heater_overheat": "temperatura_peregreva",
-    "heater_warning": "temperatura_preduprezhdeniia",
-    "max_pwm_fan": "maks_shim_ventiliatora",
-    "glow_brightness": "iarkost_svechi_nakalivaniia",
-    "glow_fade_in_duration": "vremia_rozzhiga_svechi",
-    "glow_fade_out_duration": "vremia_zatukhaniia_svechi",
-}
-
 async def async_setup_entry(
     hass: HomeAssistant,
     config_entry: ConfigEntry,
@@ -36,140 +31,152 @@ async def async_setup_entry(
 
     # Добавляем кнопки
     buttons: List[ButtonEntity] = [
-        WebastoHeaterButton(webasto_data, "toggle_burn", "Включить / Выключить", "ENTER"),
+        # Для команд с наблюдаемым результатом задан ожидаемый ответ устройства
+        WebastoHeaterButton(
+            webasto_data, "toggle_burn", "Включить / Выключить", "ENTER",
+            lambda data: expect_change("burn", data.get("burn")),
+        ),
         WebastoHeaterButton(webasto_data, "up_mode", "Режим Вверх", "UP"),
         WebastoHeaterButton(webasto_data, "down_mode", "Режим Вниз", "DOWN"),
-        WebastoHeaterButton(webasto_data, "fuel_pump", "Прокачка топлива", "FP"),
-        WebastoHeaterButton(webasto_data, "clear_fail", "Сбросить ошибку", "CF"),
+        WebastoHeaterButton(
+            webasto_data, "fuel_pump", "Прокачка топлива", "FP",
+            lambda data: expect_value("fuel_pumping_active", True),
+        ),
+        WebastoHeaterButton(
+            webasto_data, "clear_fail", "Сбросить ошибку", "CF",
+            lambda data: expect_value("webasto_fail", False),
+        ),
         WebastoHeaterSaveSettingsButton(webasto_data), # Отдельная кнопка для сохранения настроек
-        WebastoHeaterButton(webasto_data, "reset_settings", "Сбросить настройки", "RESET_SETTINGS"),
-        WebastoHeaterButton(webasto_data, "load_settings", "Загрузить настройки", "GET_SETTINGS"),
+        WebastoHeaterButton(
+            webasto_data, "reset_settings", "Сбросить настройки", "RESET_SETTINGS",
+            lambda data: expect_settings(),
+        ),
+        WebastoHeaterButton(
+            webasto_data, "load_settings", "Загрузить настройки", "GET_SETTINGS",
+            lambda data: expect_settings(),
+        ),
         WebastoHeaterButton(webasto_data, "reset_wifi", "Сбросить Wi-Fi", "RESET_WIFI"),
         WebastoHeaterButton(webasto_data, "reboot_esp", "Перезагрузить ESP", "REBOOT_ESP"),
-        WebastoHeaterButton(webasto_data, "reset_fuel_consumption", "Сбросить потребление топлива", "RESET_FUEL_CONSUMPTION"),
-        WebastoHeaterButton(webasto_data, "enable_logging", "Включить логирование", "LOG_ON"),
-        WebastoHeaterButton(webasto_data, "disable_logging", "Выключить логирование", "LOG_OFF"),
+        WebastoHeaterButton(
+            webasto_data, "reset_fuel_consumption", "Сбросить потребление топлива", "RESET_FUEL_CONSUMPTION",
+            lambda data: expect_decrease("total_fuel_consumed_liters", data.get("total_fuel_consumed_liters")),
+        ),
+        WebastoHeaterButton(
+            webasto_data, "enable_logging", "Включить логирование", "LOG_ON",
+            lambda data: expect_value("logging_enabled", True),
+        ),
+        WebastoHeaterButton(
+            webasto_data, "disable_logging", "Выключить логирование", "LOG_OFF",
+            lambda data: expect_value("logging_enabled", False),
+        ),
         WebastoHeaterReconnectButton(webasto_data), # Новая кнопка для переподключения
     ]
     async_add_entities(buttons)
 
 
-class WebastoHeaterButton(ButtonEntity):
-    """Representation of a Webasto Heater Button."""
+class WebastoHeaterConnectedButton(ButtonEntity):
+    """Button that is available while the heater is connected."""
 
-    def __init__(self, webasto_data: WebastoHeaterData, key: str, name: str, command: str):
+    _attr_should_poll = False
+
+    def __init__(self, webasto_data: WebastoHeaterData, key: str):
         """Initialize the button."""
         self._webasto_data = webasto_data
         self._key = key
+        # Доступность, уже записанная в состояние сущности
+        self._written_available: Optional[bool] = None
+
+    @property
+    def available(self) -> bool:
+        """Return if entity is available."""
+        return self._webasto_data.is_connected
+
+    async def async_added_to_hass(self) -> None:
+        """Register callbacks when entity is added."""
+        # Платформы загружаются до подключения, поэтому доступность обновляется
+        # при каждом подключении и потере связи
+        self._webasto_data.add_listener(self._handle_connection_update, (CONNECTION_KEY,))
+
+    async def async_will_remove_from_hass(self) -> None:
+        """Unregister callbacks when entity is removed."""
+        self._webasto_data.remove_listener(self._handle_connection_update)
+
+    @callback
+    def _handle_connection_update(self) -> None:
+        """Write the state when the connection comes up or goes down."""
+        available = self.available
+        if available == self._written_available:
+            return
+        self._written_available = available
+        self._webasto_data.async_write_entity_state(self, self._key)
+
+
+class WebastoHeaterButton(WebastoHeaterConnectedButton):
+    """Representation of a Webasto Heater Button."""
+
+    def __init__(
+        self,
+        webasto_data: WebastoHeaterData,
+        key: str,
+        name: str,
+        command: str,
+        confirm: Optional[Callable[[WebastoSnapshot], FramePredicate]] = None,
+    ):
+        """Initialize the button."""
+        super().__init__(webasto_data, key)
         self._command = command
+        # Строит предикат ожидаемого ответа устройства по текущему состоянию
+        self._confirm = confirm
         self._attr_name = f"Webasto {name}"
-        self._attr_unique_id = f"webasto_{key}" # Используем оригинальный ключ для unique_id
+        self._attr_unique_id = webasto_data.unique_id(key) # Используем оригинальный ключ для unique_id
         
         # Устанавливаем иконку на основе ключа, если она не задана явно в strings.json
         # Home Assistant автоматически подбирает иконку, если она есть в strings.json
         # или если device_class соответствует. Можно задать явно, если нужно.
         # self._attr_icon = icon # Если иконка передается
         
-        self._attr_device_info = DeviceInfo(
-            identifiers={(DOMAIN, "webasto_heater_main")},
-            name="Webasto Heater",
-            manufacturer="Custom",
-            model="ESP8266 Webasto",
-        )
-
-    @property
-    def available(self) -> bool:
-        """Return if entity is available."""
-        return self._webasto_data.is_connected
+        self._attr_device_info = webasto_data.device_info
 
     async def async_press(self) -> None:
         """Handle the button press."""
         _LOGGER.debug("Button %s pressed. Sending command: %s", self._key, self._command)
-        success = await self._webasto_data.send_command(self._command)
-        if success:
+        if self._confirm is None:
+            if not await self._webasto_data.send_command(self._command):
+                raise WebastoCommandError(f"Failed to send command: {self._command}")
             _LOGGER.info("Successfully sent command: %s", self._command)
-        else:
-            _LOGGER.error("Failed to send command: %s", self._command)
+            return
 
-class WebastoHeaterSaveSettingsButton(ButtonEntity):
+        # Ждём, пока устройство подтвердит выполнение команды
+        latency = await self._webasto_data.async_request(
+            self._command, self._confirm(self._webasto_data.data)
+        )
+        _LOGGER.info("Command %s confirmed by the heater in %.0f ms", self._command, latency * 1000)
+
+class WebastoHeaterSaveSettingsButton(WebastoHeaterConnectedButton):
     """Representation of a button to save settings to the Webasto heater."""
 
     def __init__(self, webasto_data: WebastoHeaterData):
         """Initialize the save settings button."""
-        self._webasto_data = webasto_data
+        super().__init__(webasto_data, "save_settings")
         self._attr_name = "Webasto Сохранить настройки"
-        self._attr_unique_id = "webasto_save_settings"
+        self._attr_unique_id = webasto_data.unique_id("save_settings")
         self._attr_icon = "mdi:content-save-outline" # Можно задать иконку явно
 
-        self._attr_device_info = DeviceInfo(
-            identifiers={(DOMAIN, "webasto_heater_main")},
-            name="Webasto Heater",
-            manufacturer="Custom",
-            model="ESP8266 Webasto",
-        )
-
-    @property
-    def available(self) -> bool:
-        """Return if entity is available."""
-        return self._webasto_data.is_connected
+        self._attr_device_info = webasto_data.device_info
 
     async def async_press(self) -> None:
         """Handle the button press."""
         _LOGGER.debug("Save settings button pressed.")
-        settings_values = []
-        missing_entities = []
-
-        # Собираем текущие значения из всех number сущностей
-        for esp_key, ha_entity_suffix in SETTING_ENTITIES.items():
-            entity_id = f"number.{DOMAIN}_{ha_entity_suffix}"
-            state = self.hass.states.get(entity_id)
-            if state:
-                try:
-                    # Убедимся, что отправляем целое число, как ожидает ESP
-                    # Используем int() для преобразования, так как ESP ожидает целые числа
-                    value = int(float(state.state))
-                    settings_values.append(f"{esp_key}={value}")
-                except (ValueError, TypeError) as err:
-                    _LOGGER.error(
-                        "Invalid value for %s: %s (error: %s)",
-                        entity_id, state.state, err
-                    )
-                    # Если значение невалидно, прерываем сохранение, чтобы не отправлять некорректные данные
-                    return
-            else:
-                missing_entities.append(entity_id)
-
-        if missing_entities:
-            _LOGGER.error(
-                "Cannot save settings: missing entities: %s",
-                ", ".join(missing_entities)
-            )
+        # Отправляем только настройки, изменённые относительно подтверждённых устройством
+        dirty = self._webasto_data.dirty_settings
+        latency = await self._webasto_data.async_save_settings()
+        if latency is None:
+            _LOGGER.info("No changed settings to save.")
             return
-
-        if not settings_values:
-            _LOGGER.warning("No settings to save. settings_values is empty.")
-            return
-
-        # Формируем команду в том же формате, что и веб-интерфейс: "SET:param1=value1,param2=value2,..."
-        full_command = "SET:" + ",".join(settings_values)
-
-        _LOGGER.debug("Attempting to send save settings command: %s", full_command)
-        success = await self._webasto_data.send_command(full_command)
-        if success:
-            _LOGGER.info("Successfully sent save settings command: %s", full_command)
-        else:
-            _LOGGER.error("Failed to send save settings command: %s", full_command)
-
-    async def async_added_to_hass(self) -> None:
-        """Register callbacks when entity is added."""
-        # Этот метод нужен для того, чтобы Home Assistant знал, что сущность добавлена
-        # и мог отслеживать ее доступность.
-        pass
-
-    async def async_will_remove_from_hass(self) -> None:
-        """Unregister callbacks when entity is removed."""
-        # Этот метод нужен для очистки ресурсов, если сущность удаляется.
-        pass
+        _LOGGER.info(
+            "Saved settings %s, confirmed by the heater in %.0f ms",
+            dirty, latency * 1000
+        )
 
 class WebastoHeaterReconnectButton(ButtonEntity):
     """Representation of a button to force WebSocket reconnection."""
@@ -179,21 +186,16 @@ class WebastoHeaterReconnectButton(ButtonEntity):
         self._webasto_data = webasto_data
         self._attr_name = "Webasto Переподключить WebSocket"
         # Изменено: unique_id теперь соответствует запрошенному формату
-        self._attr_unique_id = "webasto_perepodkliuchit_websocket" 
+        self._attr_unique_id = webasto_data.unique_id("perepodkliuchit_websocket") 
         self._attr_icon = "mdi:link-variant-plus" # Иконка для переподключения
 
-        self._attr_device_info = DeviceInfo(
-            identifiers={(DOMAIN, "webasto_heater_main")},
-            name="Webasto Heater",
-            manufacturer="Custom",
-            model="ESP8266 Webasto",
-        )
+        self._attr_device_info = webasto_data.device_info
 
     @property
     def available(self) -> bool:
         """Return if entity is available."""
-        # Доступность кнопки зависит от доступности основного соединения
-        return self._webasto_data.is_connected
+        # Кнопка доступна всегда: она нужна именно тогда, когда соединение потеряно
+        return True
 
     async def async_press(self) -> None:
         """Handle the button press to force reconnection."""
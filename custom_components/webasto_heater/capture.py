@@ -0,0 +1,245 @@
+"""Raw frame capture to rotating gzip segments and its reader.
+
+A segment is a sequence of gzip members, each holding a batch of records:
+an 8-byte monotonic timestamp, a direction byte and a 4-byte length, all
+little-endian, followed by the UTF-8 frame. Every member starts a valid gzip
+stream, so the index sidecar (one JSON line per member: byte offset, first
+timestamp, wall clock time, record count) lets the reader seek to a moment
+without decompressing the segment from its start.
+
+The module does not depend on Home Assistant, so the replay tool can use it.
+"""
+import gzip
+import json
+import logging
+import os
+import queue
+import struct
+import threading
+import time
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+_LOGGER = logging.getLogger(__name__)
+
+DIRECTION_IN = 0  # кадр от нагревателя
+DIRECTION_OUT = 1  # команда нагревателю
+
+SEGMENT_SUFFIX = ".cap.gz"
+INDEX_SUFFIX = ".idx"
+
+# Размер сегмента (сжатых байт), после которого начинается новый, и сколько сегментов хранить
+DEFAULT_SEGMENT_SIZE = 1 << 20
+DEFAULT_MAX_SEGMENTS = 20
+# Пакет записей сжимается в отдельный gzip-член раз в FLUSH_INTERVAL или по достижении FLUSH_BYTES
+FLUSH_INTERVAL = 5.0
+FLUSH_BYTES = 64 * 1024
+# Очередь к фоновому потоку ограничена: при отставании диска кадры теряются, а не копятся в памяти
+QUEUE_SIZE = 10_000
+# Сколько close() ждёт записи хвоста очереди, прежде чем бросить поток
+CLOSE_TIMEOUT = 10.0
+
+_HEADER = struct.Struct("<dBI")
+
+
+class FrameCapture:
+    """Writes frames to rotating gzip segments from a background thread.
+
+    record() only puts the frame into a bounded queue, so it can be called
+    from the event loop; compression and file I/O happen in the thread.
+    """
+
+    def __init__(
+        self,
+        directory: str,
+        segment_size: int = DEFAULT_SEGMENT_SIZE,
+        max_segments: int = DEFAULT_MAX_SEGMENTS,
+    ) -> None:
+        """Start the writer thread for captures in directory."""
+        self.directory = directory
+        self._segment_size = segment_size
+        self._max_segments = max_segments
+        self._queue: "queue.Queue[Optional[Tuple[float, int, str]]]" = queue.Queue(QUEUE_SIZE)
+        self.frames = 0
+        self.dropped = 0
+        self.bytes_written = 0
+        self.segments = 0
+        # Поток записи завершился (ошибка диска или close()) - кадры больше не принимаются
+        self._stopped = False
+        self._thread = threading.Thread(
+            target=self._run, name=f"webasto-capture-{os.path.basename(directory)}", daemon=True
+        )
+        self._thread.start()
+
+    def record(self, message: str, direction: int = DIRECTION_IN) -> None:
+        """Queue a frame with the current monotonic time; never blocks."""
+        if self._stopped:
+            self.dropped += 1
+            return
+        try:
+            self._queue.put_nowait((time.monotonic(), direction, message))
+        except queue.Full:
+            self.dropped += 1
+            return
+        self.frames += 1
+
+    def close(self) -> None:
+        """Flush queued frames and stop the writer thread; blocks, run it in an executor."""
+        if self._thread.is_alive():
+            try:
+                self._queue.put(None, timeout=CLOSE_TIMEOUT)
+            except queue.Full:
+                _LOGGER.warning("Frame capture to %s: writer did not drain the queue", self.directory)
+        self._thread.join(CLOSE_TIMEOUT)
+
+    def as_dict(self) -> Dict[str, Any]:
+        """Return the capture counters."""
+        return {
+            "directory": self.directory,
+            "frames": self.frames,
+            "dropped": self.dropped,
+            "bytes_written": self.bytes_written,
+            "segments": self.segments,
+        }
+
+    def _run(self) -> None:
+        segment = None
+        index = None
+        closing = False
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            while not closing:
+                batch: List[bytes] = []
+                size = 0
+                first = None
+                deadline = None
+                while size < FLUSH_BYTES:
+                    timeout = None if deadline is None else max(0.0, deadline - time.monotonic())
+                    try:
+                        item = self._queue.get(timeout=timeout)
+                    except queue.Empty:
+                        break
+                    if item is None:
+                        closing = True
+                        break
+                    timestamp, direction, message = item
+                    data = message.encode()
+                    batch.append(_HEADER.pack(timestamp, direction, len(data)))
+                    batch.append(data)
+                    size += _HEADER.size + len(data)
+                    if first is None:
+                        first = timestamp
+                        deadline = time.monotonic() + FLUSH_INTERVAL
+                if not batch:
+                    continue
+                if segment is None or segment.tell() >= self._segment_size:
+                    if segment is not None:
+                        segment.close()
+                        index.close()
+                    segment, index = self._open_segment()
+                offset = segment.tell()
+                member = gzip.compress(b"".join(batch), compresslevel=6)
+                segment.write(member)
+                segment.flush()
+                index.write(json.dumps({
+                    "offset": offset, "ts": first, "wall": time.time(), "records": len(batch) // 2,
+                }) + "\n")
+                index.flush()
+                self.bytes_written += len(member)
+        except OSError as err:
+            _LOGGER.error("Frame capture to %s stopped: %s", self.directory, err)
+        finally:
+            self._stopped = True
+            if segment is not None:
+                segment.close()
+                index.close()
+
+    def _open_segment(self):
+        name = time.strftime("%Y%m%d-%H%M%S") + f"-{self.segments:04d}"
+        path = os.path.join(self.directory, name)
+        self.segments += 1
+        segment = open(path + SEGMENT_SUFFIX, "ab")
+        index = open(path + INDEX_SUFFIX, "a", encoding="utf-8")
+        # Удаляем самые старые сегменты сверх лимита
+        for old in list_segments(self.directory)[:-self._max_segments]:
+            for suffix in (SEGMENT_SUFFIX, INDEX_SUFFIX):
+                try:
+                    os.remove(old + suffix)
+                except FileNotFoundError:
+                    pass
+        return segment, index
+
+
+def list_segments(directory: str) -> List[str]:
+    """Return the segment paths (without suffix) in a capture directory, oldest first."""
+    return sorted(
+        os.path.join(directory, name[:-len(SEGMENT_SUFFIX)])
+        for name in os.listdir(directory)
+        if name.endswith(SEGMENT_SUFFIX)
+    )
+
+
+def _read_index(path: str) -> List[Dict[str, Any]]:
+    try:
+        with open(path + INDEX_SUFFIX, encoding="utf-8") as index:
+            return [json.loads(line) for line in index if line.strip()]
+    except (FileNotFoundError, ValueError):
+        return []
+
+
+class CaptureReader:
+    """Reads frames from a capture directory in recorded order."""
+
+    def __init__(self, directory: str) -> None:
+        """Open a capture directory."""
+        self.directory = directory
+        self.segments = list_segments(directory)
+
+    def frames(
+        self, start: Optional[float] = None, direction: Optional[int] = DIRECTION_IN
+    ) -> Iterator[Tuple[float, int, str]]:
+        """Yield (timestamp, direction, message), beginning at monotonic time start.
+
+        Records of the other direction are skipped unless direction is None.
+        """
+        segments = self.segments
+        offset = 0
+        if start is not None:
+            # По индексу: последний сегмент и в нём последний gzip-член, начатые не позже start
+            indexes = [_read_index(path) for path in segments]
+            begin = 0
+            for position, members in enumerate(indexes):
+                if members and members[0]["ts"] <= start:
+                    begin = position
+            segments = segments[begin:]
+            for member in indexes[begin] if indexes else ():
+                if member["ts"] > start:
+                    break
+                offset = member["offset"]
+        for path in segments:
+            records = _read_segment(path + SEGMENT_SUFFIX, offset)
+            offset = 0
+            for record in records:
+                if start is not None and record[0] < start:
+                    continue
+                if direction is None or record[1] == direction:
+                    yield record
+
+
+def _read_segment(path: str, offset: int) -> Iterator[Tuple[float, int, str]]:
+    with open(path, "rb") as raw:
+        raw.seek(offset)
+        with gzip.GzipFile(fileobj=raw) as stream:
+            while True:
+                # Сегмент, оборванный на середине члена (перезапуск HA), - берём то, что
+                # есть; недописанную запись (заголовок или тело) отбрасываем целиком
+                try:
+                    header = stream.read(_HEADER.size)
+                    if len(header) < _HEADER.size:
+                        return
+                    timestamp, direction, length = _HEADER.unpack(header)
+                    payload = stream.read(length)
+                except EOFError:
+                    return
+                if len(payload) < length:
+                    return
+                yield timestamp, direction, payload.decode(errors="replace")
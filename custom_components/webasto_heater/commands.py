@@ -0,0 +1,300 @@
+"""Outbound command queue for the Webasto heater WebSocket."""
+import asyncio
+import logging
+import time
+from collections import deque
+from typing import Any, Awaitable, Callable, Deque, Dict, Optional, Tuple
+
+from homeassistant.exceptions import HomeAssistantError
+
+_LOGGER = logging.getLogger(__name__)
+
+PRIORITY_HIGH = 0
+PRIORITY_NORMAL = 1
+
+# Минимальная пауза между командами, чтобы не переполнить входной буфер ESP8266
+DEFAULT_COMMAND_GAP = 0.1
+# Сколько держать в очереди команды, которые можно отправить после переподключения
+COMMAND_HOLD_TIMEOUT = 30.0
+
+# Сколько ждать подтверждения команды от устройства
+DEFAULT_REQUEST_TIMEOUT = 10.0
+
+# Команды, которые при потере соединения ждут переподключения; остальные
+# (ENTER, UP, DOWN, FP, ...) отбрасываются - выполнять их с опозданием опасно
+HOLD_COMMANDS = ("GET_SETTINGS", "SET")
+
+
+def command_name(command: str) -> str:
+    """Return the command name without its payload (SET:a=1 -> SET)."""
+    return command.split(":", 1)[0]
+
+
+def command_priority(command: str, burning: bool) -> int:
+    """Return the lane for a command; safety commands jump the line."""
+    if command == "CF" or (command == "ENTER" and burning):
+        # Сброс ошибки и выключение горения отправляются в первую очередь
+        return PRIORITY_HIGH
+    return PRIORITY_NORMAL
+
+
+# Предикат подтверждения: (декодированные значения кадра, это кадр настроек?) -> bool
+FramePredicate = Callable[[Dict[str, Any], bool], bool]
+
+
+class WebastoCommandError(HomeAssistantError):
+    """Command could not be sent to the heater."""
+
+
+class WebastoCommandTimeout(WebastoCommandError):
+    """Heater did not confirm a command in time."""
+
+
+def expect_settings() -> FramePredicate:
+    """Return a predicate matching the next settings frame."""
+    return lambda values, is_settings: is_settings
+
+
+def expect_settings_values(expected: Dict[str, Any]) -> FramePredicate:
+    """Return a predicate matching a settings frame that contains the expected values."""
+    return lambda values, is_settings: is_settings and all(
+        values.get(key) == value for key, value in expected.items()
+    )
+
+
+def expect_value(key: str, value: Any) -> FramePredicate:
+    """Return a predicate matching a frame where key has the given value."""
+    return lambda values, is_settings: key in values and values[key] == value
+
+
+def expect_change(key: str, current: Any) -> FramePredicate:
+    """Return a predicate matching a frame where key differs from current."""
+    return lambda values, is_settings: key in values and values[key] != current
+
+
+def expect_decrease(key: str, current: Any) -> FramePredicate:
+    """Return a predicate matching a frame where a counter was reset."""
+    def predicate(values: Dict[str, Any], is_settings: bool) -> bool:
+        value = values.get(key)
+        if value is None:
+            return False
+        return value == 0 or (current is not None and value < current)
+    return predicate
+
+
+def _parse_set(command: str) -> Dict[str, str]:
+    params: Dict[str, str] = {}
+    for param in command[4:].split(","):
+        if "=" in param:
+            key, value = param.split("=", 1)
+            params[key.strip()] = value.strip()
+    return params
+
+
+class QueuedCommand:
+    """A command waiting in the queue."""
+
+    __slots__ = ("command", "name", "priority", "future", "enqueued")
+
+    def __init__(self, command: str, priority: int, future: asyncio.Future):
+        """Initialize the queued command."""
+        self.command = command
+        self.name = command_name(command)
+        self.priority = priority
+        self.future = future
+        self.enqueued = time.monotonic()
+
+
+class CommandStats:
+    """Latency statistics (enqueue to socket write) for one command name."""
+
+    __slots__ = ("sent", "dropped", "coalesced", "last_latency", "max_latency", "total_latency")
+
+    def __init__(self):
+        """Initialize empty statistics."""
+        self.sent = 0
+        self.dropped = 0
+        self.coalesced = 0
+        self.last_latency = 0.0
+        self.max_latency = 0.0
+        self.total_latency = 0.0
+
+    def as_dict(self) -> Dict[str, Any]:
+        """Return the statistics as a dict."""
+        return {
+            "sent": self.sent,
+            "dropped": self.dropped,
+            "coalesced": self.coalesced,
+            "last_latency": self.last_latency,
+            "max_latency": self.max_latency,
+            "mean_latency": self.total_latency / self.sent if self.sent else None,
+        }
+
+
+class CommandQueue:
+    """Priority queue of outbound commands drained by a single writer task."""
+
+    def __init__(
+        self,
+        send: Callable[[str], Awaitable[None]],
+        min_gap: float = DEFAULT_COMMAND_GAP,
+        hold_timeout: float = COMMAND_HOLD_TIMEOUT,
+    ):
+        """Initialize the queue; send writes one command to the socket."""
+        self._send = send
+        self._min_gap = min_gap
+        self._hold_timeout = hold_timeout
+        self._lanes: Tuple[Deque[QueuedCommand], ...] = (deque(), deque())
+        self._wakeup = asyncio.Event()
+        self._connected = False
+        self._last_sent = 0.0
+        self._writer: Optional[asyncio.Task] = None
+        self._stats: Dict[str, CommandStats] = {}
+
+    @property
+    def pending(self) -> int:
+        """Return the number of queued commands."""
+        return sum(len(lane) for lane in self._lanes)
+
+    @property
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        """Return per-command statistics."""
+        return {name: stats.as_dict() for name, stats in self._stats.items()}
+
+    def _stats_for(self, name: str) -> CommandStats:
+        stats = self._stats.get(name)
+        if stats is None:
+            stats = self._stats[name] = CommandStats()
+        return stats
+
+    def enqueue(self, command: str, priority: int = PRIORITY_NORMAL) -> asyncio.Future:
+        """Queue a command; the future resolves to True once it is written."""
+        name = command_name(command)
+        future = asyncio.get_running_loop().create_future()
+
+        if not self._connected and name not in HOLD_COMMANDS:
+            _LOGGER.warning("WebSocket not connected, dropping command: %s", command)
+            self._stats_for(name).dropped += 1
+            future.set_result(False)
+            return future
+
+        queued = self._coalesce(command, name)
+        if queued is not None:
+            self._stats_for(name).coalesced += 1
+            return queued.future
+
+        self._lanes[priority].append(QueuedCommand(command, priority, future))
+        self._wakeup.set()
+        return future
+
+    def _coalesce(self, command: str, name: str) -> Optional[QueuedCommand]:
+        """Merge the command into an already queued one, if it is redundant."""
+        for lane in self._lanes:
+            for queued in lane:
+                if queued.name != name:
+                    continue
+                if name in ("GET_SETTINGS", "GET_STATE"):
+                    # Повторный запрос настроек или состояния ничего не добавляет
+                    return queued
+                if name == "RATE":
+                    # Важна только последняя запрошенная частота
+                    queued.command = command
+                    return queued
+                if name == "SET":
+                    # Более новые значения заменяют ещё не отправленные
+                    params = _parse_set(queued.command)
+                    params.update(_parse_set(command))
+                    queued.command = "SET:" + ",".join(
+                        f"{key}={value}" for key, value in params.items()
+                    )
+                    return queued
+        return None
+
+    def set_connected(self, connected: bool) -> None:
+        """Update connection state; drop commands that must not be held."""
+        self._connected = connected
+        if connected:
+            self._wakeup.set()
+            return
+        for lane in self._lanes:
+            for queued in [q for q in lane if q.name not in HOLD_COMMANDS]:
+                lane.remove(queued)
+                self._drop(queued, "connection lost")
+
+    def expire(self, now: float) -> None:
+        """Drop held commands that waited longer than the hold timeout."""
+        if self._connected:
+            return
+        for lane in self._lanes:
+            while lane and now - lane[0].enqueued > self._hold_timeout:
+                self._drop(lane.popleft(), "not reconnected in time")
+
+    def _drop(self, queued: QueuedCommand, reason: str) -> None:
+        _LOGGER.warning("Dropping command %s: %s", queued.command, reason)
+        self._stats_for(queued.name).dropped += 1
+        if not queued.future.done():
+            queued.future.set_result(False)
+
+    def start(self, create_task: Callable[[Awaitable[Any]], asyncio.Task]) -> None:
+        """Start the writer task if it is not running."""
+        if self._writer is None or self._writer.done():
+            self._writer = create_task(self._run())
+
+    async def async_stop(self) -> None:
+        """Stop the writer and fail all queued commands."""
+        if self._writer is not None:
+            self._writer.cancel()
+            try:
+                await self._writer
+            except asyncio.CancelledError:
+                pass
+            self._writer = None
+        self._connected = False
+        for lane in self._lanes:
+            while lane:
+                queued = lane.popleft()
+                if not queued.future.done():
+                    queued.future.set_result(False)
+
+    def _peek(self) -> Optional[QueuedCommand]:
+        for lane in self._lanes:
+            if lane:
+                return lane[0]
+        return None
+
+    async def _run(self) -> None:
+        """Write queued commands one by one, keeping the minimum gap."""
+        while True:
+            queued = self._peek()
+            if queued is None or not self._connected:
+                self._wakeup.clear()
+                await self._wakeup.wait()
+                continue
+
+            delay = self._last_sent + self._min_gap - time.monotonic()
+            if delay > 0:
+                # После паузы выбираем заново: могла прийти более срочная команда
+                await asyncio.sleep(delay)
+                continue
+
+            self._lanes[queued.priority].popleft()
+            try:
+                _LOGGER.debug("Sending command: %s", queued.command)
+                await self._send(queued.command)
+            except Exception as err:
+                _LOGGER.error("Failed to send command '%s': %s", queued.command, err)
+                self._stats_for(queued.name).dropped += 1
+                if not queued.future.done():
+                    queued.future.set_result(False)
+                continue
+
+            now = time.monotonic()
+            self._last_sent = now
+            latency = now - queued.enqueued
+            stats = self._stats_for(queued.name)
+            stats.sent += 1
+            stats.last_latency = latency
+            stats.max_latency = max(stats.max_latency, latency)
+            stats.total_latency += latency
+            if not queued.future.done():
+                queued.future.set_result(True)
@@ -1,6 +1,7 @@
 """Config flow for Webasto Heater integration."""
 import logging
 import asyncio
+import socket
 from typing import Any, Dict, Optional
 
 import voluptuous as vol
@@ -8,11 +9,28 @@ import websockets
 from websockets.exceptions import WebSocketException
 
 from homeassistant import config_entries
-from homeassistant.core import HomeAssistant
+from homeassistant.core import callback
 from homeassistant.data_entry_flow import FlowResult
+from homeassistant.helpers.service_info.dhcp import DhcpServiceInfo
 import homeassistant.helpers.config_validation as cv
 
-from . import DOMAIN, WEBSOCKET_URL
+from . import (
+    CONF_ADAPTIVE_RATE,
+    CONF_COMMAND_GAP,
+    CONF_DEVICE_LOG_FILE,
+    CONF_SENSOR_THROTTLE,
+    CONF_STALE_MULTIPLIER,
+    CONF_STATISTICS_ONLY,
+    CONF_STATISTICS_WINDOWS,
+    DATA_MANAGER,
+    DEFAULT_STALE_MULTIPLIER,
+    DEFAULT_STATISTICS_WINDOWS,
+    DOMAIN,
+    STATISTICS_WINDOW_OPTIONS,
+    websocket_url,
+)
+from .commands import DEFAULT_COMMAND_GAP
+from .sensor import THROTTLE_DEFAULTS
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -23,9 +41,17 @@ DATA_SCHEMA = vol.Schema({
 class WebastoHeaterConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
     """Handle a config flow for Webasto Heater."""
 
-    VERSION = 1
+    VERSION = 2
     CONNECTION_CLASS = config_entries.CONN_CLASS_LOCAL_PUSH
 
+    @staticmethod
+    @callback
+    def async_get_options_flow(
+        config_entry: config_entries.ConfigEntry,
+    ) -> config_entries.OptionsFlow:
+        """Return the options flow handler."""
+        return WebastoHeaterOptionsFlow()
+
     async def async_step_user(
         self, user_input: Optional[Dict[str, Any]] = None
     ) -> FlowResult:
@@ -63,7 +89,7 @@ class WebastoHeaterConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
 
     async def _async_test_connection(self, host: str) -> bool:
         """Test if we can connect to the Webasto heater via WebSocket."""
-        url = WEBSOCKET_URL.format(host=host)
+        url = websocket_url(host)
         _LOGGER.debug("Testing WebSocket connection to: %s", url)
         
         try:
@@ -92,4 +118,142 @@ class WebastoHeaterConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
 
     async def async_step_import(self, import_config: Dict[str, Any]) -> FlowResult:
         """Handle import from configuration.yaml."""
-        return await self.async_step_user(import_config)
\ No newline at end of file
+        return await self.async_step_user(import_config)
+
+    async def async_step_dhcp(self, discovery_info: DhcpServiceInfo) -> FlowResult:
+        """Handle a DHCP request from a heater rejoining the network."""
+        # Манифест ловит любой модуль Espressif (стоковая прошивка называется ESP-XXXXXX),
+        # поэтому отбираем только адреса настроенных нагревателей. Хост в записи может
+        # быть именем или host:port - сравниваем по адресу
+        hosts = [
+            entry.data["host"]
+            for entry in self._async_current_entries()
+            if entry.data.get("host")
+            and await self._async_resolve(entry.data["host"]) == discovery_info.ip
+        ]
+        if not hosts:
+            return self.async_abort(reason="not_supported")
+        # Нагреватель снова в сети - переподключаемся сразу, не дожидаясь backoff
+        manager = self.hass.data.get(DATA_MANAGER)
+        if manager is not None:
+            for host in hosts:
+                manager.async_network_up(host)
+        return self.async_abort(reason="already_configured")
+
+    async def _async_resolve(self, host: str) -> Optional[str]:
+        """Return the IPv4 address of a configured host, without its port."""
+        hostname = host.rsplit(":", 1)[0]
+        try:
+            return await self.hass.async_add_executor_job(socket.gethostbyname, hostname)
+        except OSError:
+            return None
+
+
+class WebastoHeaterOptionsFlow(config_entries.OptionsFlow):
+    """Handle options for Webasto Heater."""
+
+    def __init__(self) -> None:
+        """Initialize the options flow."""
+        self._throttle_key: Optional[str] = None
+
+    async def async_step_init(
+        self, user_input: Optional[Dict[str, Any]] = None
+    ) -> FlowResult:
+        """Choose between the general options and the sensor write policies."""
+        return self.async_show_menu(step_id="init", menu_options=["settings", "throttle"])
+
+    def _async_save(self, changes: Dict[str, Any]) -> FlowResult:
+        """Store changed options, keeping the ones edited in the other step."""
+        return self.async_create_entry(title="", data={**self.config_entry.options, **changes})
+
+    async def async_step_settings(
+        self, user_input: Optional[Dict[str, Any]] = None
+    ) -> FlowResult:
+        """Manage the general options."""
+        if user_input is not None:
+            return self._async_save(user_input)
+
+        options = self.config_entry.options
+        return self.async_show_form(
+            step_id="settings",
+            data_schema=vol.Schema({
+                # Во сколько раз интервал без кадров должен превысить обычный, чтобы переподключиться
+                vol.Optional(
+                    CONF_STALE_MULTIPLIER,
+                    default=options.get(CONF_STALE_MULTIPLIER, DEFAULT_STALE_MULTIPLIER),
+                ): vol.All(vol.Coerce(float), vol.Range(min=2, max=100)),
+                # Минимальная пауза между командами в секундах
+                vol.Optional(
+                    CONF_COMMAND_GAP,
+                    default=options.get(CONF_COMMAND_GAP, DEFAULT_COMMAND_GAP),
+                ): vol.All(vol.Coerce(float), vol.Range(min=0, max=2)),
+                # Реже получать кадры от простаивающего нагревателя, чаще - при розжиге
+                vol.Optional(
+                    CONF_ADAPTIVE_RATE,
+                    default=options.get(CONF_ADAPTIVE_RATE, True),
+                ): cv.boolean,
+                # Дублировать журнал прошивки (LOG_ON) в файл config/webasto_logs/<запись>.log
+                vol.Optional(
+                    CONF_DEVICE_LOG_FILE,
+                    default=options.get(CONF_DEVICE_LOG_FILE, False),
+                ): cv.boolean,
+                # Публиковать агрегаты телеметрии вместо каждого кадра
+                vol.Optional(
+                    CONF_STATISTICS_ONLY,
+                    default=options.get(CONF_STATISTICS_ONLY, False),
+                ): cv.boolean,
+                vol.Optional(
+                    CONF_STATISTICS_WINDOWS,
+                    default=options.get(CONF_STATISTICS_WINDOWS, DEFAULT_STATISTICS_WINDOWS),
+                ): cv.multi_select(STATISTICS_WINDOW_OPTIONS),
+            }),
+        )
+
+    async def async_step_throttle(
+        self, user_input: Optional[Dict[str, Any]] = None
+    ) -> FlowResult:
+        """Pick the telemetry sensor whose write policy to edit."""
+        if user_input is not None:
+            self._throttle_key = user_input["sensor"]
+            return await self.async_step_throttle_sensor()
+        return self.async_show_form(
+            step_id="throttle",
+            data_schema=vol.Schema({
+                vol.Required("sensor"): vol.In(list(THROTTLE_DEFAULTS)),
+            }),
+        )
+
+    async def async_step_throttle_sensor(
+        self, user_input: Optional[Dict[str, Any]] = None
+    ) -> FlowResult:
+        """Edit the minimum interval, deadbands and heartbeat of one sensor."""
+        key = self._throttle_key
+        overrides = dict(self.config_entry.options.get(CONF_SENSOR_THROTTLE, {}))
+        if user_input is not None:
+            # Храним только отличия от политики по умолчанию
+            defaults = THROTTLE_DEFAULTS[key].as_dict()
+            changed = {name: value for name, value in user_input.items() if value != defaults[name]}
+            if changed:
+                overrides[key] = changed
+            else:
+                overrides.pop(key, None)
+            return self._async_save({CONF_SENSOR_THROTTLE: overrides})
+
+        current = THROTTLE_DEFAULTS[key].updated(overrides.get(key)).as_dict()
+        return self.async_show_form(
+            step_id="throttle_sensor",
+            description_placeholders={"sensor": key},
+            data_schema=vol.Schema({
+                # Не чаще раза в min_interval секунд
+                vol.Required("min_interval", default=current["min_interval"]):
+                    vol.All(vol.Coerce(float), vol.Range(min=0, max=3600)),
+                # Записывается изменение не меньше дедбенда: в единицах сенсора или в долях значения
+                vol.Required("abs_deadband", default=current["abs_deadband"]):
+                    vol.All(vol.Coerce(float), vol.Range(min=0)),
+                vol.Required("rel_deadband", default=current["rel_deadband"]):
+                    vol.All(vol.Coerce(float), vol.Range(min=0, max=1)),
+                # Подавленное изменение записывается не реже раза в heartbeat секунд
+                vol.Required("heartbeat", default=current["heartbeat"]):
+                    vol.All(vol.Coerce(float), vol.Range(min=10, max=86400)),
+            }),
+        )
@@ -0,0 +1,154 @@
+"""Log lines of the heater firmware (LOG_ON) kept apart from the Home Assistant log."""
+import logging
+import os
+import queue
+import threading
+import time
+from collections import deque
+from datetime import datetime
+from typing import Any, Deque, Dict, List, Optional, Tuple
+
+_LOGGER = logging.getLogger(__name__)
+
+# Сколько последних строк держать в памяти
+DEVICE_LOG_LINES = 500
+# Файл журнала: размер, после которого он переименовывается в .1, и число старых файлов
+DEVICE_LOG_FILE_SIZE = 1 << 20
+DEVICE_LOG_FILE_BACKUPS = 3
+# Строки пишутся в файл пачками не чаще раза в FLUSH_INTERVAL
+FLUSH_INTERVAL = 2.0
+QUEUE_SIZE = 10_000
+# Сколько close() ждёт записи хвоста очереди, прежде чем бросить поток
+CLOSE_TIMEOUT = 10.0
+
+
+def _format_time(timestamp: float) -> str:
+    return datetime.fromtimestamp(timestamp).isoformat(sep=" ", timespec="milliseconds")
+
+
+class DeviceLogFile:
+    """Appends lines to a size-rotated text file from a background thread."""
+
+    def __init__(
+        self,
+        path: str,
+        max_bytes: int = DEVICE_LOG_FILE_SIZE,
+        backups: int = DEVICE_LOG_FILE_BACKUPS,
+    ) -> None:
+        """Start the writer thread for the given file."""
+        self.path = path
+        self._max_bytes = max_bytes
+        self._backups = backups
+        self._queue: "queue.Queue[Optional[Tuple[float, str]]]" = queue.Queue(QUEUE_SIZE)
+        self.dropped = 0
+        # Поток записи завершился (ошибка файла или close()) - строки больше не принимаются
+        self._stopped = False
+        self._thread = threading.Thread(target=self._run, name="webasto-device-log", daemon=True)
+        self._thread.start()
+
+    def write(self, timestamp: float, line: str) -> None:
+        """Queue a line; never blocks."""
+        if self._stopped:
+            self.dropped += 1
+            return
+        try:
+            self._queue.put_nowait((timestamp, line))
+        except queue.Full:
+            self.dropped += 1
+
+    def close(self) -> None:
+        """Write queued lines and stop the thread; blocks, run it in an executor."""
+        if self._thread.is_alive():
+            try:
+                self._queue.put(None, timeout=CLOSE_TIMEOUT)
+            except queue.Full:
+                _LOGGER.warning("Device log file %s: writer did not drain the queue", self.path)
+        self._thread.join(CLOSE_TIMEOUT)
+
+    def _run(self) -> None:
+        stream = None
+        closing = False
+        try:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            stream = open(self.path, "a", encoding="utf-8")
+            while not closing:
+                item = self._queue.get()
+                batch: List[str] = []
+                deadline = time.monotonic() + FLUSH_INTERVAL
+                while item is not None:
+                    batch.append(f"{_format_time(item[0])} {item[1]}\n")
+                    try:
+                        item = self._queue.get(timeout=max(0.0, deadline - time.monotonic()))
+                    except queue.Empty:
+                        break
+                else:
+                    closing = True
+                if not batch:
+                    continue
+                stream.write("".join(batch))
+                stream.flush()
+                if stream.tell() >= self._max_bytes:
+                    stream.close()
+                    self._rotate()
+                    stream = open(self.path, "a", encoding="utf-8")
+        except OSError as err:
+            _LOGGER.error("Device log file %s stopped: %s", self.path, err)
+        finally:
+            self._stopped = True
+            if stream is not None:
+                stream.close()
+
+    def _rotate(self) -> None:
+        for number in range(self._backups - 1, 0, -1):
+            source = f"{self.path}.{number}"
+            if os.path.exists(source):
+                os.replace(source, f"{self.path}.{number + 1}")
+        os.replace(self.path, f"{self.path}.1")
+
+
+class DeviceLog:
+    """Bounded buffer of the latest device log lines with an optional file sink."""
+
+    def __init__(self, max_lines: int = DEVICE_LOG_LINES, path: Optional[str] = None) -> None:
+        """Initialize an empty buffer, writing to a rotating file at path if given."""
+        self._lines: Deque[Tuple[float, str]] = deque(maxlen=max_lines)
+        self._file = DeviceLogFile(path) if path is not None else None
+        self.total = 0
+        # Строки с прошлой сводки в журнале HA
+        self._unreported = 0
+
+    def append(self, line: str) -> None:
+        """Store one line received from the heater."""
+        timestamp = time.time()
+        self._lines.append((timestamp, line))
+        self.total += 1
+        self._unreported += 1
+        if self._file is not None:
+            self._file.write(timestamp, line)
+
+    def take_summary(self) -> Tuple[int, Optional[str]]:
+        """Return the number of lines since the last call and the latest line."""
+        count, self._unreported = self._unreported, 0
+        return count, self._lines[-1][1] if count else None
+
+    def lines(self, count: Optional[int] = None) -> List[Dict[str, str]]:
+        """Return the latest lines, oldest first."""
+        selected = list(self._lines)
+        if count is not None:
+            selected = selected[-count:] if count > 0 else []
+        return [{"time": _format_time(timestamp), "line": line} for timestamp, line in selected]
+
+    def close(self) -> None:
+        """Flush and close the file sink; blocks, run it in an executor."""
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def as_dict(self) -> Dict[str, Any]:
+        """Return the counters of the buffer and the file sink."""
+        return {
+            "total": self.total,
+            "buffered": len(self._lines),
+            "file": self._file.path if self._file is not None else None,
+            "file_dropped": self._file.dropped if self._file is not None else 0,
+        }
@@ -0,0 +1,46 @@
+"""Diagnostics support for Webasto Heater."""
+from typing import Any, Dict
+
+from homeassistant.components.diagnostics import async_redact_data
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import HomeAssistant
+
+from . import DEVICE_LOG_DIAGNOSTICS_LINES, DOMAIN, WebastoHeaterData
+
+# Данные, по которым можно определить сеть пользователя
+TO_REDACT = {"host", "wifi_ssid", "wifi_ip"}
+
+
+async def async_get_config_entry_diagnostics(
+    hass: HomeAssistant, entry: ConfigEntry
+) -> Dict[str, Any]:
+    """Return diagnostics for a config entry."""
+    webasto_data: WebastoHeaterData = hass.data[DOMAIN][entry.entry_id]
+    return {
+        "entry": {
+            "data": async_redact_data(dict(entry.data), TO_REDACT),
+            "options": dict(entry.options),
+        },
+        "connection": {
+            "connected": webasto_data.is_connected,
+            "frame_format": webasto_data.frame_format,
+            "delta_frames": webasto_data.delta_enabled,
+            "push_interval": webasto_data.push_interval,
+            "rate_acked": webasto_data.rate_acked,
+            "viewers": webasto_data.viewers,
+            "capture": webasto_data.capture_stats,
+            "stale": webasto_data.is_stale,
+            "restored": webasto_data.is_restored,
+            "stale_timeout": webasto_data.stale_timeout,
+            **webasto_data.reconnect_stats,
+        },
+        "metrics": webasto_data.metrics_data,
+        "commands": webasto_data.command_stats,
+        "profile": webasto_data.profile,
+        "pending_settings": webasto_data.dirty_settings,
+        "device_log": {
+            **webasto_data.device_log.as_dict(),
+            "lines": webasto_data.device_log.lines(DEVICE_LOG_DIAGNOSTICS_LINES),
+        },
+        "snapshot": async_redact_data(dict(webasto_data.data), TO_REDACT),
+    }
@@ -0,0 +1,192 @@
+"""Fixed-memory telemetry history with rolling statistics."""
+from array import array
+from collections import deque
+from typing import Any, Deque, Dict, Optional
+
+# Поля телеметрии, для которых храним краткосрочную историю
+HISTORY_FIELDS = ("exhaust_temp", "fan_speed", "fuel_rate_hz", "burn_mode")
+# Длина окна истории (секунды) и максимальное число точек в нём
+HISTORY_WINDOW = 600.0
+HISTORY_CAPACITY = 1200
+
+# Атрибуты статистики на сенсорах (не записываются в recorder)
+HISTORY_ATTRIBUTES = ("window_min", "window_max", "window_mean", "window_slope", "window_samples")
+
+
+class TelemetryRing:
+    """Ring buffer of (monotonic time, value) samples with O(1) rolling statistics.
+
+    Memory is allocated once for capacity samples. Min and max are kept with
+    monotonic index queues, mean and least-squares slope with running sums
+    that are recomputed from the buffer every capacity evictions to bound
+    floating point drift.
+    """
+
+    __slots__ = (
+        "_capacity", "_window", "_times", "_values", "_seq", "_count",
+        "_min_queue", "_max_queue", "_t0", "_sum_t", "_sum_v", "_sum_tt", "_sum_tv",
+        "_evictions",
+    )
+
+    def __init__(self, capacity: int = HISTORY_CAPACITY, window: float = HISTORY_WINDOW):
+        """Initialize an empty ring."""
+        self._capacity = capacity
+        self._window = window
+        self._times = array("d", bytes(8 * capacity))
+        self._values = array("d", bytes(8 * capacity))
+        # Абсолютный номер следующей точки; позиция в буфере - номер % capacity
+        self._seq = 0
+        self._count = 0
+        self._min_queue: Deque[int] = deque()
+        self._max_queue: Deque[int] = deque()
+        self._t0 = 0.0
+        self._sum_t = self._sum_v = self._sum_tt = self._sum_tv = 0.0
+        self._evictions = 0
+
+    def __len__(self) -> int:
+        return self._count
+
+    def push(self, now: float, value: float) -> None:
+        """Append a sample taken at monotonic time now."""
+        self.expire(now)
+        if self._count == self._capacity:
+            self._evict()
+        if self._count == 0:
+            self._t0 = now
+
+        seq = self._seq
+        pos = seq % self._capacity
+        self._times[pos] = now
+        self._values[pos] = value
+        t = now - self._t0
+        self._sum_t += t
+        self._sum_v += value
+        self._sum_tt += t * t
+        self._sum_tv += t * value
+
+        values, capacity = self._values, self._capacity
+        while self._min_queue and values[self._min_queue[-1] % capacity] >= value:
+            self._min_queue.pop()
+        self._min_queue.append(seq)
+        while self._max_queue and values[self._max_queue[-1] % capacity] <= value:
+            self._max_queue.pop()
+        self._max_queue.append(seq)
+
+        self._seq = seq + 1
+        self._count += 1
+
+    def expire(self, now: float) -> None:
+        """Drop samples older than the window."""
+        cutoff = now - self._window
+        while self._count and self._times[(self._seq - self._count) % self._capacity] < cutoff:
+            self._evict()
+
+    def _evict(self) -> None:
+        oldest = self._seq - self._count
+        pos = oldest % self._capacity
+        value = self._values[pos]
+        t = self._times[pos] - self._t0
+        self._sum_t -= t
+        self._sum_v -= value
+        self._sum_tt -= t * t
+        self._sum_tv -= t * value
+        if self._min_queue and self._min_queue[0] == oldest:
+            self._min_queue.popleft()
+        if self._max_queue and self._max_queue[0] == oldest:
+            self._max_queue.popleft()
+        self._count -= 1
+
+        self._evictions += 1
+        if self._evictions >= self._capacity:
+            self._recompute()
+
+    def _recompute(self) -> None:
+        """Rebuild the running sums from the buffer (amortized O(1))."""
+        self._evictions = 0
+        self._sum_t = self._sum_v = self._sum_tt = self._sum_tv = 0.0
+        if not self._count:
+            return
+        capacity = self._capacity
+        first = self._seq - self._count
+        self._t0 = self._times[first % capacity]
+        for seq in range(first, self._seq):
+            pos = seq % capacity
+            t = self._times[pos] - self._t0
+            value = self._values[pos]
+            self._sum_t += t
+            self._sum_v += value
+            self._sum_tt += t * t
+            self._sum_tv += t * value
+
+    def stats(self, now: Optional[float] = None) -> Optional[Dict[str, Any]]:
+        """Return min/max/mean and slope (per minute) over the window."""
+        if now is not None:
+            self.expire(now)
+        count = self._count
+        if not count:
+            return None
+        capacity = self._capacity
+        mean = self._sum_v / count
+        denominator = count * self._sum_tt - self._sum_t * self._sum_t
+        slope = None
+        if count > 1 and denominator > 1e-9:
+            slope = (count * self._sum_tv - self._sum_t * self._sum_v) / denominator * 60
+        return {
+            "window_min": self._values[self._min_queue[0] % capacity],
+            "window_max": self._values[self._max_queue[0] % capacity],
+            "window_mean": mean,
+            "window_slope": slope,
+            "window_samples": count,
+        }
+
+
+# Агрегаты, публикуемые в режиме "только статистика"
+AGGREGATE_STATS = ("mean", "min", "max")
+
+
+class TimeWeightedWindow:
+    """Time-weighted mean, min and max of a value over a tumbling window.
+
+    The value is sampled on change only, so each value is weighted by how long
+    it was held. Periods without a value (disconnected) are not counted.
+    """
+
+    __slots__ = ("_last_time", "_last_value", "_weighted_sum", "_duration", "_min", "_max")
+
+    def __init__(self, now: float, value: Optional[float] = None):
+        """Start the first window at now with the current value."""
+        self._last_value = value
+        self.reset(now)
+
+    def reset(self, now: float) -> None:
+        """Start a new window at now, carrying over the current value."""
+        self._last_time = now
+        self._weighted_sum = 0.0
+        self._duration = 0.0
+        self._min = self._max = self._last_value
+
+    def update(self, now: float, value: Optional[float]) -> None:
+        """Record that the value changed at now."""
+        self._accumulate(now)
+        self._last_value = value
+        if value is None:
+            return
+        if self._min is None or value < self._min:
+            self._min = value
+        if self._max is None or value > self._max:
+            self._max = value
+
+    def _accumulate(self, now: float) -> None:
+        if self._last_value is not None:
+            elapsed = now - self._last_time
+            self._weighted_sum += self._last_value * elapsed
+            self._duration += elapsed
+        self._last_time = now
+
+    def result(self, now: float) -> Optional[Dict[str, float]]:
+        """Return the aggregates of the window up to now, or None without data."""
+        self._accumulate(now)
+        if self._min is None:
+            return None
+        mean = self._weighted_sum / self._duration if self._duration > 0 else self._last_value
+        return {"mean": mean, "min": self._min, "max": self._max}
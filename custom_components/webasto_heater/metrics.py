@@ -0,0 +1,106 @@
+"""Work counters of a Webasto heater connection."""
+from typing import Any, Dict
+
+
+class WebastoMetrics:
+    """Counters and gauges updated inline by WebastoHeaterData and its entities.
+
+    Updating a counter is a single attribute increment, so the counters are
+    always on; they are read by polled diagnostic sensors and diagnostics.
+    """
+
+    __slots__ = (
+        "frames", "bytes", "formats", "other_frames",
+        "decode_errors", "decode_time", "max_decode_time",
+        "notifications", "listener_calls", "state_writes",
+        "connected_time", "sequence_gaps", "stale_frames", "resyncs",
+        "decimated_frames",
+    )
+
+    def __init__(self) -> None:
+        """Initialize zero counters."""
+        self.frames = 0
+        self.bytes = 0
+        # Формат кадра (json, legacy, compact) -> количество кадров
+        self.formats: Dict[str, int] = {}
+        # Кадры неизвестного формата (строки журнала ESP и т.п.)
+        self.other_frames = 0
+        self.decode_errors = 0
+        # Суммарное и максимальное время разбора кадра (секунды)
+        self.decode_time = 0.0
+        self.max_decode_time = 0.0
+        # Рассылки изменений и вызовы обработчиков сущностей в них
+        self.notifications = 0
+        self.listener_calls = 0
+        # Ключ сущности -> количество записей состояния
+        self.state_writes: Dict[str, int] = {}
+        # Время в подключённом состоянии до текущего подключения (секунды)
+        self.connected_time = 0.0
+        # Пропуски и повторы в нумерации дельта-кадров и запросы полного состояния
+        self.sequence_gaps = 0
+        self.stale_frames = 0
+        self.resyncs = 0
+        # Кадры, отброшенные локально, когда прошивка не умеет снижать частоту
+        self.decimated_frames = 0
+
+    def record_decode(self, elapsed: float) -> None:
+        """Account for the time spent decoding one frame."""
+        self.decode_time += elapsed
+        if elapsed > self.max_decode_time:
+            self.max_decode_time = elapsed
+
+    def record_format(self, name: str) -> None:
+        """Account for one frame decoded by the named codec."""
+        self.formats[name] = self.formats.get(name, 0) + 1
+
+    @property
+    def json_frames(self) -> int:
+        """Return the number of JSON frames."""
+        return self.formats.get("json", 0)
+
+    @property
+    def legacy_frames(self) -> int:
+        """Return the number of CURRENT_SETTINGS frames."""
+        return self.formats.get("legacy", 0)
+
+    @property
+    def compact_frames(self) -> int:
+        """Return the number of compact telemetry frames."""
+        return self.formats.get("compact", 0)
+
+    def record_state_write(self, key: str) -> None:
+        """Account for one state write of the entity with the given key."""
+        self.state_writes[key] = self.state_writes.get(key, 0) + 1
+
+    @property
+    def mean_decode_time(self) -> float:
+        """Return the mean decode time of recognized frames (seconds)."""
+        decoded = sum(self.formats.values())
+        return self.decode_time / decoded if decoded else 0.0
+
+    @property
+    def total_state_writes(self) -> int:
+        """Return the number of state writes of all entities."""
+        return sum(self.state_writes.values())
+
+    def as_dict(self) -> Dict[str, Any]:
+        """Return all counters as a dict."""
+        return {
+            "frames": self.frames,
+            "bytes": self.bytes,
+            "json_frames": self.json_frames,
+            "legacy_frames": self.legacy_frames,
+            "compact_frames": self.compact_frames,
+            "other_frames": self.other_frames,
+            "decode_errors": self.decode_errors,
+            "sequence_gaps": self.sequence_gaps,
+            "stale_frames": self.stale_frames,
+            "resyncs": self.resyncs,
+            "decimated_frames": self.decimated_frames,
+            "mean_decode_time": self.mean_decode_time,
+            "max_decode_time": self.max_decode_time,
+            "notifications": self.notifications,
+            "listener_calls": self.listener_calls,
+            "state_writes": dict(self.state_writes),
+            "total_state_writes": self.total_state_writes,
+        }
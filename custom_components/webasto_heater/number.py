@@ -1,21 +1,20 @@
 """Platform for number integration."""
 import logging
-from typing import List
+from typing import Any, Dict, List
 
 from homeassistant.components.number import NumberEntity, NumberMode
-from homeassistant.core import HomeAssistant
-from homeassistant.helpers.entity import DeviceInfo, EntityCategory
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.entity import EntityCategory
 from homeassistant.config_entries import ConfigEntry
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
 from homeassistant.const import UnitOfTemperature, UnitOfTime
 
 from . import DOMAIN, WebastoHeaterData
+from .schema import SETTING_LIMITS
 
 _LOGGER = logging.getLogger(__name__)
 
-# Словарь для сопоставления внутренних ключей настроек с суффиксами entity_id в Home Assistant
-# Этот словарь дублируется здесь для удобства, чтобы передать правильные суффиксы в сущности number.
-# Он должен быть идентичен SETTING_ENTITIES в button.py
+# Словарь для сопоставления внутренних ключей настроек с суффиксами unique_id сущностей number
 SETTING_ENTITIES_MAP = {
     "pump_size": "razmer_nasosa",
     "heater_target": "tselevaia_temperatura_nagrevatelia",
@@ -43,7 +42,7 @@ async def async_setup_entry(
             "pump_size", # esp_key
             SETTING_ENTITIES_MAP["pump_size"], # ha_entity_suffix
             "Размер насоса", 
-            10, 100, 1, 
+            *SETTING_LIMITS["pump_size"], 1, 
             "mdi:pump"
         ),
         WebastoHeaterNumber(
@@ -51,7 +50,7 @@ async def async_setup_entry(
             "heater_target", 
             SETTING_ENTITIES_MAP["heater_target"],
             "Целевая температура нагревателя", 
-            150, 250, 1, 
+            *SETTING_LIMITS["heater_target"], 1, 
             "mdi:thermometer-plus", 
             UnitOfTemperature.CELSIUS
         ),
@@ -60,7 +59,7 @@ async def async_setup_entry(
             "heater_min", 
             SETTING_ENTITIES_MAP["heater_min"],
             "Минимальная температура нагревателя", 
-            140, 240, 1, 
+            *SETTING_LIMITS["heater_min"], 1, 
             "mdi:thermometer-minus", 
             UnitOfTemperature.CELSIUS
         ),
@@ -69,7 +68,7 @@ async def async_setup_entry(
             "heater_overheat", 
             SETTING_ENTITIES_MAP["heater_overheat"],
             "Температура перегрева", 
-            200, 300, 1, 
+            *SETTING_LIMITS["heater_overheat"], 1, 
             "mdi:thermometer-alert", 
             UnitOfTemperature.CELSIUS
         ),
@@ -78,7 +77,7 @@ async def async_setup_entry(
             "heater_warning", 
             SETTING_ENTITIES_MAP["heater_warning"],
             "Температура предупреждения", 
-            180, 280, 1, 
+            *SETTING_LIMITS["heater_warning"], 1, 
             "mdi:thermometer-lines", 
             UnitOfTemperature.CELSIUS
         ),
@@ -87,7 +86,7 @@ async def async_setup_entry(
             "max_pwm_fan", 
             SETTING_ENTITIES_MAP["max_pwm_fan"],
             "Макс. ШИМ вентилятора", 
-            0, 255, 1, 
+            *SETTING_LIMITS["max_pwm_fan"], 1, 
             "mdi:fan-speed-1"
         ),
         WebastoHeaterNumber(
@@ -95,7 +94,7 @@ async def async_setup_entry(
             "glow_brightness", 
             SETTING_ENTITIES_MAP["glow_brightness"],
             "Яркость свечи накаливания", 
-            0, 255, 1, 
+            *SETTING_LIMITS["glow_brightness"], 1, 
             "mdi:lightbulb-on"
         ),
         WebastoHeaterNumber(
@@ -103,7 +102,7 @@ async def async_setup_entry(
             "glow_fade_in_duration", 
             SETTING_ENTITIES_MAP["glow_fade_in_duration"],
             "Время розжига свечи", 
-            0, 60000, 100, 
+            *SETTING_LIMITS["glow_fade_in_duration"], 100, 
             "mdi:timer-outline", 
             UnitOfTime.MILLISECONDS
         ),
@@ -112,7 +111,7 @@ async def async_setup_entry(
             "glow_fade_out_duration", 
             SETTING_ENTITIES_MAP["glow_fade_out_duration"],
             "Время затухания свечи", 
-            0, 60000, 100, 
+            *SETTING_LIMITS["glow_fade_out_duration"], 100, 
             "mdi:timer-off-outline", 
             UnitOfTime.MILLISECONDS
         ),
@@ -140,7 +139,7 @@ class WebastoHeaterNumber(NumberEntity):
         
         self._attr_name = f"Webasto {name}"
         # unique_id теперь формируется на основе ha_entity_suffix
-        self._attr_unique_id = f"webasto_{ha_entity_suffix}" 
+        self._attr_unique_id = webasto_data.unique_id(ha_entity_suffix) 
         self._attr_native_min_value = min_value
         self._attr_native_max_value = max_value
         self._attr_native_step = step
@@ -150,51 +149,46 @@ class WebastoHeaterNumber(NumberEntity):
         self._attr_native_value = None
         self._attr_entity_category = EntityCategory.CONFIG
         self._attr_available = True
+        # Состояние обновляется по push от WebSocket, опрос не нужен
+        self._attr_should_poll = False
+        # Поколение снимка данных, которое уже отражено в состоянии сущности
+        self._generation = -1
 
-        self._attr_device_info = DeviceInfo(
-            identifiers={(DOMAIN, "webasto_heater_main")},
-            name="Webasto Heater",
-            manufacturer="Custom",
-            model="ESP8266 Webasto",
-        )
+        self._attr_device_info = webasto_data.device_info
+
+    @property
+    def extra_state_attributes(self) -> Dict[str, Any]:
+        """Return whether the shown value still waits for device confirmation."""
+        return {"pending": self._webasto_data.is_setting_pending(self._esp_key)}
 
     @property
     def available(self) -> bool:
         """Return if entity is available."""
-        return self._webasto_data.is_connected
+        # Недоступна и при потере соединения, и когда watchdog счёл данные устаревшими
+        return self._webasto_data.available
 
     async def async_added_to_hass(self) -> None:
         """Register callbacks when entity is added."""
-        self._webasto_data.add_listener(self._handle_data_update)
-        await self._handle_data_update()
+        self._webasto_data.add_listener(self._handle_data_update, (self._esp_key,))
+        self._handle_data_update()
 
     async def async_will_remove_from_hass(self) -> None:
         """Unregister callbacks when entity is removed."""
         self._webasto_data.remove_listener(self._handle_data_update)
 
-    async def _handle_data_update(self):
+    @callback
+    def _handle_data_update(self) -> None:
         """Handle data update from the WebSocket."""
-        # Используем _esp_key для получения данных от устройства
-        value = self._webasto_data.data.get(self._esp_key) 
-        
-        if value is not None:
-            try:
-                # Убеждаемся, что значение находится в допустимых пределах
-                numeric_value = float(value)
-                self._attr_native_value = max(
-                    self._attr_native_min_value,
-                    min(self._attr_native_max_value, numeric_value)
-                )
-            except (ValueError, TypeError) as err:
-                _LOGGER.warning(
-                    "Invalid value for %s: %s (error: %s)", 
-                    self._esp_key, value, err
-                )
-                self._attr_native_value = None
-        else:
-            self._attr_native_value = None
-
-        self.async_write_ha_state()
+        data = self._webasto_data.data
+        if data.generation == self._generation:
+            return
+        self._generation = data.generation
+
+        # Используем _esp_key для получения данных от устройства.
+        # Значение уже приведено к float и ограничено пределами декодером кадров.
+        self._attr_native_value = data.get(self._esp_key)
+
+        self._webasto_data.async_write_entity_state(self, self._esp_key)
 
     async def async_set_native_value(self, value: float) -> None:
         """Update the current value."""
@@ -210,13 +204,9 @@ class WebastoHeaterNumber(NumberEntity):
             )
             return
 
-        # Обновляем локальное состояние
-        self._attr_native_value = value
-        
-        # Обновляем данные в WebSocket data manager, используя _esp_key
-        # Это нужно для корректной работы кнопки "Сохранить настройки"
-        self._webasto_data._data[self._esp_key] = int(value)
-        
-        self.async_write_ha_state()
+        # Сохраняем изменение в хранилище настроек менеджера данных, используя _esp_key.
+        # Кнопка "Сохранить настройки" отправит только изменённые значения;
+        # менеджер данных уведомит эту сущность, и она запишет новое состояние.
+        self._webasto_data.set_setting(self._esp_key, int(value))
         
-        _LOGGER.debug("Set %s to %s (will be saved when 'Save Settings' is pressed)", self._esp_key, value)
\ No newline at end of file
+        _LOGGER.debug("Set %s to %s (pending until 'Save Settings' is pressed and the heater confirms it)", self._esp_key, value)
\ No newline at end of file
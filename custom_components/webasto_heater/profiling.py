@@ -0,0 +1,107 @@
+"""Opt-in latency profiling of the receive pipeline."""
+from array import array
+from typing import Any, Dict, Optional
+
+# Этапы обработки кадра, для которых собираются гистограммы
+STAGE_FRAME = "frame"  # весь кадр: от возврата recv() до конца обработки
+STAGE_PARSE = "parse"  # json.loads и декодер схемы
+STAGE_MERGE = "merge"  # история, счётчики и слияние в снимок
+STAGE_NOTIFY = "notify"  # рассылка изменений всем слушателям
+STAGE_LISTENER = "listener"  # один обработчик сущности, включая запись состояния
+STAGE_WRITE = "state_write"  # async_write_ha_state одной сущности
+
+# Гистограмма в микросекундах: значения до 64 мкс хранятся точно, дальше на каждую
+# степень двойки приходится 32 корзины (погрешность не более ~3%, как в HdrHistogram)
+_EXACT = 64
+_SUB_BUCKETS = 32
+_MAX_VALUE = 60_000_000  # 60 с
+_BUCKETS = _EXACT + (_MAX_VALUE.bit_length() - 6) * _SUB_BUCKETS
+
+
+def _bucket(value: int) -> int:
+    if value < _EXACT:
+        return value
+    shift = value.bit_length() - 6
+    return _EXACT + (shift - 1) * _SUB_BUCKETS + (value >> shift) - _SUB_BUCKETS
+
+
+def _bucket_value(index: int) -> int:
+    """Return the middle of the value range covered by a bucket."""
+    if index < _EXACT:
+        return index
+    shift = (index - _EXACT) // _SUB_BUCKETS + 1
+    lower = ((index - _EXACT) % _SUB_BUCKETS + _SUB_BUCKETS) << shift
+    return lower + (1 << shift) // 2
+
+
+class LatencyHistogram:
+    """Fixed-size log-linear histogram of durations."""
+
+    __slots__ = ("_counts", "count", "total", "max")
+
+    def __init__(self) -> None:
+        """Initialize an empty histogram."""
+        self._counts = array("Q", bytes(8 * _BUCKETS))
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def record(self, seconds: float) -> None:
+        """Add one duration."""
+        micros = min(int(seconds * 1e6), _MAX_VALUE)
+        self._counts[_bucket(micros)] += 1
+        self.count += 1
+        self.total += seconds
+        if seconds > self.max:
+            self.max = seconds
+
+    def percentile(self, percent: float) -> Optional[float]:
+        """Return the duration (seconds) below which percent of the samples fall."""
+        if not self.count:
+            return None
+        threshold = self.count * percent / 100
+        seen = 0
+        for index, count in enumerate(self._counts):
+            seen += count
+            if count and seen >= threshold:
+                return _bucket_value(index) / 1e6
+        return self.max
+
+    def as_dict(self) -> Dict[str, Any]:
+        """Return count, mean, p50/p95/p99 and max in milliseconds."""
+        def _ms(value: Optional[float]) -> Optional[float]:
+            return round(value * 1000, 3) if value is not None else None
+
+        return {
+            "count": self.count,
+            "mean_ms": _ms(self.total / self.count if self.count else None),
+            "p50_ms": _ms(self.percentile(50)),
+            "p95_ms": _ms(self.percentile(95)),
+            "p99_ms": _ms(self.percentile(99)),
+            "max_ms": _ms(self.max if self.count else None),
+        }
+
+
+class LatencyProfiler:
+    """Per-stage latency histograms of one heater.
+
+    It exists only while profiling is enabled; with profiling off the hot
+    path sees None and skips all timing.
+    """
+
+    __slots__ = ("_stages",)
+
+    def __init__(self) -> None:
+        """Initialize empty histograms."""
+        self._stages: Dict[str, LatencyHistogram] = {}
+
+    def record(self, stage: str, seconds: float) -> None:
+        """Add a duration of a stage."""
+        histogram = self._stages.get(stage)
+        if histogram is None:
+            histogram = self._stages[stage] = LatencyHistogram()
+        histogram.record(seconds)
+
+    def as_dict(self) -> Dict[str, Dict[str, Any]]:
+        """Return the histograms of all stages."""
+        return {stage: histogram.as_dict() for stage, histogram in self._stages.items()}
@@ -0,0 +1,252 @@
+"""Wire formats of the heater WebSocket and the first-byte frame dispatcher.
+
+Three formats are understood:
+
+* JSON: status frames {...} and settings frames {"settings": {...}};
+* legacy settings: CURRENT_SETTINGS:key=value,key=value;
+* compact telemetry: T1|value|value|... with the field order of COMPACT_FIELDS,
+  enabled by the FORMAT:COMPACT1 command on firmware that supports it. The
+  firmware acknowledges with the same FORMAT:COMPACT1 line; firmware that does
+  not know the command ignores it and keeps sending JSON.
+
+Firmware that accepts FORMAT:DELTA1 numbers its status frames and sends only
+changed keys: JSON frames get "seq" and "delta": 1, compact delta frames are
+D1|seq|value|... with empty fields for unchanged values; a string that became
+empty is sent as COMPACT_EMPTY (0x1F) instead. A full frame carries
+"seq" without "delta" and is sent in reply to GET_STATE. Sequence numbers
+wrap at SEQ_MODULO.
+
+RATE:<ms> asks the firmware to push status frames every <ms> milliseconds;
+firmware that supports it acknowledges with the same line.
+
+The module does not depend on Home Assistant, so the simulator can use it.
+"""
+import json
+from abc import ABC, abstractmethod
+from typing import Any, Dict, Optional, Sequence, Tuple
+
+# Виды кадров, которые возвращает диспетчер
+FRAME_STATUS = "status"
+FRAME_SETTINGS = "settings"
+FRAME_FORMAT = "format"
+FRAME_RATE = "rate"
+
+# Команды и ответы согласования форматов: компактная телеметрия и дельта-кадры
+FORMAT_PREFIX = "FORMAT:"
+COMPACT_FORMAT = "COMPACT1"
+COMPACT_COMMAND = f"{FORMAT_PREFIX}{COMPACT_FORMAT}"
+DELTA_FORMAT = "DELTA1"
+DELTA_COMMAND = f"{FORMAT_PREFIX}{DELTA_FORMAT}"
+# Запрос полного кадра состояния (с номером последовательности) для ресинхронизации
+STATE_COMMAND = "GET_STATE"
+# Запрос интервала отправки кадров статуса: RATE:<мс>
+RATE_PREFIX = "RATE:"
+
+# Служебные поля дельта-кадров, не входящие в состояние нагревателя
+SEQ_FIELD = "seq"
+DELTA_FIELD = "delta"
+SEQ_MODULO = 1 << 16
+
+COMPACT_PREFIX = "T1|"
+COMPACT_DELTA_PREFIX = "D1|"
+COMPACT_SEPARATOR = "|"
+# Управляющий символ US: не встречается в SSID и сообщениях и не обрывает строки C
+COMPACT_EMPTY = "\x1f"
+# Порядок полей компактного кадра версии 1. Строки идут последними, а SSID -
+# в самом конце, чтобы разделитель внутри SSID не сдвигал остальные поля.
+# Пустое поле означает, что значение в кадре не передано, а пустая строка
+# (message, wifi_ssid после отключения) передаётся символом COMPACT_EMPTY.
+COMPACT_FIELDS = (
+    "exhaust_temp", "fan_speed", "fuel_rate_hz", "burn_mode", "attempt",
+    "currentState", "burn", "webasto_fail", "debug_glow_plug_on",
+    "fuel_pumping_active", "logging_enabled", "wifi_status",
+    "total_fuel_consumed_liters", "fuel_consumption_per_hour",
+    "message", "wifi_ip", "wifi_ssid",
+)
+
+
+class Codec(ABC):
+    """Decoder of one wire format, selected by the first character of a frame."""
+
+    name = ""
+    first_chars = ""
+
+    @abstractmethod
+    def decode(self, message: str) -> Tuple[Optional[str], Any]:
+        """Return the frame kind and its raw (untyped) values."""
+
+
+class JsonCodec(Codec):
+    """JSON status and settings frames."""
+
+    name = "json"
+    first_chars = "{"
+
+    def decode(self, message: str) -> Tuple[Optional[str], Any]:
+        """Return the frame kind and its raw (untyped) values."""
+        data = json.loads(message)
+        if "settings" in data:
+            # Настройки приходят вложенными в объект "settings"
+            return FRAME_SETTINGS, data["settings"]
+        # Данные статуса приходят на корневом уровне
+        return FRAME_STATUS, data
+
+
+class LegacySettingsCodec(Codec):
+    """Old-style CURRENT_SETTINGS:key=value,... replies to GET_SETTINGS."""
+
+    name = "legacy"
+    first_chars = "C"
+    prefix = "CURRENT_SETTINGS:"
+
+    def decode(self, message: str) -> Tuple[Optional[str], Any]:
+        """Return the frame kind and its raw (untyped) values."""
+        if not message.startswith(self.prefix):
+            return None, None
+        values: Dict[str, Any] = {}
+        for param in message[len(self.prefix):].split(","):
+            if "=" not in param:
+                continue
+            key, value = param.split("=", 1)
+            value = value.strip()
+            # Попытка преобразовать в число
+            try:
+                values[key.strip()] = float(value) if "." in value else int(value)
+            except ValueError:
+                values[key.strip()] = value
+        return FRAME_SETTINGS, values
+
+
+class CompactCodec(Codec):
+    """Positional telemetry frames and the format acknowledgement."""
+
+    name = "compact"
+    first_chars = "TDF"
+
+    def __init__(self, fields: Sequence[str] = COMPACT_FIELDS):
+        """Initialize the codec for the given field order."""
+        self._fields = tuple(fields)
+
+    def decode(self, message: str) -> Tuple[Optional[str], Any]:
+        """Return the frame kind and its raw (untyped) values."""
+        if message.startswith(COMPACT_PREFIX):
+            return FRAME_STATUS, self._fields_of(message[len(COMPACT_PREFIX):])
+        if message.startswith(COMPACT_DELTA_PREFIX):
+            seq, _, rest = message[len(COMPACT_DELTA_PREFIX):].partition(COMPACT_SEPARATOR)
+            values = self._fields_of(rest)
+            values[SEQ_FIELD] = int(seq)
+            values[DELTA_FIELD] = True
+            return FRAME_STATUS, values
+        if message.startswith(FORMAT_PREFIX):
+            return FRAME_FORMAT, message[len(FORMAT_PREFIX):]
+        return None, None
+
+    def _fields_of(self, payload: str) -> Dict[str, Any]:
+        parts = payload.split(COMPACT_SEPARATOR, len(self._fields) - 1)
+        return {
+            key: "" if value == COMPACT_EMPTY else value
+            for key, value in zip(self._fields, parts)
+            if value != ""
+        }
+
+
+class RateAckCodec(Codec):
+    """Acknowledgement of a RATE:<ms> command."""
+
+    name = "rate"
+    first_chars = "R"
+
+    def decode(self, message: str) -> Tuple[Optional[str], Any]:
+        """Return the frame kind and the acknowledged interval in milliseconds."""
+        if not message.startswith(RATE_PREFIX):
+            return None, None
+        return FRAME_RATE, int(message[len(RATE_PREFIX):])
+
+
+def rate_command(interval: float) -> str:
+    """Return the command asking for a status frame every interval seconds."""
+    return f"{RATE_PREFIX}{round(interval * 1000)}"
+
+
+def _compact_field(value: Any) -> str:
+    if value is None:
+        return ""
+    if value == "":
+        return COMPACT_EMPTY
+    if isinstance(value, bool):
+        return "1" if value else "0"
+    return str(value)
+
+
+def encode_compact(values: Dict[str, Any], fields: Sequence[str] = COMPACT_FIELDS) -> str:
+    """Encode a status frame in the compact format (used by the simulator)."""
+    return COMPACT_PREFIX + COMPACT_SEPARATOR.join(_compact_field(values.get(key)) for key in fields)
+
+
+def encode_compact_delta(
+    seq: int, values: Dict[str, Any], fields: Sequence[str] = COMPACT_FIELDS
+) -> str:
+    """Encode changed values as a compact delta frame (used by the simulator)."""
+    return f"{COMPACT_DELTA_PREFIX}{seq}{COMPACT_SEPARATOR}" + COMPACT_SEPARATOR.join(
+        _compact_field(values.get(key)) for key in fields
+    )
+
+
+# Результаты проверки номера последовательности
+SEQ_OK = "ok"
+SEQ_GAP = "gap"  # пропущены кадры: применить и запросить полное состояние
+SEQ_STALE = "stale"  # повтор или старый кадр (например, после перезагрузки ESP): отбросить
+SEQ_UNSYNCED = "unsynced"  # дельта без полного кадра после подключения
+
+
+class SequenceTracker:
+    """Checks sequence numbers of status frames for gaps and reordering."""
+
+    __slots__ = ("_expected",)
+
+    def __init__(self) -> None:
+        """Initialize a tracker that has not seen a full frame yet."""
+        self._expected: Optional[int] = None
+
+    def reset(self) -> None:
+        """Forget the sequence, e.g. on a new connection."""
+        self._expected = None
+
+    def check(self, seq: int, delta: bool) -> str:
+        """Return SEQ_OK, SEQ_GAP, SEQ_STALE or SEQ_UNSYNCED for a frame."""
+        expected = self._expected
+        if not delta:
+            # Полный кадр задаёт новую точку отсчёта
+            self._expected = (seq + 1) % SEQ_MODULO
+            return SEQ_OK
+        if expected is None:
+            return SEQ_UNSYNCED
+        ahead = (seq - expected) % SEQ_MODULO
+        if ahead == 0:
+            self._expected = (seq + 1) % SEQ_MODULO
+            return SEQ_OK
+        if ahead < SEQ_MODULO // 2:
+            self._expected = (seq + 1) % SEQ_MODULO
+            return SEQ_GAP
+        return SEQ_STALE
+
+
+class FrameDispatcher:
+    """Picks the codec of a frame by its first character."""
+
+    def __init__(
+        self,
+        codecs: Sequence[Codec] = (JsonCodec(), LegacySettingsCodec(), CompactCodec(), RateAckCodec()),
+    ):
+        """Build the first-character dispatch table."""
+        self._codecs: Dict[str, Codec] = {
+            char: codec for codec in codecs for char in codec.first_chars
+        }
+
+    def decode(self, message: str) -> Tuple[Optional[Codec], Optional[str], Any]:
+        """Return the codec, frame kind and raw values, or kind None for unknown frames."""
+        codec = self._codecs.get(message[:1])
+        if codec is None:
+            return None, None, None
+        kind, values = codec.decode(message)
+        return codec, kind, values
@@ -0,0 +1,44 @@
+"""Telemetry push rate chosen from heater activity and dashboard viewers."""
+from typing import Any, Mapping
+
+# Режимы работы нагревателя, от которых зависит нужная частота кадров
+ACTIVITY_IDLE = "idle"
+ACTIVITY_IGNITING = "igniting"
+ACTIVITY_BURNING = "burning"
+ACTIVITY_FAULT = "fault"
+
+# Поля, по которым определяется режим; их изменение никогда не прореживается
+ACTIVITY_FIELDS = (
+    "burn", "webasto_fail", "debug_glow_plug_on", "fuel_pumping_active",
+    "currentState", "message", "logging_enabled",
+)
+
+# Интервал между кадрами (секунды): (никто не смотрит, открыта карточка).
+# Простой не дольше STALE_DEFAULT_TIMEOUT/3, чтобы watchdog не срабатывал
+# до того, как выучит новый интервал.
+PUSH_INTERVALS = {
+    ACTIVITY_IGNITING: (0.5, 0.5),
+    ACTIVITY_BURNING: (2.0, 1.0),
+    ACTIVITY_FAULT: (5.0, 1.0),
+    ACTIVITY_IDLE: (10.0, 1.0),
+}
+
+
+def heater_activity(state: Mapping[str, Any]) -> str:
+    """Return the activity of the heater from its snapshot."""
+    if state.get("webasto_fail"):
+        return ACTIVITY_FAULT
+    if state.get("fuel_pumping_active"):
+        # Прокачка топлива - пользователь рядом и следит за процессом
+        return ACTIVITY_IGNITING
+    if state.get("burn"):
+        if state.get("debug_glow_plug_on"):
+            return ACTIVITY_IGNITING
+        return ACTIVITY_BURNING
+    return ACTIVITY_IDLE
+
+
+def push_interval(activity: str, watched: bool) -> float:
+    """Return the frame interval (seconds) for an activity."""
+    idle, viewed = PUSH_INTERVALS[activity]
+    return viewed if watched else idle
@@ -0,0 +1,187 @@
+"""Declarative field schema and frame decoder for the Webasto heater protocol."""
+import logging
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+_LOGGER = logging.getLogger(__name__)
+
+# Допустимые пределы настроек (используются для ограничения значений и в number.py)
+SETTING_LIMITS: Dict[str, Tuple[float, float]] = {
+    "pump_size": (10, 100),
+    "heater_target": (150, 250),
+    "heater_min": (140, 240),
+    "heater_overheat": (200, 300),
+    "heater_warning": (180, 280),
+    "max_pwm_fan": (0, 255),
+    "glow_brightness": (0, 255),
+    "glow_fade_in_duration": (0, 60000),
+    "glow_fade_out_duration": (0, 60000),
+}
+
+CURRENT_STATE_MAPPING = {
+    0: "HIGH",
+    1: "MID",
+    2: "LOW",
+}
+
+
+class FieldSpec:
+    """Description of a single field sent by the ESP8266."""
+
+    __slots__ = ("key", "kind", "clamp")
+
+    def __init__(self, key: str, kind: str, clamp: Optional[Tuple[float, float]] = None):
+        """Initialize the field description."""
+        self.key = key
+        self.kind = kind
+        self.clamp = clamp
+
+
+class DerivedSpec:
+    """Description of a value computed from another field."""
+
+    __slots__ = ("key", "source", "func")
+
+    def __init__(self, key: str, source: str, func: Callable[[Any], Any]):
+        """Initialize the derived field description."""
+        self.key = key
+        self.source = source
+        self.func = func
+
+
+# Поля статуса, которые ESP8266 присылает в каждом кадре
+TELEMETRY_SCHEMA = (
+    FieldSpec("exhaust_temp", "number"),
+    FieldSpec("fan_speed", "number"),
+    FieldSpec("fuel_rate_hz", "number"),
+    FieldSpec("burn_mode", "number"),
+    FieldSpec("attempt", "int"),
+    FieldSpec("message", "str"),
+    FieldSpec("currentState", "int"),
+    FieldSpec("burn", "bool"),
+    FieldSpec("webasto_fail", "bool"),
+    FieldSpec("debug_glow_plug_on", "bool"),
+    FieldSpec("fuel_pumping_active", "bool"),
+    FieldSpec("logging_enabled", "bool"),
+    FieldSpec("wifi_ssid", "str"),
+    FieldSpec("wifi_ip", "str"),
+    FieldSpec("wifi_status", "int"),
+    FieldSpec("total_fuel_consumed_liters", "number"),
+    FieldSpec("fuel_consumption_per_hour", "number"),
+)
+
+# Поля настроек, приходящие в объекте "settings" или в CURRENT_SETTINGS
+SETTINGS_SCHEMA = tuple(
+    FieldSpec(key, "float", clamp=limits) for key, limits in SETTING_LIMITS.items()
+)
+
+# Значения, вычисляемые из полей ESP (currentState -> current_state_text и т.д.).
+# Функция вызывается и с None, пока поле ещё не приходило (см. FrameDecoder.defaults),
+# поэтому неизвестный или отсутствующий режим показывается как "Неизвестно"
+DERIVED_SCHEMA = (
+    DerivedSpec(
+        "current_state_text", "currentState",
+        lambda value: CURRENT_STATE_MAPPING.get(value, "Неизвестно"),
+    ),
+    DerivedSpec(
+        "wifi_status_text", "wifi_status",
+        lambda value: "Подключено" if value == 3 else "Настройка AP",
+    ),
+    DerivedSpec("wifi_connected_status", "wifi_status", lambda value: value == 3),
+)
+
+# Счётчики, которые ведёт сама интеграция (см. totals.py)
+TOTALS_FIELDS = ("fuel_total_liters", "device_fuel_total_liters", "burn_hours", "start_count")
+
+TELEMETRY_FIELDS = tuple(spec.key for spec in TELEMETRY_SCHEMA)
+SETTINGS_FIELDS = tuple(spec.key for spec in SETTINGS_SCHEMA)
+DERIVED_FIELDS = tuple(spec.key for spec in DERIVED_SCHEMA)
+KNOWN_FIELDS = TELEMETRY_FIELDS + SETTINGS_FIELDS + DERIVED_FIELDS + TOTALS_FIELDS
+
+# Поля, которые сохраняются между перезапусками HA и показываются до первого кадра.
+# Быстро меняющаяся телеметрия (температура, вентилятор, расход) не сохраняется.
+RESTORE_FIELDS = SETTINGS_FIELDS + (
+    "burn", "webasto_fail", "currentState", "message", "burn_mode", "logging_enabled",
+    "wifi_ssid", "wifi_ip", "wifi_status", "total_fuel_consumed_liters",
+)
+
+
+def _to_number(value: Any) -> Any:
+    """Keep ints and floats as they are, parse anything else as float."""
+    if value.__class__ is int or value.__class__ is float:
+        return value
+    return float(value)
+
+
+def _to_int(value: Any) -> int:
+    if value.__class__ is int:
+        return value
+    return int(float(value))
+
+
+def _to_bool(value: Any) -> bool:
+    if isinstance(value, str):
+        # Обработка строковых значений
+        return value.lower() in ("true", "1", "on", "yes")
+    return bool(value)
+
+
+_CONVERTERS: Dict[str, Callable[[Any], Any]] = {
+    "number": _to_number,
+    "int": _to_int,
+    "float": float,
+    "bool": _to_bool,
+    "str": str,
+}
+
+
+def _compile_field(spec: FieldSpec) -> Callable[[Any], Any]:
+    """Build the converter callable for a field."""
+    convert = _CONVERTERS[spec.kind]
+    if spec.clamp is None:
+        return convert
+    low, high = spec.clamp
+
+    def convert_and_clamp(value: Any) -> Any:
+        return max(low, min(high, convert(value)))
+
+    return convert_and_clamp
+
+
+class FrameDecoder:
+    """Converts raw frame values to typed values using a compiled schema."""
+
+    def __init__(self, fields=TELEMETRY_SCHEMA + SETTINGS_SCHEMA, derived=DERIVED_SCHEMA):
+        """Compile converters for the given schema."""
+        self._converters: Dict[str, Callable[[Any], Any]] = {
+            spec.key: _compile_field(spec) for spec in fields
+        }
+        self._derived: Dict[str, List[Tuple[str, Callable[[Any], Any]]]] = {}
+        for spec in derived:
+            self._derived.setdefault(spec.source, []).append((spec.key, spec.func))
+
+    def defaults(self) -> Dict[str, Any]:
+        """Return the derived fields for sources that have not been received yet."""
+        return {
+            derived_key: func(None)
+            for funcs in self._derived.values()
+            for derived_key, func in funcs
+        }
+
+    def decode(self, values: Dict[str, Any]) -> Dict[str, Any]:
+        """Return typed values, including derived fields, for one frame."""
+        converters = self._converters
+        derived = self._derived
+        result: Dict[str, Any] = {}
+        for key, value in values.items():
+            converter = converters.get(key)
+            if converter is not None and value is not None:
+                try:
+                    value = converter(value)
+                except (ValueError, TypeError) as err:
+                    _LOGGER.warning("Invalid value for %s: %s (error: %s)", key, value, err)
+                    value = None
+            result[key] = value
+            if key in derived:
+                for derived_key, func in derived[key]:
+                    result[derived_key] = func(value)
+        return result
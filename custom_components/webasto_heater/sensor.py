@@ -1,18 +1,65 @@
 """Platform for sensor integration."""
 import logging
-from typing import List, Any, Dict
+import time
+from datetime import timedelta
+from typing import List, Any, Dict, Callable, Mapping, Optional
 
 from homeassistant.components.sensor import SensorEntity, SensorDeviceClass, SensorStateClass
-from homeassistant.core import HomeAssistant
-from homeassistant.helpers.entity import DeviceInfo, EntityCategory
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.entity import EntityCategory
 from homeassistant.config_entries import ConfigEntry
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
-from homeassistant.const import UnitOfTemperature, PERCENTAGE, UnitOfFrequency, UnitOfVolume, UnitOfTime
+from homeassistant.helpers.event import async_call_later, async_track_time_interval
+from homeassistant.const import (
+    UnitOfTemperature,
+    PERCENTAGE,
+    UnitOfFrequency,
+    UnitOfVolume,
+    UnitOfTime,
+    UnitOfInformation,
+)
 
-from . import DOMAIN, WebastoHeaterData
+from . import (
+    CONF_SENSOR_THROTTLE,
+    CONF_STATISTICS_ONLY,
+    CONF_STATISTICS_WINDOWS,
+    DEFAULT_STATISTICS_WINDOWS,
+    DOMAIN,
+    WebastoHeaterData,
+)
+from .history import AGGREGATE_STATS, HISTORY_ATTRIBUTES, TimeWeightedWindow
 
 _LOGGER = logging.getLogger(__name__)
 
+# Ключи, изменение которых записывается сразу всеми сенсорами с ограничением частоты
+PASSTHROUGH_KEYS = ("burn", "webasto_fail")
+
+AGGREGATE_NAMES = {"mean": "среднее", "min": "минимум", "max": "максимум"}
+
+# Диагностические счётчики работы интеграции (WebastoHeaterData.metrics_data):
+# ключ, имя, единица, класс устройства, класс состояния, иконка
+METRIC_SENSORS = (
+    ("frames", "Кадров получено", None, None, SensorStateClass.TOTAL_INCREASING, "mdi:counter"),
+    ("bytes", "Байт получено", UnitOfInformation.BYTES, SensorDeviceClass.DATA_SIZE,
+     SensorStateClass.TOTAL_INCREASING, "mdi:download-network"),
+    ("json_frames", "Кадров JSON", None, None, SensorStateClass.TOTAL_INCREASING, "mdi:code-json"),
+    ("legacy_frames", "Кадров CURRENT_SETTINGS", None, None, SensorStateClass.TOTAL_INCREASING, "mdi:text"),
+    ("compact_frames", "Компактных кадров", None, None, SensorStateClass.TOTAL_INCREASING, "mdi:arrow-collapse"),
+    ("decode_errors", "Ошибок разбора", None, None, SensorStateClass.TOTAL_INCREASING, "mdi:alert-circle-outline"),
+    ("sequence_gaps", "Пропусков дельта-кадров", None, None, SensorStateClass.TOTAL_INCREASING, "mdi:link-variant-off"),
+    ("resyncs", "Запросов полного состояния", None, None, SensorStateClass.TOTAL_INCREASING, "mdi:sync"),
+    ("decimated_frames", "Прорежено кадров", None, None, SensorStateClass.TOTAL_INCREASING, "mdi:filter-outline"),
+    ("mean_decode_time", "Среднее время разбора кадра", UnitOfTime.MILLISECONDS, SensorDeviceClass.DURATION,
+     SensorStateClass.MEASUREMENT, "mdi:timer-outline"),
+    ("listener_calls", "Вызовов обработчиков сущностей", None, None,
+     SensorStateClass.TOTAL_INCREASING, "mdi:call-split"),
+    ("total_state_writes", "Записей состояний", None, None, SensorStateClass.TOTAL_INCREASING, "mdi:database-edit"),
+    ("commands_sent", "Команд отправлено", None, None, SensorStateClass.TOTAL_INCREASING, "mdi:send"),
+    ("reconnects", "Переподключений", None, None, SensorStateClass.TOTAL_INCREASING, "mdi:connection"),
+    ("connected_time", "Время в сети", UnitOfTime.SECONDS, SensorDeviceClass.DURATION,
+     SensorStateClass.TOTAL_INCREASING, "mdi:timer-check-outline"),
+)
+
 async def async_setup_entry(
     hass: HomeAssistant,
     config_entry: ConfigEntry,
@@ -20,35 +67,41 @@ async def async_setup_entry(
 ) -> None:
     """Set up Webasto Heater sensor platform."""
     webasto_data: WebastoHeaterData = hass.data[DOMAIN][config_entry.entry_id]
+    options = config_entry.options
 
-    # Добавляем сенсоры
+    # Добавляем сенсоры. Для телеметрии с высокой частотой заданы политики записи
+    # (минимальный интервал, дедбенд и heartbeat), чтобы не раздувать базу recorder;
+    # их можно переопределить в параметрах интеграции (THROTTLE_DEFAULTS).
     sensors: List[WebastoHeaterSensor] = [
-        WebastoHeaterSensor(
+        WebastoHeaterThrottledSensor(
             webasto_data, 
             "exhaust_temp", 
             "Температура выхлопа", 
             UnitOfTemperature.CELSIUS, 
             "mdi:thermometer", 
             SensorDeviceClass.TEMPERATURE,
-            SensorStateClass.MEASUREMENT
+            SensorStateClass.MEASUREMENT,
+            throttle=_throttle(options, "exhaust_temp")
         ),
-        WebastoHeaterSensor(
+        WebastoHeaterThrottledSensor(
             webasto_data, 
             "fan_speed", 
             "Скорость вентилятора", 
             PERCENTAGE, 
             "mdi:fan", 
             None,
-            SensorStateClass.MEASUREMENT
+            SensorStateClass.MEASUREMENT,
+            throttle=_throttle(options, "fan_speed")
         ),
-        WebastoHeaterSensor(
+        WebastoHeaterThrottledSensor(
             webasto_data, 
             "fuel_rate_hz", 
             "Расход топлива (Гц)", 
             UnitOfFrequency.HERTZ, 
             "mdi:fuel", 
             SensorDeviceClass.FREQUENCY,
-            SensorStateClass.MEASUREMENT
+            SensorStateClass.MEASUREMENT,
+            throttle=_throttle(options, "fuel_rate_hz")
         ),
         WebastoHeaterSensor(
             webasto_data, 
@@ -106,14 +159,55 @@ async def async_setup_entry(
             SensorDeviceClass.VOLUME,
             SensorStateClass.TOTAL_INCREASING
         ),
-        WebastoHeaterSensor(
+        WebastoHeaterThrottledSensor(
             webasto_data, 
             "fuel_consumption_per_hour", 
             "Расчетный расход за час", 
             f"{UnitOfVolume.LITERS}/{UnitOfTime.HOURS}", 
             "mdi:fuel", 
             None,
-            SensorStateClass.MEASUREMENT
+            SensorStateClass.MEASUREMENT,
+            throttle=_throttle(options, "fuel_consumption_per_hour")
+        ),
+        # Счётчики, которые ведёт интеграция: не сбрасываются вместе со счётчиком ESP
+        WebastoHeaterThrottledSensor(
+            webasto_data,
+            "fuel_total_liters",
+            "Топливо всего (расчёт HA)",
+            UnitOfVolume.LITERS,
+            "mdi:fuel",
+            SensorDeviceClass.VOLUME,
+            SensorStateClass.TOTAL_INCREASING,
+            throttle=_throttle(options, "fuel_total_liters")
+        ),
+        WebastoHeaterThrottledSensor(
+            webasto_data,
+            "device_fuel_total_liters",
+            "Топливо всего (по счётчику ESP)",
+            UnitOfVolume.LITERS,
+            "mdi:fuel",
+            SensorDeviceClass.VOLUME,
+            SensorStateClass.TOTAL_INCREASING,
+            throttle=_throttle(options, "device_fuel_total_liters")
+        ),
+        WebastoHeaterThrottledSensor(
+            webasto_data,
+            "burn_hours",
+            "Моточасы горения",
+            UnitOfTime.HOURS,
+            "mdi:timer-outline",
+            SensorDeviceClass.DURATION,
+            SensorStateClass.TOTAL_INCREASING,
+            throttle=_throttle(options, "burn_hours")
+        ),
+        WebastoHeaterSensor(
+            webasto_data,
+            "start_count",
+            "Количество запусков",
+            None,
+            "mdi:counter",
+            None,
+            SensorStateClass.TOTAL_INCREASING
         ),
         WebastoHeaterSensor(
             webasto_data, 
@@ -125,11 +219,38 @@ async def async_setup_entry(
             None
         ),
     ]
+
+    if options.get(CONF_STATISTICS_ONLY, False):
+        windows = sorted(
+            int(window) for window in options.get(CONF_STATISTICS_WINDOWS, DEFAULT_STATISTICS_WINDOWS)
+        )
+        telemetry = [
+            sensor for sensor in sensors
+            if isinstance(sensor, WebastoHeaterThrottledSensor)
+            and sensor.state_class == SensorStateClass.MEASUREMENT
+        ]
+        for raw in telemetry:
+            # Сырые сенсоры остаются, но новые установки создают их отключёнными
+            raw._attr_entity_registry_enabled_default = False
+            sensors.extend(
+                WebastoHeaterAggregateSensor(webasto_data, raw, stat, window)
+                for window in windows
+                for stat in AGGREGATE_STATS
+            )
+
+    sensors.extend(
+        WebastoHeaterMetricSensor(webasto_data, *description) for description in METRIC_SENSORS
+    )
+
     async_add_entities(sensors)
 
 class WebastoHeaterSensor(SensorEntity):
     """Representation of a Webasto Heater Sensor."""
 
+    # Скользящая статистика меняется с каждым кадром - в recorder её не пишем,
+    # как и признак значения из сохранённого снимка
+    _unrecorded_attributes = frozenset(HISTORY_ATTRIBUTES + ("restored",))
+
     def __init__(
         self, 
         webasto_data: WebastoHeaterData, 
@@ -146,7 +267,7 @@ class WebastoHeaterSensor(SensorEntity):
         self._key = key
         
         self._attr_name = f"Webasto {name}"
-        self._attr_unique_id = f"webasto_{key}"
+        self._attr_unique_id = webasto_data.unique_id(key)
         self._attr_native_unit_of_measurement = unit
         self._attr_icon = icon
         self._attr_device_class = device_class
@@ -154,62 +275,350 @@ class WebastoHeaterSensor(SensorEntity):
         self._attr_entity_category = entity_category
         self._attr_native_value = None
         self._attr_available = True
+        # Состояние обновляется по push от WebSocket, опрос не нужен
+        self._attr_should_poll = False
+        # Поколение снимка данных, которое уже отражено в состоянии сущности
+        self._generation = -1
 
-        self._attr_device_info = DeviceInfo(
-            identifiers={(DOMAIN, "webasto_heater_main")},
-            name="Webasto Heater",
-            manufacturer="Custom",
-            model="ESP8266 Webasto",
-        )
+        self._attr_device_info = webasto_data.device_info
 
     @property
     def available(self) -> bool:
         """Return if entity is available."""
-        return self._webasto_data.is_connected
+        # Недоступна и при потере соединения, и когда watchdog счёл данные устаревшими
+        return self._webasto_data.available
+
+    @property
+    def extra_state_attributes(self) -> Optional[Dict[str, Any]]:
+        """Return rolling statistics over the short-term history, if tracked."""
+        attributes: Dict[str, Any] = {}
+        if self._webasto_data.is_restored:
+            # Значение загружено из сохранённого снимка и ещё не подтверждено устройством
+            attributes["restored"] = True
+        stats = self._webasto_data.history_stats(self._key)
+        if stats is not None:
+            attributes.update(
+                (key, round(value, 3) if isinstance(value, float) else value)
+                for key, value in stats.items()
+            )
+        return attributes or None
 
     async def async_added_to_hass(self) -> None:
         """Register callbacks when entity is added."""
-        self._webasto_data.add_listener(self._handle_data_update)
-        await self._handle_data_update()
+        self._webasto_data.add_listener(self._handle_data_update, (self._key,))
+        self._handle_data_update()
 
     async def async_will_remove_from_hass(self) -> None:
         """Unregister callbacks when entity is removed."""
         self._webasto_data.remove_listener(self._handle_data_update)
 
-    async def _handle_data_update(self):
+    @callback
+    def _handle_data_update(self) -> None:
         """Handle data update from the WebSocket."""
         data = self._webasto_data.data
-        
-        if self._key == "current_state_text":
-            # Преобразуем числовой currentState в текстовое значение
-            state_value = data.get("currentState")
-            state_mapping = {
-                0: "HIGH",
-                1: "MID", 
-                2: "LOW"
-            }
-            self._attr_native_value = state_mapping.get(state_value, "Неизвестно")
-            
-        elif self._key == "wifi_status_text":
-            # Преобразуем числовой wifi_status в текстовое значение
-            status_value = data.get("wifi_status")
-            if status_value == 3:
-                self._attr_native_value = "Подключено"
-            else:
-                self._attr_native_value = "Настройка AP"
-                
+        if data.generation == self._generation:
+            return
+        self._generation = data.generation
+
+        self._attr_native_value = self._compute_value(data)
+        self._webasto_data.async_write_entity_state(self, self._key)
+
+    def _compute_value(self, data) -> Any:
+        """Return the native value of the sensor from the data snapshot."""
+        # Значения уже приведены к нужному типу декодером кадров, включая
+        # производные поля (current_state_text, wifi_status_text)
+        return data.get(self._key)
+
+
+class SensorThrottle:
+    """Write policy for a high-rate telemetry sensor.
+
+    A new value is written when it differs from the last written one by at
+    least the absolute or relative deadband, but not more often than
+    min_interval seconds. Suppressed changes are flushed at least every
+    heartbeat seconds.
+    """
+
+    __slots__ = ("min_interval", "abs_deadband", "rel_deadband", "heartbeat")
+
+    def __init__(
+        self,
+        min_interval: float = 0.0,
+        abs_deadband: float = 0.0,
+        rel_deadband: float = 0.0,
+        heartbeat: float = 300.0,
+    ):
+        """Initialize the throttle policy."""
+        self.min_interval = min_interval
+        self.abs_deadband = abs_deadband
+        self.rel_deadband = rel_deadband
+        self.heartbeat = heartbeat
+
+    def is_significant(self, old: Any, new: Any) -> bool:
+        """Return True if the change from old to new exceeds the deadband."""
+        if not isinstance(old, (int, float)) or not isinstance(new, (int, float)):
+            return old != new
+        delta = abs(new - old)
+        if delta == 0:
+            return False
+        if self.abs_deadband and delta >= self.abs_deadband:
+            return True
+        if self.rel_deadband and delta >= self.rel_deadband * abs(old):
+            return True
+        return not self.abs_deadband and not self.rel_deadband
+
+    def as_dict(self) -> Dict[str, float]:
+        """Return the policy parameters."""
+        return {name: getattr(self, name) for name in self.__slots__}
+
+    def updated(self, overrides: Optional[Mapping[str, float]]) -> "SensorThrottle":
+        """Return a copy of the policy with the given parameters replaced."""
+        if not overrides:
+            return self
+        return SensorThrottle(**{**self.as_dict(), **overrides})
+
+
+# Политики записи по умолчанию; параметры интеграции (CONF_SENSOR_THROTTLE)
+# переопределяют их для отдельных сенсоров
+THROTTLE_DEFAULTS: Dict[str, SensorThrottle] = {
+    "exhaust_temp": SensorThrottle(min_interval=5, abs_deadband=1.0, heartbeat=300),
+    "fan_speed": SensorThrottle(min_interval=5, abs_deadband=2, heartbeat=300),
+    "fuel_rate_hz": SensorThrottle(min_interval=5, abs_deadband=0.1, rel_deadband=0.05, heartbeat=300),
+    "fuel_consumption_per_hour": SensorThrottle(min_interval=10, rel_deadband=0.05, heartbeat=300),
+    "fuel_total_liters": SensorThrottle(min_interval=60, abs_deadband=0.01, heartbeat=600),
+    "device_fuel_total_liters": SensorThrottle(min_interval=60, abs_deadband=0.01, heartbeat=600),
+    "burn_hours": SensorThrottle(min_interval=60, abs_deadband=0.01, heartbeat=600),
+}
+
+
+def _throttle(options: Mapping[str, Any], key: str) -> SensorThrottle:
+    """Return the write policy of a sensor with the options applied."""
+    return THROTTLE_DEFAULTS[key].updated(options.get(CONF_SENSOR_THROTTLE, {}).get(key))
+
+
+class WebastoHeaterThrottledSensor(WebastoHeaterSensor):
+    """Webasto telemetry sensor with rate limiting and a significant-change deadband."""
+
+    def __init__(self, *args, throttle: SensorThrottle, **kwargs):
+        """Initialize the throttled sensor."""
+        super().__init__(*args, **kwargs)
+        self._throttle = throttle
+        self._last_write = 0.0
+        self._written_available: Optional[bool] = None
+        self._written_restored: Optional[bool] = None
+        self._written_transitions: tuple = ()
+        self._pending_value: Any = None
+        self._unsub_flush: Optional[Callable[[], None]] = None
+        # Момент (time.monotonic) запланированной отложенной записи
+        self._flush_deadline = 0.0
+
+    async def async_added_to_hass(self) -> None:
+        """Register callbacks when entity is added."""
+        # Переходы состояния горения и ошибки пропускаются сразу, без дедбенда
+        self._webasto_data.add_listener(
+            self._handle_data_update, (self._key,) + PASSTHROUGH_KEYS
+        )
+        self._handle_data_update()
+
+    async def async_will_remove_from_hass(self) -> None:
+        """Unregister callbacks when entity is removed."""
+        await super().async_will_remove_from_hass()
+        self._cancel_flush()
+
+    @callback
+    def _handle_data_update(self) -> None:
+        """Handle data update from the WebSocket, applying the write policy."""
+        data = self._webasto_data.data
+        if data.generation == self._generation:
+            return
+        self._generation = data.generation
+
+        value = self._compute_value(data)
+        available = self.available
+        transitions = tuple(data.get(key) for key in PASSTHROUGH_KEYS)
+        now = time.monotonic()
+
+        if (
+            available != self._written_available
+            or self._webasto_data.is_restored != self._written_restored
+            or transitions != self._written_transitions
+            or self._attr_native_value is None
+            or value is None
+        ):
+            self._write(value, now)
+            return
+
+        self._pending_value = value
+        throttle = self._throttle
+        if throttle.is_significant(self._attr_native_value, value):
+            delay = self._last_write + throttle.min_interval - now
+        else:
+            # Незначительное изменение записываем не реже, чем раз в heartbeat
+            delay = self._last_write + throttle.heartbeat - now
+
+        if delay <= 0:
+            self._write(value, now)
         else:
-            # Для всех остальных сенсоров используем значения напрямую
-            raw_value = data.get(self._key)
-            
-            if raw_value is not None:
-                # Преобразуем числовые значения
-                if isinstance(raw_value, (int, float)):
-                    self._attr_native_value = raw_value
-                else:
-                    # Для строковых значений
-                    self._attr_native_value = str(raw_value)
-            else:
-                self._attr_native_value = None
-
-        self.async_write_ha_state()
\ No newline at end of file
+            self._schedule_flush(now, delay)
+
+    @callback
+    def _write(self, value: Any, now: float) -> None:
+        """Write the value to the state machine right away."""
+        self._cancel_flush()
+        data = self._webasto_data.data
+        self._attr_native_value = value
+        self._pending_value = value
+        self._last_write = now
+        self._written_available = self.available
+        self._written_restored = self._webasto_data.is_restored
+        self._written_transitions = tuple(data.get(key) for key in PASSTHROUGH_KEYS)
+        self._webasto_data.async_write_entity_state(self, self._key)
+
+    @callback
+    def _schedule_flush(self, now: float, delay: float) -> None:
+        """Schedule a deferred write of the pending value, keeping the earliest deadline."""
+        deadline = now + delay
+        if self._unsub_flush is not None:
+            if self._flush_deadline <= deadline:
+                # Запись уже запланирована не позже, она возьмёт последнее значение
+                return
+            # Значимое изменение после незначительного: не ждём heartbeat
+            self._cancel_flush()
+        self._flush_deadline = deadline
+        self._unsub_flush = async_call_later(self.hass, delay, self._async_flush)
+
+    @callback
+    def _async_flush(self, _now) -> None:
+        """Write the pending value once the throttle interval has elapsed."""
+        self._unsub_flush = None
+        if self._pending_value != self._attr_native_value:
+            self._write(self._pending_value, time.monotonic())
+
+    @callback
+    def _cancel_flush(self) -> None:
+        """Cancel a scheduled deferred write."""
+        if self._unsub_flush is not None:
+            self._unsub_flush()
+            self._unsub_flush = None
+
+
+class WebastoHeaterAggregateSensor(SensorEntity):
+    """Mean, min or max of a telemetry sensor over a fixed window.
+
+    Written once per window, so the recorder gets a bounded number of rows
+    while long-term statistics are still fed through the measurement state class.
+    """
+
+    def __init__(
+        self,
+        webasto_data: WebastoHeaterData,
+        raw: WebastoHeaterSensor,
+        stat: str,
+        window: int,
+    ):
+        """Initialize the aggregate of the raw sensor."""
+        self._webasto_data = webasto_data
+        self._key = raw._key
+        self._stat = stat
+        self._window_length = window
+        self._window: Optional[TimeWeightedWindow] = None
+
+        label = f"{window // 60} мин" if window % 60 == 0 else f"{window} с"
+        self._attr_name = f"{raw.name} ({AGGREGATE_NAMES[stat]} {label})"
+        self._attr_unique_id = webasto_data.unique_id(f"{self._key}_{stat}_{window}")
+        self._attr_native_unit_of_measurement = raw.native_unit_of_measurement
+        self._attr_icon = raw.icon
+        self._attr_device_class = raw.device_class
+        self._attr_state_class = SensorStateClass.MEASUREMENT
+        self._attr_native_value = None
+        self._attr_should_poll = False
+
+        self._attr_device_info = webasto_data.device_info
+
+    @property
+    def available(self) -> bool:
+        """Return if entity is available."""
+        # Агрегат относится к прошедшему окну и остаётся доступным при потере связи
+        return self._attr_native_value is not None
+
+    def _current_value(self) -> Optional[float]:
+        if not self._webasto_data.available:
+            return None
+        value = self._webasto_data.data.get(self._key)
+        return float(value) if isinstance(value, (int, float)) else None
+
+    async def async_added_to_hass(self) -> None:
+        """Start aggregating when entity is added."""
+        self._window = TimeWeightedWindow(time.monotonic(), self._current_value())
+        self._webasto_data.add_listener(self._handle_data_update, (self._key,))
+        self.async_on_remove(
+            async_track_time_interval(
+                self.hass, self._async_publish, timedelta(seconds=self._window_length)
+            )
+        )
+
+    async def async_will_remove_from_hass(self) -> None:
+        """Unregister callbacks when entity is removed."""
+        self._webasto_data.remove_listener(self._handle_data_update)
+
+    @callback
+    def _handle_data_update(self) -> None:
+        """Record a change of the value (or of availability) in the current window."""
+        self._window.update(time.monotonic(), self._current_value())
+
+    @callback
+    def _async_publish(self, _now) -> None:
+        """Write the aggregate of the finished window and start a new one."""
+        now = time.monotonic()
+        result = self._window.result(now)
+        self._window.reset(now)
+        value = round(result[self._stat], 2) if result is not None else None
+        if value is None and self._attr_native_value is None:
+            return
+        self._attr_native_value = value
+        self._webasto_data.async_write_entity_state(self, f"{self._key}_{self._stat}_{self._window_length}")
+
+
+class WebastoHeaterMetricSensor(SensorEntity):
+    """Diagnostic counter of the work done by the integration.
+
+    Counters change with every frame, so the sensor is polled instead of
+    pushed, and it is disabled by default.
+    """
+
+    def __init__(
+        self,
+        webasto_data: WebastoHeaterData,
+        key: str,
+        name: str,
+        unit: Optional[str],
+        device_class: Optional[SensorDeviceClass],
+        state_class: SensorStateClass,
+        icon: str,
+    ):
+        """Initialize the metric sensor."""
+        self._webasto_data = webasto_data
+        self._key = key
+        self._attr_name = f"Webasto {name}"
+        self._attr_unique_id = webasto_data.unique_id(f"metric_{key}")
+        self._attr_native_unit_of_measurement = unit
+        self._attr_device_class = device_class
+        self._attr_state_class = state_class
+        self._attr_icon = icon
+        self._attr_entity_category = EntityCategory.DIAGNOSTIC
+        self._attr_entity_registry_enabled_default = False
+        self._attr_should_poll = True
+
+        self._attr_device_info = webasto_data.device_info
+
+    async def async_update(self) -> None:
+        """Read the current value of the counter."""
+        value = self._webasto_data.metrics_data[self._key]
+        if self._key == "mean_decode_time":
+            value = round(value * 1000, 3)
+        elif self._key == "connected_time":
+            value = round(value)
+        self._attr_native_value = value
+        if self._key == "total_state_writes":
+            # Разбивка по сущностям показывает, какая из них пишет чаще всего
+            self._attr_extra_state_attributes = dict(self._webasto_data.metrics.state_writes)
@@ -0,0 +1,133 @@
+"""Dirty-tracked store of the heater settings."""
+from typing import Any, Dict, Iterable, Optional, Set, Tuple
+
+from .schema import SETTINGS_FIELDS
+
+# Сколько ждать, пока устройство подтвердит сохранённую настройку, прежде чем откатить её
+SETTING_CONFIRM_TIMEOUT = 10.0
+
+
+class SettingsStore:
+    """Tracks settings edited in HA against the last device-confirmed payload.
+
+    An edit is pending until the device echoes it in a settings payload. Pending
+    values survive unrelated settings frames, so the UI keeps showing them. Once
+    sent, a pending value that is not confirmed within the timeout is rolled back
+    to the confirmed value, or to the value shown before the edit if the device
+    has not sent the setting yet (e.g. right after a snapshot restore).
+    """
+
+    def __init__(self, confirm_timeout: float = SETTING_CONFIRM_TIMEOUT) -> None:
+        """Initialize an empty store."""
+        self._confirm_timeout = confirm_timeout
+        self._confirmed: Dict[str, Any] = {}
+        self._pending: Dict[str, Any] = {}
+        # Значение, показанное до правки, пока устройство не прислало своё
+        self._previous: Dict[str, Any] = {}
+        # Ключ -> момент (time.monotonic) отправки SET: с этим значением
+        self._sent: Dict[str, float] = {}
+        self._refreshed: Set[str] = set()
+
+    @property
+    def confirmed(self) -> Dict[str, Any]:
+        """Return the last settings payload confirmed by the device."""
+        return dict(self._confirmed)
+
+    @property
+    def dirty(self) -> Dict[str, Any]:
+        """Return settings changed locally and not yet sent to the device."""
+        return {
+            key: value for key, value in self._pending.items() if key not in self._sent
+        }
+
+    @property
+    def pending(self) -> Dict[str, Any]:
+        """Return all settings waiting for device confirmation."""
+        return dict(self._pending)
+
+    def is_pending(self, key: str) -> bool:
+        """Return True if the setting waits for device confirmation."""
+        return key in self._pending
+
+    def confirm(self, values: Dict[str, Any]) -> Tuple[Dict[str, Any], Set[str]]:
+        """Record a settings payload received from the device.
+
+        Returns the values to apply (pending edits override the payload) and
+        the keys whose pending edit has just been confirmed.
+        """
+        confirmed: Set[str] = set()
+        for key in SETTINGS_FIELDS:
+            if key not in values:
+                continue
+            value = values[key]
+            self._confirmed[key] = value
+            self._previous.pop(key, None)
+            if key not in self._pending:
+                continue
+            if self._pending[key] == value:
+                del self._pending[key]
+                self._sent.pop(key, None)
+                self._refreshed.discard(key)
+                confirmed.add(key)
+            else:
+                # Ещё не подтверждено - продолжаем показывать ожидаемое значение
+                values = {**values, key: self._pending[key]}
+        return values, confirmed
+
+    def set(self, key: str, value: Any, previous: Any = None) -> None:
+        """Record a local edit of a setting; previous is the value shown before it."""
+        self._sent.pop(key, None)
+        self._refreshed.discard(key)
+        if key in self._confirmed and self._confirmed[key] == value:
+            # Вернули значение устройства - сохранять нечего
+            self._pending.pop(key, None)
+            return
+        if key not in self._confirmed and key not in self._pending:
+            self._previous[key] = previous
+        self._pending[key] = value
+
+    def build_command(self) -> Optional[str]:
+        """Return a SET: command with only the unsent settings, or None."""
+        dirty = self.dirty
+        if not dirty:
+            return None
+        # ESP ожидает целые числа
+        return "SET:" + ",".join(f"{key}={int(value)}" for key, value in dirty.items())
+
+    def mark_sent(self, keys: Iterable[str], now: float) -> None:
+        """Start the confirmation timeout for settings sent to the device."""
+        for key in keys:
+            self._sent[key] = now
+
+    def mark_unsent(self, keys: Iterable[str]) -> None:
+        """Return settings whose SET: was not delivered to the dirty state."""
+        for key in keys:
+            self._sent.pop(key, None)
+
+    def needs_refresh(self, now: float) -> bool:
+        """Return True once per send if half the timeout passed without an echo."""
+        waiting = {
+            key for key, sent in self._sent.items()
+            if now - sent > self._confirm_timeout / 2 and key not in self._refreshed
+        }
+        self._refreshed |= waiting
+        return bool(waiting)
+
+    def expire(self, now: float) -> Dict[str, Tuple[Any, Any]]:
+        """Roll back sent settings that were not confirmed in time.
+
+        Returns key -> (rejected pending value, value to restore). The value to
+        restore is the confirmed one, else the one shown before the edit (None
+        if there was none).
+        """
+        expired: Dict[str, Tuple[Any, Any]] = {}
+        for key, sent in list(self._sent.items()):
+            if now - sent > self._confirm_timeout:
+                del self._sent[key]
+                self._refreshed.discard(key)
+                previous = self._previous.pop(key, None)
+                expired[key] = (
+                    self._pending.pop(key, None),
+                    self._confirmed[key] if key in self._confirmed else previous,
+                )
+        return expired
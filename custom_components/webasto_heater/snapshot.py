@@ -0,0 +1,111 @@
+"""Versioned read-only state snapshot of the Webasto heater."""
+import logging
+from collections.abc import Mapping
+from typing import Any, Dict, Iterator, Set
+
+from .schema import KNOWN_FIELDS
+
+_LOGGER = logging.getLogger(__name__)
+
+_KNOWN_FIELD_SET = frozenset(KNOWN_FIELDS)
+
+# Максимальное количество неизвестных ключей, которые храним помимо известных полей
+MAX_EXTRA_KEYS = 64
+
+_UNSET = object()
+
+
+class WebastoSnapshot(Mapping):
+    """Read-only view of the latest heater state.
+
+    Known fields live in slots, unknown keys go to a bounded overflow map.
+    The generation counter increases on every observable change, so readers
+    can skip work when it has not moved. Only WebastoHeaterData writes to it.
+    """
+
+    __slots__ = ("_generation", "_extra", "_extra_overflow") + KNOWN_FIELDS
+
+    def __init__(self) -> None:
+        """Initialize an empty snapshot."""
+        setter = object.__setattr__
+        setter(self, "_generation", 0)
+        setter(self, "_extra", {})
+        setter(self, "_extra_overflow", False)
+        for field in KNOWN_FIELDS:
+            setter(self, field, _UNSET)
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        raise AttributeError("WebastoSnapshot is read-only")
+
+    __delattr__ = __setattr__
+
+    @property
+    def generation(self) -> int:
+        """Return the generation counter of the snapshot."""
+        return self._generation
+
+    def __getitem__(self, key: str) -> Any:
+        if key in _KNOWN_FIELD_SET:
+            value = getattr(self, key)
+            if value is _UNSET:
+                raise KeyError(key)
+            return value
+        return self._extra[key]
+
+    def get(self, key: str, default: Any = None) -> Any:
+        """Return the value for key without raising."""
+        if key in _KNOWN_FIELD_SET:
+            value = getattr(self, key)
+            return default if value is _UNSET else value
+        return self._extra.get(key, default)
+
+    def __contains__(self, key: object) -> bool:
+        if key in _KNOWN_FIELD_SET:
+            return getattr(self, key) is not _UNSET
+        return key in self._extra
+
+    def __iter__(self) -> Iterator[str]:
+        for field in KNOWN_FIELDS:
+            if getattr(self, field) is not _UNSET:
+                yield field
+        yield from self._extra
+
+    def __len__(self) -> int:
+        return sum(1 for _ in self)
+
+    def __repr__(self) -> str:
+        return f"WebastoSnapshot(generation={self._generation}, {dict(self)!r})"
+
+    def _apply(self, values: Dict[str, Any]) -> Set[str]:
+        """Merge values in place and return the keys that changed.
+
+        Writer-side API, called only by WebastoHeaterData.
+        """
+        setter = object.__setattr__
+        extra = self._extra
+        changed: Set[str] = set()
+        for key, value in values.items():
+            if key in _KNOWN_FIELD_SET:
+                if getattr(self, key) != value:
+                    setter(self, key, value)
+                    changed.add(key)
+            elif key in extra:
+                if extra[key] != value:
+                    extra[key] = value
+                    changed.add(key)
+            elif len(extra) < MAX_EXTRA_KEYS:
+                extra[key] = value
+                changed.add(key)
+            elif not self._extra_overflow:
+                setter(self, "_extra_overflow", True)
+                _LOGGER.debug(
+                    "Too many unknown keys (%d), ignoring new key: %s",
+                    MAX_EXTRA_KEYS, key
+                )
+        if changed:
+            setter(self, "_generation", self._generation + 1)
+        return changed
+
+    def _bump(self) -> None:
+        """Advance the generation without changing values (e.g. availability change)."""
+        object.__setattr__(self, "_generation", self._generation + 1)
@@ -0,0 +1,97 @@
+"""Lifetime counters of the heater kept by the integration itself."""
+import logging
+from typing import Any, Dict, Optional
+
+_LOGGER = logging.getLogger(__name__)
+
+# Версия и задержка сохранения счётчиков в .storage: пишем пакетно, а не на каждый кадр
+TOTALS_STORAGE_VERSION = 1
+TOTALS_SAVE_DELAY = 300
+# Интервал между кадрами, больше которого не интегрируем (потеря связи, перезапуск)
+MAX_INTEGRATION_GAP = 30.0
+
+
+class HeaterTotals:
+    """Fuel, burn time and start counters that survive device resets.
+
+    fuel_total_liters integrates fuel_rate_hz x pump_size (microliters per
+    pump stroke) with the trapezoidal rule over frame arrival times.
+    device_fuel_total_liters follows the device counter, treating a decrease
+    (RESET_FUEL_CONSUMPTION, ESP reboot) as a reset rather than consumption.
+    """
+
+    def __init__(self) -> None:
+        """Initialize zero counters."""
+        self.fuel_liters = 0.0
+        self.device_fuel_liters = 0.0
+        self.device_resets = 0
+        self.burn_seconds = 0.0
+        self.starts = 0
+        self._last_time: Optional[float] = None
+        self._last_rate: Optional[float] = None
+        self._last_burn: Optional[bool] = None
+        self._last_device_total: Optional[float] = None
+
+    def restore(self, stored: Dict[str, Any]) -> None:
+        """Load counters saved by as_dict."""
+        self.fuel_liters = stored.get("fuel_liters", 0.0)
+        self.device_fuel_liters = stored.get("device_fuel_liters", 0.0)
+        self.device_resets = stored.get("device_resets", 0)
+        self.burn_seconds = stored.get("burn_seconds", 0.0)
+        self.starts = stored.get("starts", 0)
+        self._last_burn = stored.get("last_burn")
+        self._last_device_total = stored.get("last_device_total")
+
+    def as_dict(self) -> Dict[str, Any]:
+        """Return the counters for storage."""
+        return {
+            "fuel_liters": self.fuel_liters,
+            "device_fuel_liters": self.device_fuel_liters,
+            "device_resets": self.device_resets,
+            "burn_seconds": self.burn_seconds,
+            "starts": self.starts,
+            "last_burn": self._last_burn,
+            "last_device_total": self._last_device_total,
+        }
+
+    def values(self) -> Dict[str, Any]:
+        """Return the counters as snapshot values."""
+        # Округление ограничивает частоту изменений снимка, а значит и записей сущностей
+        return {
+            "fuel_total_liters": round(self.fuel_liters, 3),
+            "device_fuel_total_liters": round(self.device_fuel_liters, 3),
+            "burn_hours": round(self.burn_seconds / 3600, 2),
+            "start_count": self.starts,
+        }
+
+    def update(self, now: float, values: Dict[str, Any], pump_size: Optional[float]) -> None:
+        """Account for a status frame received at monotonic time now."""
+        rate = values.get("fuel_rate_hz")
+        burn = values.get("burn")
+
+        elapsed = now - self._last_time if self._last_time is not None else None
+        if elapsed is not None and 0 < elapsed <= MAX_INTEGRATION_GAP:
+            if rate is not None and self._last_rate is not None and pump_size:
+                self.fuel_liters += (self._last_rate + rate) / 2 * elapsed * pump_size / 1e6
+            if self._last_burn and burn:
+                self.burn_seconds += elapsed
+        if burn and self._last_burn is False:
+            self.starts += 1
+
+        device_total = values.get("total_fuel_consumed_liters")
+        if device_total is not None:
+            last = self._last_device_total
+            if last is not None and device_total < last:
+                # Счётчик устройства обнулился - всё, что он показывает теперь, новое
+                self.device_resets += 1
+                _LOGGER.info("Device fuel counter reset (%s -> %s)", last, device_total)
+                self.device_fuel_liters += device_total
+            elif last is not None:
+                self.device_fuel_liters += device_total - last
+            self._last_device_total = device_total
+
+        self._last_time = now
+        if rate is not None:
+            self._last_rate = rate
+        if burn is not None:
+            self._last_burn = burn
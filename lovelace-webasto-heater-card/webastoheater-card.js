@@ -322,6 +322,39 @@ class WebastoHeaterCard extends LitElement {
     updated(changedProperties) {
         if (changedProperties.has('hass') && this.hass) {
             this._updateEntities();
+            this._watch();
+        }
+    }
+
+    connectedCallback() {
+        super.connectedCallback();
+        if (this.hass) {
+            this._watch();
+        }
+    }
+
+    disconnectedCallback() {
+        super.disconnectedCallback();
+        this._unwatch();
+    }
+
+    // Пока карточка открыта, интеграция просит у нагревателя частые кадры
+    _watch() {
+        if (this._watchSubscription || !this.hass.connection) {
+            return;
+        }
+        this._watchSubscription = this.hass.connection
+            .subscribeMessage(() => {}, { type: 'webasto/watch' })
+            .catch(error => {
+                console.warn('Интеграция не поддерживает webasto/watch:', error);
+                return null;
+            });
+    }
+
+    _unwatch() {
+        if (this._watchSubscription) {
+            this._watchSubscription.then(unsubscribe => unsubscribe && unsubscribe());
+            this._watchSubscription = null;
         }
     }
 
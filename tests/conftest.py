@@ -0,0 +1,19 @@
+"""Test setup for the modules of the integration that work without Home Assistant.
+
+The package __init__ needs Home Assistant and websockets, so the package is
+registered without running it; its submodules are imported as usual.
+"""
+import pathlib
+import sys
+import types
+
+ROOT = pathlib.Path(__file__).resolve().parent.parent
+
+for _name, _path in (
+    ("custom_components", ROOT / "custom_components"),
+    ("custom_components.webasto_heater", ROOT / "custom_components" / "webasto_heater"),
+):
+    if _name not in sys.modules:
+        _module = types.ModuleType(_name)
+        _module.__path__ = [str(_path)]
+        sys.modules[_name] = _module
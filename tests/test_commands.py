@@ -0,0 +1,121 @@
+"""Tests for the outbound command queue."""
+import asyncio
+import time
+
+import pytest
+
+pytest.importorskip("homeassistant")
+
+from custom_components.webasto_heater.commands import (  # noqa: E402
+    COMMAND_HOLD_TIMEOUT,
+    PRIORITY_HIGH,
+    CommandQueue,
+    command_priority,
+)
+
+
+async def _noop_send(command):
+    pass
+
+
+def test_repeated_requests_are_coalesced():
+    async def scenario():
+        queue = CommandQueue(_noop_send)
+        queue.set_connected(True)
+        first = queue.enqueue("GET_SETTINGS")
+        second = queue.enqueue("GET_SETTINGS")
+        return queue, first, second
+
+    queue, first, second = asyncio.run(scenario())
+    assert first is second
+    assert queue.pending == 1
+    assert queue.stats["GET_SETTINGS"]["coalesced"] == 1
+
+
+def test_set_commands_merge_newer_values():
+    async def scenario():
+        queue = CommandQueue(_noop_send)
+        queue.set_connected(True)
+        queue.enqueue("SET:pump_size=22,target_temp=190")
+        queue.enqueue("SET:target_temp=200,glow_brightness=5")
+        return queue._peek().command
+
+    assert asyncio.run(scenario()) == "SET:pump_size=22,target_temp=200,glow_brightness=5"
+
+
+def test_rate_keeps_the_latest_interval():
+    async def scenario():
+        queue = CommandQueue(_noop_send)
+        queue.set_connected(True)
+        queue.enqueue("RATE:10000")
+        queue.enqueue("RATE:500")
+        return queue.pending, queue._peek().command
+
+    assert asyncio.run(scenario()) == (1, "RATE:500")
+
+
+def test_high_priority_is_written_first():
+    async def scenario():
+        sent = []
+
+        async def send(command):
+            sent.append(command)
+
+        queue = CommandQueue(send, min_gap=0)
+        queue.set_connected(True)
+        normal = queue.enqueue("UP")
+        urgent = queue.enqueue("CF", PRIORITY_HIGH)
+        queue.start(asyncio.get_running_loop().create_task)
+        results = [await normal, await urgent]
+        await queue.async_stop()
+        return sent, results
+
+    assert asyncio.run(scenario()) == (["CF", "UP"], [True, True])
+
+
+def test_command_priority():
+    assert command_priority("CF", burning=False) == PRIORITY_HIGH
+    assert command_priority("ENTER", burning=True) == PRIORITY_HIGH
+    assert command_priority("ENTER", burning=False) != PRIORITY_HIGH
+
+
+def test_disconnected_queue_holds_only_safe_commands():
+    async def scenario():
+        queue = CommandQueue(_noop_send)
+        dropped = queue.enqueue("UP")
+        held = queue.enqueue("GET_SETTINGS")
+        return queue, dropped, held
+
+    queue, dropped, held = asyncio.run(scenario())
+    assert dropped.result() is False
+    assert not held.done()
+    assert queue.pending == 1
+
+
+def test_connection_loss_drops_unsafe_commands():
+    async def scenario():
+        queue = CommandQueue(_noop_send)
+        queue.set_connected(True)
+        unsafe = queue.enqueue("FP")
+        held = queue.enqueue("SET:pump_size=22")
+        queue.set_connected(False)
+        return queue, unsafe, held
+
+    queue, unsafe, held = asyncio.run(scenario())
+    assert unsafe.result() is False
+    assert not held.done()
+    assert queue.stats["FP"]["dropped"] == 1
+
+
+def test_held_commands_expire():
+    async def scenario():
+        queue = CommandQueue(_noop_send)
+        held = queue.enqueue("GET_SETTINGS")
+        queue.expire(time.monotonic())
+        kept = queue.pending
+        queue.expire(time.monotonic() + COMMAND_HOLD_TIMEOUT + 1)
+        return kept, queue.pending, held
+
+    kept, pending, held = asyncio.run(scenario())
+    assert (kept, pending) == (1, 0)
+    assert held.result() is False
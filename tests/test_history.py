@@ -0,0 +1,65 @@
+"""Tests for the fixed-memory telemetry history."""
+import random
+
+import pytest
+
+from custom_components.webasto_heater.history import TelemetryRing
+
+
+def _expected(samples):
+    values = [value for _, value in samples]
+    return min(values), max(values), sum(values) / len(values)
+
+
+def test_empty_ring_has_no_stats():
+    assert TelemetryRing(capacity=4, window=60).stats() is None
+
+
+def test_stats_match_brute_force_over_capacity_and_window():
+    rng = random.Random(1)
+    ring = TelemetryRing(capacity=50, window=30.0)
+    samples = []
+    now = 0.0
+    # Больше capacity вытеснений, чтобы пройти и через пересчёт сумм
+    for _ in range(500):
+        now += rng.uniform(0.1, 1.0)
+        value = rng.uniform(-50, 300)
+        ring.push(now, value)
+        samples.append((now, value))
+        samples = [s for s in samples if s[0] >= now - 30.0][-50:]
+        stats = ring.stats()
+        low, high, mean = _expected(samples)
+        assert len(ring) == stats["window_samples"] == len(samples)
+        assert stats["window_min"] == low
+        assert stats["window_max"] == high
+        assert stats["window_mean"] == pytest.approx(mean)
+
+
+def test_capacity_evicts_the_oldest_sample():
+    ring = TelemetryRing(capacity=3, window=1000)
+    for now, value in enumerate((9.0, 1.0, 5.0, 4.0)):
+        ring.push(float(now), value)
+    stats = ring.stats()
+    assert stats["window_samples"] == 3
+    assert (stats["window_min"], stats["window_max"]) == (1.0, 5.0)
+
+
+def test_window_expires_old_samples():
+    ring = TelemetryRing(capacity=10, window=10)
+    ring.push(0.0, 100.0)
+    ring.push(5.0, 1.0)
+    assert ring.stats(now=12.0)["window_max"] == 1.0
+    assert ring.stats(now=20.0) is None
+
+
+def test_slope_is_per_minute():
+    ring = TelemetryRing(capacity=100, window=600)
+    for second in range(0, 60, 2):
+        ring.push(1000.0 + second, 20.0 + 0.5 * second)
+    assert ring.stats()["window_slope"] == pytest.approx(30.0)
+
+
+def test_slope_needs_two_distinct_times():
+    ring = TelemetryRing(capacity=4, window=60)
+    ring.push(1.0, 5.0)
+    assert ring.stats()["window_slope"] is None
@@ -0,0 +1,117 @@
+"""Tests for the wire formats, the frame dispatcher and sequence tracking."""
+import json
+
+import pytest
+
+from custom_components.webasto_heater.protocol import (
+    COMPACT_FIELDS,
+    DELTA_FIELD,
+    FRAME_FORMAT,
+    FRAME_RATE,
+    FRAME_SETTINGS,
+    FRAME_STATUS,
+    SEQ_FIELD,
+    SEQ_GAP,
+    SEQ_MODULO,
+    SEQ_OK,
+    SEQ_STALE,
+    SEQ_UNSYNCED,
+    Codec,
+    FrameDispatcher,
+    SequenceTracker,
+    encode_compact,
+    encode_compact_delta,
+    rate_command,
+)
+from custom_components.webasto_heater.schema import FrameDecoder
+
+STATUS = {
+    "exhaust_temp": 182.5, "fan_speed": 64, "fuel_rate_hz": 2.75, "burn_mode": 2,
+    "attempt": 1, "currentState": 1, "burn": True, "webasto_fail": False,
+    "debug_glow_plug_on": False, "fuel_pumping_active": False, "logging_enabled": True,
+    "wifi_status": 3, "total_fuel_consumed_liters": 12.345,
+    "fuel_consumption_per_hour": 0.41, "message": "Горение", "wifi_ip": "192.168.1.50",
+    "wifi_ssid": "home|net",
+}
+
+
+@pytest.fixture
+def dispatcher():
+    return FrameDispatcher()
+
+
+def test_compact_frame_decodes_like_json(dispatcher):
+    decoder = FrameDecoder()
+    _, kind, compact = dispatcher.decode(encode_compact(STATUS))
+    _, _, from_json = dispatcher.decode(json.dumps(STATUS))
+    assert kind == FRAME_STATUS
+    assert set(compact) == set(COMPACT_FIELDS)
+    assert decoder.decode(compact) == decoder.decode(from_json)
+    # Разделитель внутри SSID не сдвигает поля: SSID идёт последним
+    assert compact["wifi_ssid"] == "home|net"
+
+
+def test_compact_delta_carries_only_changed_fields(dispatcher):
+    _, kind, values = dispatcher.decode(encode_compact_delta(7, {"fan_speed": 70, "burn": False}))
+    assert kind == FRAME_STATUS
+    assert values == {"fan_speed": "70", "burn": "0", SEQ_FIELD: 7, DELTA_FIELD: True}
+
+
+def test_compact_delta_carries_an_empty_string(dispatcher):
+    _, _, values = dispatcher.decode(encode_compact_delta(8, {"message": "", "wifi_ssid": ""}))
+    assert values["message"] == ""
+    assert values["wifi_ssid"] == ""
+
+
+def test_dispatch_by_first_character(dispatcher):
+    assert dispatcher.decode('{"settings": {"pump_size": 22}}')[1:] == (
+        FRAME_SETTINGS, {"pump_size": 22}
+    )
+    assert dispatcher.decode("CURRENT_SETTINGS:pump_size=22,heater_target=190.5")[1:] == (
+        FRAME_SETTINGS, {"pump_size": 22, "heater_target": 190.5}
+    )
+    assert dispatcher.decode("FORMAT:COMPACT1")[1:] == (FRAME_FORMAT, "COMPACT1")
+    assert dispatcher.decode(rate_command(0.5))[1:] == (FRAME_RATE, 500)
+    # Строки журнала прошивки не относятся к протоколу
+    assert dispatcher.decode("LOG: glow plug on")[1] is None
+    assert dispatcher.decode("")[1] is None
+
+
+def test_codec_requires_decode():
+    with pytest.raises(TypeError):
+        Codec()
+
+
+def test_delta_before_a_full_frame_is_unsynced():
+    assert SequenceTracker().check(5, delta=True) == SEQ_UNSYNCED
+
+
+def test_sequence_in_order_gap_and_stale():
+    tracker = SequenceTracker()
+    assert tracker.check(10, delta=False) == SEQ_OK
+    assert tracker.check(11, delta=True) == SEQ_OK
+    assert tracker.check(14, delta=True) == SEQ_GAP
+    assert tracker.check(15, delta=True) == SEQ_OK
+    assert tracker.check(12, delta=True) == SEQ_STALE
+    # Устаревший кадр не сдвигает ожидаемый номер
+    assert tracker.check(16, delta=True) == SEQ_OK
+
+
+def test_sequence_wraps_around():
+    tracker = SequenceTracker()
+    assert tracker.check(SEQ_MODULO - 1, delta=False) == SEQ_OK
+    assert tracker.check(0, delta=True) == SEQ_OK
+    assert tracker.check(1, delta=True) == SEQ_OK
+    tracker.check(SEQ_MODULO - 2, delta=False)
+    assert tracker.check(2, delta=True) == SEQ_GAP
+    assert tracker.check(SEQ_MODULO - 1, delta=True) == SEQ_STALE
+
+
+def test_full_frame_resets_the_sequence():
+    tracker = SequenceTracker()
+    tracker.check(100, delta=False)
+    # Перезагрузка ESP: полный кадр с меньшим номером принимается как новая точка отсчёта
+    assert tracker.check(3, delta=False) == SEQ_OK
+    assert tracker.check(4, delta=True) == SEQ_OK
+    tracker.reset()
+    assert tracker.check(5, delta=True) == SEQ_UNSYNCED
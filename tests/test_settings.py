@@ -0,0 +1,94 @@
+"""Tests for the dirty-tracked settings store."""
+from custom_components.webasto_heater.settings import SettingsStore
+
+TIMEOUT = 10.0
+
+
+def _store(**confirmed):
+    store = SettingsStore(TIMEOUT)
+    if confirmed:
+        store.confirm(dict(confirmed))
+    return store
+
+
+def test_edit_is_dirty_until_sent():
+    store = _store(pump_size=22.0)
+    store.set("pump_size", 30.0)
+    assert store.dirty == {"pump_size": 30.0}
+    assert store.build_command() == "SET:pump_size=30"
+    store.mark_sent(["pump_size"], 0.0)
+    assert store.dirty == {}
+    assert store.is_pending("pump_size")
+    assert store.build_command() is None
+
+
+def test_setting_back_the_device_value_clears_the_edit():
+    store = _store(pump_size=22.0)
+    store.set("pump_size", 30.0)
+    store.set("pump_size", 22.0)
+    assert not store.is_pending("pump_size")
+    assert store.build_command() is None
+
+
+def test_echo_confirms_the_pending_value():
+    store = _store(pump_size=22.0)
+    store.set("pump_size", 30.0)
+    store.mark_sent(["pump_size"], 0.0)
+    values, confirmed = store.confirm({"pump_size": 30.0})
+    assert confirmed == {"pump_size"}
+    assert values == {"pump_size": 30.0}
+    assert store.pending == {}
+    assert store.confirmed["pump_size"] == 30.0
+    assert store.expire(TIMEOUT * 2) == {}
+
+
+def test_unrelated_payload_keeps_showing_the_pending_value():
+    store = _store(pump_size=22.0, heater_target=190.0)
+    store.set("pump_size", 30.0)
+    values, confirmed = store.confirm({"pump_size": 22.0, "heater_target": 195.0})
+    assert confirmed == set()
+    assert values == {"pump_size": 30.0, "heater_target": 195.0}
+    assert store.is_pending("pump_size")
+
+
+def test_refresh_is_requested_once_per_send():
+    store = _store(pump_size=22.0)
+    store.set("pump_size", 30.0)
+    store.mark_sent(["pump_size"], 0.0)
+    assert not store.needs_refresh(TIMEOUT / 4)
+    assert store.needs_refresh(TIMEOUT * 0.6)
+    assert not store.needs_refresh(TIMEOUT * 0.7)
+
+
+def test_unconfirmed_value_rolls_back_to_the_device_value():
+    store = _store(pump_size=22.0)
+    store.set("pump_size", 30.0, 22.0)
+    store.mark_sent(["pump_size"], 0.0)
+    assert store.expire(TIMEOUT / 2) == {}
+    assert store.expire(TIMEOUT + 1) == {"pump_size": (30.0, 22.0)}
+    assert not store.is_pending("pump_size")
+
+
+def test_rollback_without_device_value_restores_the_shown_value():
+    # Правка до первого ответа с настройками, например сразу после восстановления снимка
+    store = _store()
+    store.set("pump_size", 30.0, 25.0)
+    store.set("pump_size", 35.0, 30.0)
+    store.mark_sent(["pump_size"], 0.0)
+    assert store.expire(TIMEOUT + 1) == {"pump_size": (35.0, 25.0)}
+
+
+def test_rollback_without_any_value_clears_the_setting():
+    store = _store()
+    store.set("pump_size", 30.0)
+    store.mark_sent(["pump_size"], 0.0)
+    assert store.expire(TIMEOUT + 1) == {"pump_size": (30.0, None)}
+
+
+def test_undelivered_edit_becomes_dirty_again():
+    store = _store(pump_size=22.0)
+    store.set("pump_size", 30.0)
+    store.mark_sent(["pump_size"], 0.0)
+    store.mark_unsent(["pump_size"])
+    assert store.dirty == {"pump_size": 30.0}
+    assert store.expire(TIMEOUT + 1) == {}
@@ -0,0 +1,56 @@
+"""Tests for the lifetime counters kept by the integration."""
+import pytest
+
+from custom_components.webasto_heater.totals import MAX_INTEGRATION_GAP, HeaterTotals
+
+
+def test_fuel_is_integrated_with_the_trapezoidal_rule():
+    totals = HeaterTotals()
+    totals.update(0.0, {"fuel_rate_hz": 2.0}, 50.0)
+    totals.update(10.0, {"fuel_rate_hz": 4.0}, 50.0)
+    # (2 + 4) / 2 Гц * 10 с * 50 мкл
+    assert totals.fuel_liters == pytest.approx(0.0015)
+
+
+def test_fuel_is_not_integrated_without_pump_size_or_across_gaps():
+    totals = HeaterTotals()
+    totals.update(0.0, {"fuel_rate_hz": 2.0}, None)
+    totals.update(10.0, {"fuel_rate_hz": 2.0}, None)
+    assert totals.fuel_liters == 0.0
+    totals.update(10.0 + MAX_INTEGRATION_GAP + 1, {"fuel_rate_hz": 2.0}, 50.0)
+    assert totals.fuel_liters == 0.0
+
+
+def test_burn_time_and_starts():
+    totals = HeaterTotals()
+    # Первый кадр после запуска HA с горением - не новый запуск
+    totals.update(0.0, {"burn": True}, None)
+    totals.update(5.0, {"burn": True}, None)
+    totals.update(6.0, {"burn": False}, None)
+    totals.update(7.0, {"burn": True}, None)
+    totals.update(9.0, {"burn": True}, None)
+    assert totals.starts == 1
+    assert totals.burn_seconds == pytest.approx(7.0)
+    assert totals.values()["start_count"] == 1
+
+
+def test_device_counter_reset_is_not_consumption():
+    totals = HeaterTotals()
+    for now, total in enumerate((1.0, 1.5, 0.2, 0.4)):
+        totals.update(float(now), {"total_fuel_consumed_liters": total}, None)
+    assert totals.device_resets == 1
+    assert totals.device_fuel_liters == pytest.approx(0.5 + 0.2 + 0.2)
+
+
+def test_counters_survive_a_restore():
+    totals = HeaterTotals()
+    totals.update(0.0, {"total_fuel_consumed_liters": 1.0, "burn": False}, None)
+    totals.update(1.0, {"total_fuel_consumed_liters": 1.25, "burn": False}, None)
+
+    restored = HeaterTotals()
+    restored.restore(totals.as_dict())
+    # После перезапуска HA прирост счётчика устройства и новый розжиг учитываются
+    restored.update(100.0, {"total_fuel_consumed_liters": 1.5, "burn": True}, None)
+    assert restored.device_fuel_liters == pytest.approx(0.5)
+    assert restored.starts == 1
+    assert restored.values()["device_fuel_total_liters"] == 0.5